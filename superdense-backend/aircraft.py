@@ -1,15 +1,45 @@
-from flask import Flask, jsonify, request
+from flask import Blueprint, jsonify, request
 from flask_cors import CORS
 import requests
 import math
 import time
 import csv
 import os
+import threading
+import numpy as np
+import services
+import tracking
+import conflicts
+import geofence
+import alert_pipeline
+import coalesce
+from metrics import timed, timed_jsonify
 #hello
-app = Flask(__name__)
-CORS(app)
+bp = Blueprint("aircraft", __name__)
+CORS(bp, expose_headers=["X-Coalesced"])
 
-SIMULATED_CSV = "simulated_flights.csv"  # Path to your CSV
+# Resolved next to this file so the blueprint also works when mounted by server.py
+SIMULATED_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simulated_flights.csv")
+
+# Overridable so load tests can point at a local stand-in (see fake_services.py)
+OPENSKY_URL = os.getenv("OPENSKY_URL", "https://opensky-network.org/api")
+
+# Replay of a recording converted by flight_store.py. When set, it replaces
+# OpenSky and the simulated CSV: positions advance FLIGHT_REPLAY_SPEED times
+# faster than real time, looping at the end of the recording.
+FLIGHT_REPLAY_PATH = os.getenv("FLIGHT_REPLAY_PATH")
+FLIGHT_REPLAY_SPEED = float(os.getenv("FLIGHT_REPLAY_SPEED", "1"))
+# Aircraft whose last report is older than this (replay seconds) have left the picture
+FLIGHT_REPLAY_MAX_AGE = float(os.getenv("FLIGHT_REPLAY_MAX_AGE", "300"))
+# Recent reports returned as each replayed flight's "timestamps"
+FLIGHT_REPLAY_TRACK_POINTS = int(os.getenv("FLIGHT_REPLAY_TRACK_POINTS", "20"))
+
+# Refresh the feed in the background every N seconds so restricted-zone
+# alerts (alert_pipeline.py) flow without a client polling /api/flights; 0 = off
+ALERT_POLL_SECONDS = float(os.getenv("ALERT_POLL_SECONDS", "0"))
+
+# Longest geofence horizon a request may ask for (seconds)
+GEOFENCE_MAX_HORIZON = float(os.getenv("GEOFENCE_MAX_HORIZON", "86400"))
 
 # -------------------------------
 # Pakistan-Occupied Kashmir (PoK) and Aksai Chin as Restricted Areas
@@ -61,6 +91,16 @@ def is_in_restricted_area(lat, lon):
             return True
     return False
 
+# Exact entry/exit times along projected paths (see geofence.py)
+GEOFENCE = geofence.Geofence(RESTRICTED_AREAS)
+
+def restricted_flags(lat, lon):
+    """is_in_restricted_area over arrays of positions, without a Python loop per point."""
+    inside = np.zeros(np.shape(lat), dtype=bool)
+    for area in RESTRICTED_AREAS:
+        inside |= geofence.contains(lat, lon, area)
+    return inside
+
 # Helper to convert boolean to Yes/No
 def yes_no(value):
     return "Yes" if value else "No"
@@ -117,17 +157,102 @@ def load_simulated_flights():
     print(f"✅ Loaded {len(flights)} simulated flights from CSV")
     return flights
 
+# -------------------------------
+# Replay a recorded dataset
+# -------------------------------
+_replay = None
+_replay_lock = threading.Lock()
+
+def get_replay():
+    """(FlightDataset, ReplayClock) for FLIGHT_REPLAY_PATH, opened on first use."""
+    global _replay
+    with _replay_lock:
+        if _replay is None:
+            import flight_store
+            dataset = flight_store.FlightDataset(FLIGHT_REPLAY_PATH)
+            clock = flight_store.ReplayClock(dataset.start, dataset.end, speed=FLIGHT_REPLAY_SPEED)
+            _replay = (dataset, clock)
+            print(f"✅ Replaying {len(dataset)} reports of {len(dataset.aircraft)} aircraft "
+                  f"at {FLIGHT_REPLAY_SPEED}x from {FLIGHT_REPLAY_PATH}")
+        return _replay
+
+def replay_track(dataset, aircraft_id, until, limit=None):
+    return replay_tracks(dataset, [aircraft_id], until, limit)[0]
+
+def replay_tracks(dataset, aircraft_ids, until, limit=None):
+    """Reports of each aircraft up to `until`, read and geofenced as one batch of rows."""
+    tracks = [dataset.track(aircraft_id, until=until, limit=limit) for aircraft_id in aircraft_ids]
+    if not tracks:
+        return []
+    cols = dataset.rows(np.concatenate(tracks))
+    restricted = restricted_flags(cols["lat"], cols["lon"])
+    points = [{
+        "lat": lat,
+        "lon": lon,
+        "altitude": alt,
+        "timestamp": int(ts),
+        "restricted": yes_no(inside)
+    } for lat, lon, alt, ts, inside in zip(cols["lat"].tolist(), cols["lon"].tolist(),
+                                           cols["altitude"].tolist(), cols["timestamp"].tolist(),
+                                           restricted.tolist())]
+    bounds = np.cumsum([0] + [len(track) for track in tracks]).tolist()
+    return [points[lo:hi] for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+def load_replay_flights():
+    dataset, clock = get_replay()
+    now = clock.now()
+    with timed("replay_positions"):
+        ids, pos = dataset.latest(now, max_age=FLIGHT_REPLAY_MAX_AGE)
+        cols = dataset.rows(dataset.by_aircraft[pos])
+        restricted = restricted_flags(cols["lat"], cols["lon"])
+        # the tracker feeds on every report since the last refresh
+        tracks = replay_tracks(dataset, ids.tolist(), now, FLIGHT_REPLAY_TRACK_POINTS)
+
+    flights = []
+    for i, aircraft_id in enumerate(ids.tolist()):
+        info = dataset.aircraft[aircraft_id]
+        flights.append({
+            "icao24": info["icao24"],
+            "callsign": info["callsign"],
+            "route": info["route"],
+            "latitude": float(cols["lat"][i]),
+            "longitude": float(cols["lon"][i]),
+            "altitude": float(cols["altitude"][i]),
+            "velocity": float(cols["velocity"][i]),
+            "heading": float(cols["heading"][i]),
+            "timestamp": int(cols["timestamp"][i]),
+            "timestamps": tracks[i],
+            "restricted": yes_no(restricted[i]),
+            "source": "replay"
+        })
+    return flights
+
 # -------------------------------
 # Fetch Live Flights (merge with simulated)
 # -------------------------------
+# Concurrent callers (/api/flights, /api/predict, /api/conflicts, the alert
+# poller) share one feed download
+FEED = coalesce.Coalescer("flight_feed")
+
 def fetch_live_flights():
-    url = "https://opensky-network.org/api/states/all"
+    return FEED.run("flights", _fetch_live_flights)[1]
+
+def _fetch_live_flights():
+    if FLIGHT_REPLAY_PATH:
+        flights = load_replay_flights()
+        tracking.tracker.update_flights(flights)
+        conflicts.index.update(flights)
+        alert_pipeline.pipeline.observe(flights)
+        return flights
+
+    url = f"{OPENSKY_URL}/states/all"
     flights = []
     live_available = False  # Track if live flights are fetched
 
     # Try fetching live flights
     try:
-        resp = requests.get(url, timeout=10).json()
+        with timed("http_opensky_states"):
+            resp = requests.get(url, timeout=10).json()
         if "states" in resp and resp["states"]:
             live_available = True
             for s in resp["states"]:
@@ -143,6 +268,7 @@ def fetch_live_flights():
                     "on_ground": s[8],
                     "velocity": s[9],   # in m/s
                     "heading": s[10],   # in degrees
+                    "timestamp": s[3] or s[4],  # time of position, else last contact
                 }
                 if flight["latitude"] is not None and flight["longitude"] is not None:
                     flight["restricted"] = yes_no(is_in_restricted_area(flight["latitude"], flight["longitude"]))
@@ -160,6 +286,12 @@ def fetch_live_flights():
         if not any(f["icao24"] == s["icao24"] for f in flights):
             flights.append(s)
 
+    # Feed the new reports to the per-aircraft filters used by predict_trajectory,
+    # the separation index behind /api/conflicts and the alert pipeline
+    tracking.tracker.update_flights(flights)
+    conflicts.index.update(flights)
+    alert_pipeline.pipeline.observe(flights)
+
     print(f"✅ Returning {len(flights)} flights (live + simulated)")
     return flights
 
@@ -167,10 +299,16 @@ def fetch_live_flights():
 # Fetch Historical Track
 # -------------------------------
 def fetch_flight_track(icao24):
+    if FLIGHT_REPLAY_PATH:
+        dataset, clock = get_replay()
+        aircraft_id = dataset.find(icao24)
+        return [] if aircraft_id is None else replay_track(dataset, aircraft_id, clock.now())
+
     end = int(time.time())
-    url = f"https://opensky-network.org/api/tracks/all?icao24={icao24}&time={end}"
+    url = f"{OPENSKY_URL}/tracks/all?icao24={icao24}&time={end}"
     try:
-        resp = requests.get(url, timeout=10).json()
+        with timed("http_opensky_track"):
+            resp = requests.get(url, timeout=10).json()
         if "path" in resp:
             path = [{"lat": p[1], "lon": p[2], "altitude": p[3] or 0, "timestamp": p[0],
                      "restricted": yes_no(is_in_restricted_area(p[1], p[2]))} 
@@ -191,31 +329,41 @@ def fetch_flight_track(icao24):
 # -------------------------------
 # Predict Trajectory
 # -------------------------------
-def predict_trajectory(flight, steps=10, interval=60):
+def current_motion(flight):
+    """(lat, lon, velocity, heading) to project `flight` from, or None if unknown."""
     lat = flight["latitude"]
     lon = flight["longitude"]
     vel = flight.get("velocity")
     heading = flight.get("heading")
 
-    timestamps = flight.get("timestamps", [])
-    if len(timestamps) >= 2:
-        last = timestamps[-1]
-        prev = timestamps[-2]
-        delta_lat = math.radians(last["lat"] - prev["lat"])
-        delta_lon = math.radians(last["lon"] - prev["lon"])
-        avg_lat = math.radians((last["lat"] + prev["lat"]) / 2)
-        R = 6371e3
-        dx = delta_lon * math.cos(avg_lat) * R
-        dy = delta_lat * R
-        dt = last["timestamp"] - prev["timestamp"]
-        if dt > 0:
-            vel = math.sqrt(dx**2 + dy**2) / dt
-            heading = math.degrees(math.atan2(dx, dy)) % 360
-            lat = last["lat"]
-            lon = last["lon"]
+    # Start from the tracking filter's estimate once it has seen two reports;
+    # only reports it has not seen yet are fed here (see tracking.py)
+    tracking.tracker.update_flight(flight)
+    track = tracking.tracker.get(flight.get("icao24"))
+    if track and track["reports"] >= 2:
+        lat, lon = track["lat"], track["lon"]
+        vel, heading = track["velocity"], track["heading"]
 
     if lat is None or lon is None or vel is None or heading is None:
+        return None
+    return lat, lon, vel, heading
+
+def geofence_entries(flights, horizon):
+    """Exact restricted-area intervals within `horizon` seconds, one list per flight."""
+    motions = [current_motion(f) for f in flights]
+    known = [i for i, m in enumerate(motions) if m is not None]
+    result = [[] for _ in flights]
+    if known:
+        lat, lon, vel, heading = zip(*(motions[i] for i in known))
+        for i, entries in zip(known, GEOFENCE.intervals(lat, lon, vel, heading, horizon)):
+            result[i] = entries
+    return result
+
+def predict_trajectory(flight, steps=10, interval=60):
+    motion = current_motion(flight)
+    if motion is None:
         return []
+    lat, lon, vel, heading = motion
 
     predictions = []
     R = 6371e3
@@ -252,35 +400,143 @@ def predict_trajectory(flight, steps=10, interval=60):
 # -------------------------------
 # API: Get Live + Simulated Flights
 # -------------------------------
-@app.route("/api/flights", methods=["GET"])
+@bp.route("/api/flights", methods=["GET"])
 def api_flights():
     flights = fetch_live_flights()
-    return jsonify({"flights": flights})
+    return timed_jsonify({"flights": flights})
 
 # -------------------------------
 # API: Predict Flight Path
 # -------------------------------
-@app.route("/api/predict", methods=["GET"])
-def api_predict():
-    icao24 = request.args.get("icao24")
-    if not icao24:
-        return jsonify({"error": "Missing ICAO24"}), 400
+# Identical concurrent predictions share one feed download and projection
+PREDICTIONS = coalesce.Coalescer("predict")
 
+def predict_payload(icao24, horizon):
+    """(body, status) of /api/predict for one aircraft."""
     flights = fetch_live_flights()
     flight = next((f for f in flights if f["icao24"] == icao24), None)
     if not flight:
-        return jsonify({"error": "Flight not found"}), 404
+        return {"error": "Flight not found"}, 404
 
     historical_path = fetch_flight_track(icao24)
     predicted_path = predict_trajectory(flight)
     last_predicted = predicted_path[-1] if predicted_path else None
 
-    return jsonify({
+    return {
         "flight": flight,
         "historical_path": historical_path,
         "predicted_path": predicted_path,
-        "last_predicted": last_predicted
+        "last_predicted": last_predicted,
+        "geofence": geofence_entries([flight], horizon)[0]
+    }, 200
+
+def parse_horizon(default):
+    """?horizon= in seconds; ValueError unless finite and in (0, GEOFENCE_MAX_HORIZON]."""
+    horizon = float(request.args.get("horizon", default))
+    if not math.isfinite(horizon) or not 0 < horizon <= GEOFENCE_MAX_HORIZON:
+        raise ValueError(f"horizon must be between 0 and {GEOFENCE_MAX_HORIZON:g} seconds")
+    return horizon
+
+@bp.route("/api/predict", methods=["GET"])
+def api_predict():
+    icao24 = request.args.get("icao24")
+    if not icao24:
+        return jsonify({"error": "Missing ICAO24"}), 400
+    icao24 = icao24.strip()
+
+    try:
+        horizon = parse_horizon(600)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid horizon: {str(e)}"}), 400
+
+    outcome, (body, status) = PREDICTIONS.run(
+        coalesce.fingerprint(icao24, horizon), lambda: predict_payload(icao24, horizon))
+    response = timed_jsonify(body)
+    response.headers["X-Coalesced"] = outcome
+    return response, status
+
+# -------------------------------
+# API: Restricted-Area Entries for the Fleet
+# -------------------------------
+@bp.route("/api/geofence", methods=["GET"])
+def api_geofence():
+    try:
+        horizon = parse_horizon(3600)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {str(e)}"}), 400
+
+    flights = fetch_live_flights()
+    entries = geofence_entries(flights, horizon)
+    return timed_jsonify({
+        "horizon_sec": horizon,
+        "entries": [
+            dict(entry, icao24=flight["icao24"], callsign=flight.get("callsign"))
+            for flight, flight_entries in zip(flights, entries)
+            for entry in flight_entries
+        ]
+    })
+
+# -------------------------------
+# API: Loss-of-Separation Conflicts
+# -------------------------------
+@bp.route("/api/conflicts", methods=["GET"])
+def api_conflicts():
+    try:
+        lookahead = int(request.args.get("lookahead", "0"))
+        interval = int(request.args.get("interval", "60"))
+        if not 0 <= lookahead <= 30 or interval <= 0:
+            raise ValueError("lookahead must be 0-30 steps and interval positive")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {str(e)}"}), 400
+
+    fetch_live_flights()  # refreshes conflicts.index
+    found = conflicts.index.detect(lookahead, interval, predict=predict_trajectory)
+    return timed_jsonify({
+        "aircraft": len(conflicts.index.flights),
+        "horizontal_m": conflicts.index.horizontal_m,
+        "vertical_m": conflicts.index.vertical_m,
+        "lookahead_sec": lookahead * interval,
+        "conflicts": found
     })
 
+# -------------------------------
+# API: Restricted-Zone Alerts (batched SDC delivery)
+# -------------------------------
+@bp.route("/api/alerts", methods=["GET"])
+def api_alerts():
+    try:
+        after = int(request.args.get("after", "0"))
+        limit = max(1, min(int(request.args.get("limit", "100")), alert_pipeline.ALERT_HISTORY))
+    except ValueError:
+        return jsonify({"error": "Invalid query"}), 400
+    return timed_jsonify(alert_pipeline.pipeline.recent(after, limit))
+
+def start_alert_poller(interval=ALERT_POLL_SECONDS):
+    """Refreshes the flight feed every `interval` seconds in a daemon thread."""
+    if interval <= 0 or not alert_pipeline.pipeline.enabled:
+        return None
+
+    def poll():
+        while True:
+            try:
+                fetch_live_flights()
+            except Exception as e:
+                print("❌ Alert poller error:", e)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=poll, name="alert-poller", daemon=True)
+    thread.start()
+    return thread
+
+# -------------------------------
+# Standalone App
+# -------------------------------
+def create_app():
+    return services.create_app(__name__, bp)
+
+app = create_app()
+
 if __name__ == "__main__":
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":  # the reloader's serving child only
+        start_alert_poller()
     app.run(debug=True, port=5002)
@@ -1,12 +1,17 @@
 import os
-import base64
-import io
-from flask import Flask, request, jsonify
+import sys
+from flask import Blueprint, request, jsonify
 from flask_cors import CORS
-import matplotlib
-import matplotlib.pyplot as plt
 from dotenv import load_dotenv
-import os
+import startup
+import services
+import execution
+import channel_model
+import result_store
+import coalesce
+import decoding
+from metrics import timed, timed_jsonify
+from services import fig_to_base64, get_runtime, get_simulator, pyplot
 
 # Load the .env file
 load_dotenv()
@@ -14,61 +19,64 @@ api_key = os.getenv("API_KEY")
 crn = os.getenv("CRN")
 
 # --- Qiskit Imports ---
+# Only the circuit model is imported eagerly. Aer, the IBM runtime, the
+# transpiler and matplotlib are imported on first use (see preload()).
 print("Checkpoint 1: Importing Qiskit libraries...")
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
-from qiskit_aer import AerSimulator
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-from qiskit.visualization import plot_histogram
 print("Checkpoint 2: Qiskit libraries imported successfully.")
 
 # =============================================================================
 #  CONFIGURATION
 # =============================================================================
-matplotlib.use('Agg')
-
-# --- Flask App Initialization ---
-app = Flask(__name__)
-CORS(app)
-
-# =============================================================================
-#  HELPER FUNCTION: Convert Matplotlib figure to Base64 PNG
-# =============================================================================
-def fig_to_base64(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
-    return base64.b64encode(buf.getvalue()).decode('utf-8')
+# Heavy modules that are deferred until a request needs them.
+HEAVY_MODULES = [
+    "matplotlib.pyplot",
+    "qiskit_aer",
+    "qiskit.visualization",
+    "qiskit.transpiler.preset_passmanagers",
+    "qiskit_ibm_runtime",
+]
+
+# --- Flask Blueprint Initialization ---
+# Mounted by server.py next to the other backends; create_app() below runs it
+# standalone on port 5000.
+bp = Blueprint("testing", __name__)
+CORS(bp, expose_headers=["X-Coalesced"])
 
 # =============================================================================
 #  LOCAL SIMULATION LOGIC
 # =============================================================================
-def run_local_simulation(message: str, shots: int = 1024):
+def run_local_simulation(message: str, shots: int = 1024, noise_model=None):
+    from qiskit.visualization import plot_histogram
+    pyplot()  # select Agg before qiskit's drawers import pyplot
+
     print("--- Running Local Simulation ---")
-    q = QuantumRegister(2, 'q')
-    c = ClassicalRegister(2, 'c')
-    circ = QuantumCircuit(q, c)
-    
-    circ.h(q[0]); circ.cx(q[0], q[1]); circ.barrier()
-    if message == '01': circ.x(q[0])
-    elif message == '10': circ.z(q[0])
-    elif message == '11': circ.z(q[0]); circ.x(q[0])
-    circ.barrier()
-    circ.cx(q[0], q[1]); circ.h(q[0]); circ.barrier()
-    circ.measure(q[0], c[0]); circ.measure(q[1], c[1])
-
-    backend = AerSimulator()
-    job = backend.run(circ, shots=shots)
-    counts = job.result().get_counts(circ)
-
-    # Fix endian by reversing keys
-    remapped = {'00': 0, '01': 0, '10': 0, '11': 0}
-    for k, v in counts.items():
-        remapped[k[::-1]] += v
-    success_rate = remapped.get(message, 0) / shots
-
-    circuit_fig = circ.draw(output='mpl', style='iqp')
-    hist_fig = plot_histogram(remapped, title=f"Local Simulation (Message: {message})")
+    with timed("circuit_build"):
+        q = QuantumRegister(2, 'q')
+        c = ClassicalRegister(2, 'c')
+        circ = QuantumCircuit(q, c)
+
+        circ.h(q[0]); circ.cx(q[0], q[1]); circ.barrier()
+        if message == '01': circ.x(q[0])
+        elif message == '10': circ.z(q[0])
+        elif message == '11': circ.z(q[0]); circ.x(q[0])
+        circ.barrier()
+        circ.cx(q[0], q[1]); circ.h(q[0]); circ.barrier()
+        circ.measure(q[0], c[0]); circ.measure(q[1], c[1])
+
+    with timed("simulate"):
+        job = execution.run(circ, noise_model=noise_model, shots=shots)  # Clifford -> stabilizer method
+        result = job.result()
+
+    with timed("result_parse"):
+        # Fix endian: index the histogram in message order (reversed keys)
+        hist = decoding.aer_histogram(result, 0, 2, order="message")
+        remapped = decoding.to_counts(hist, 2)
+        success_rate = int(hist[int(message, 2)]) / shots
+
+    with timed("figure_build"):
+        circuit_fig = circ.draw(output='mpl', style='iqp')
+        hist_fig = plot_histogram(remapped, title=f"Local Simulation (Message: {message})")
 
     return {
         "counts": remapped,
@@ -80,54 +88,75 @@ def run_local_simulation(message: str, shots: int = 1024):
 # =============================================================================
 #  IBM QUANTUM PLATFORM LOGIC
 # =============================================================================
-def run_ibm_simulation(message: str, shots: int = 1024):
+def get_ibm_runtime():
+    """Returns the shared IBM Quantum Platform session (see services.get_runtime)."""
+    return get_runtime("ibm_quantum_platform",
+                       token=os.getenv("IBM_QUANTUM_TOKEN", api_key),
+                       instance=os.getenv("IBM_INSTANCE", crn))
+
+def run_ibm_simulation(message: str, shots: int = 1024, reuse=None):
+    """Runs the SDC circuit on IBM hardware and records the run in result_store.
+
+    With `reuse` (default RESULT_STORE_REUSE) an identical stored run on the
+    same backend with the same shots is returned instead of submitting a job.
+    """
+    from qiskit.visualization import plot_histogram
+    pyplot()  # select Agg before qiskit's drawers import pyplot
+
     print("--- Running IBM Simulation ---")
     try:
-        IBM_QUANTUM_TOKEN = os.getenv("IBM_QUANTUM_TOKEN", api_key)
-        IBM_INSTANCE = os.getenv("IBM_INSTANCE", crn)
-
-        service = QiskitRuntimeService(channel="ibm_quantum_platform",
-                                       token=IBM_QUANTUM_TOKEN,
-                                       instance=IBM_INSTANCE)
-        backend = service.least_busy(simulator=False, operational=True)
+        runtime = get_ibm_runtime()
+        backend = runtime.backend
         print(f"Using backend: {backend.name}")
     except Exception as e:
         print(f"ERROR during IBM connection: {e}")
         return {"error": f"IBM Quantum Connection Error: {str(e)}"}
 
-    q = QuantumRegister(2, "q")
-    c = ClassicalRegister(2, "c")
-    qc = QuantumCircuit(q, c)
-
-    qc.h(q[0]); qc.cx(q[0], q[1])
-    if message == "01": qc.x(q[0])
-    elif message == "10": qc.z(q[0])
-    elif message == "11": qc.z(q[0]); qc.x(q[0])
-    qc.cx(q[0], q[1]); qc.h(q[0]); qc.measure(q, c)
-
-    pm = generate_preset_pass_manager(backend=backend, optimization_level=1)
-    isa_circ = pm.run(qc)
-
-    sampler = Sampler(backend)
-    job = sampler.run([isa_circ], shots=shots)
-    job_id = job.job_id()
-    res = job.result()
-    pub = res[0]
-
-    # Raw counts from backend
-    counts_raw = getattr(pub.data, c.name).get_counts()
-
-    # Fix endian (reverse keys like local)
-    counts = {'00': 0, '01': 0, '10': 0, '11': 0}
-    for k, v in counts_raw.items():
-        counts[k[::-1]] += v
-
-    circuit_fig = qc.draw(output='mpl', style='iqp', idle_wires=False)
-    hist_fig = plot_histogram(counts, title=f"IBM Backend: {backend.name} (Message: {message})")
+    with timed("circuit_build"):
+        q = QuantumRegister(2, "q")
+        c = ClassicalRegister(2, "c")
+        qc = QuantumCircuit(q, c)
+
+        qc.h(q[0]); qc.cx(q[0], q[1])
+        if message == "01": qc.x(q[0])
+        elif message == "10": qc.z(q[0])
+        elif message == "11": qc.z(q[0]); qc.x(q[0])
+        qc.cx(q[0], q[1]); qc.h(q[0]); qc.measure(q, c)
+
+    key = result_store.circuit_hash(qc)
+    reuse = result_store.RESULT_STORE_REUSE if reuse is None else reuse
+    with timed("store_lookup"):
+        stored = result_store.store.lookup("run_simulation", key, backend.name, shots) if reuse else None
+
+    if stored:
+        job_id, counts = stored["job_id"], stored["counts"]
+    else:
+        with timed("transpile"):
+            isa_circ = services.transpile(runtime, qc)
+
+        with timed("submit"):
+            job = runtime.sampler.run([isa_circ], shots=shots)
+            job_id = job.job_id()
+            res = job.result()
+
+        with timed("result_parse"):
+            pub = res[0]
+            # Per-shot bits from the backend, fixing endian like local
+            bits = decoding.bits_from_bitarray(getattr(pub.data, c.name))
+            counts = decoding.to_counts(decoding.histogram(decoding.pack(bits, "message"), 2), 2)
+
+        result_store.store.save("run_simulation", key, backend.name, shots, counts,
+                                job_id=job_id, metadata={"message": message})
+
+    with timed("figure_build"):
+        circuit_fig = qc.draw(output='mpl', style='iqp', idle_wires=False)
+        hist_fig = plot_histogram(counts, title=f"IBM Backend: {backend.name} (Message: {message})")
 
     return {
         "job_id": job_id,
         "backend_name": backend.name,
+        "circuit_hash": key,
+        "from_store": bool(stored),
         "counts": counts,
         "circuit_image_b64": fig_to_base64(circuit_fig),
         "histogram_image_b64": fig_to_base64(hist_fig),
@@ -136,7 +165,17 @@ def run_ibm_simulation(message: str, shots: int = 1024):
 # =============================================================================
 #  API ENDPOINT
 # =============================================================================
-@app.route('/api/run_simulation', methods=['POST'])
+# Identical concurrent requests share one simulation (see coalesce.py)
+SIMULATIONS = coalesce.Coalescer("run_simulation")
+
+def run_channel_simulation(message: str, params):
+    """run_local_simulation through the satellite channel `params` (a ChannelParams)."""
+    noise_model = channel_model.noise_model(params.depolarizing, params.damping)
+    result = run_local_simulation(message, noise_model=noise_model)
+    result["channel"] = params._asdict()
+    return result
+
+@bp.route('/api/run_simulation', methods=['POST'])
 def run_simulation_endpoint():
     try:
         data = request.get_json()
@@ -148,19 +187,64 @@ def run_simulation_endpoint():
         if not target or target not in ['local', 'ibm']:
             return jsonify({"error": "Invalid target provided."}), 400
         
+        ttl = None
         if target == 'local':
-            result = run_local_simulation(message)
+            # Optional satellite channel: {"elevation_deg": 45, "altitude_km": 420}
+            channel = data.get('channel')
+            if channel:
+                try:
+                    params = channel_model.channel_params(
+                        float(channel['elevation_deg']), float(channel['altitude_km']))
+                except (KeyError, TypeError, ValueError) as e:
+                    return jsonify({"error": f"Invalid channel: {str(e)}"}), 400
+                # keyed by the bucketed channel, so nearby geometries share a run
+                key = coalesce.fingerprint("local", message, params._asdict())
+                compute = lambda: run_channel_simulation(message, params)
+            else:
+                key = coalesce.fingerprint("local", message)
+                compute = lambda: run_local_simulation(message)
         else:
-            result = run_ibm_simulation(message)
-        
-        return jsonify(result)
+            reuse = data.get('reuse')
+            if reuse is None:
+                reuse = result_store.RESULT_STORE_REUSE
+            elif not isinstance(reuse, bool):
+                # bool("false") is True: only JSON true/false are accepted
+                return jsonify({"error": "Invalid reuse flag; expected true or false."}), 400
+            key = coalesce.fingerprint("ibm", message, reuse)
+            compute = lambda: run_ibm_simulation(message, reuse=reuse)
+            if not reuse:
+                ttl = 0  # a fresh run was asked for: share in-flight jobs only, never an older result
+
+        outcome, result = SIMULATIONS.run(key, compute, ttl=ttl)
+        response = timed_jsonify(result)
+        response.headers["X-Coalesced"] = outcome
+        return response
 
     except Exception as e:
         return jsonify({"error": f"Unexpected server error: {str(e)}"}), 500
 
+# =============================================================================
+#  STARTUP
+# =============================================================================
+def preload():
+    """Import every deferred dependency up front (used by --preload)."""
+    startup.preload_modules(HEAVY_MODULES)
+    pyplot()
+    get_simulator("stabilizer")
+    get_simulator("statevector")
+
+def create_app():
+    """Builds a standalone Flask app serving only the Testing Phase routes."""
+    return services.create_app(__name__, bp)
+
+app = create_app()
+
 # =============================================================================
 #  RUN THE APP
 # =============================================================================
 if __name__ == '__main__':
+    args = startup.parse_args("Testing Phase backend", sys.argv[1:])
+    if args.preload:
+        preload()
     print("Starting Flask server...")
     app.run(debug=False, port=5000)
\ No newline at end of file
@@ -5,25 +5,36 @@
 # with real satellite data integration
 # ====================================================
 
-import io
-import random
-import base64
+import os
+import sys
+import time
 import numpy as np
 import logging
 import requests
-from flask import Flask, request, jsonify
+import base64
+import json
+from flask import Blueprint, request, jsonify, Response
 from flask_cors import CORS
 from datetime import datetime
 import pytz  # Added for timezone conversion
 from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
-from qiskit_aer import AerSimulator
 from qiskit.quantum_info import Statevector, DensityMatrix, partial_trace
-from qiskit.visualization.bloch import Bloch
-
-# Use a non-interactive backend for Matplotlib, suitable for servers
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
+import startup
+import postprocessing
+import decoding
+import execution
+import sdc_pipeline
+import sweep
+import channel_model
+from keybits import KeyBits
+from key_reservoir import KeyReservoir
+import services
+from metrics import timed, timed_jsonify
+from services import get_simulator, pyplot
+
+# Aer, matplotlib and the Bloch sphere renderer are imported on first use so
+# the server starts quickly; --preload imports them up front instead.
+HEAVY_MODULES = ["matplotlib.pyplot", "qiskit_aer", "qiskit.visualization.bloch"]
 
 # --------------------------
 # Logging Configuration
@@ -31,20 +42,35 @@ import matplotlib.pyplot as plt
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Overridable so load tests can point at a local stand-in (see fake_services.py)
+N2YO_URL = os.getenv("N2YO_URL", "https://api.n2yo.com/rest/v1")
+
+# Background key reservoir sizing (see key_reservoir.py)
+QKD_RESERVOIR_HIGH_WATER = int(os.getenv("QKD_RESERVOIR_HIGH_WATER", "4096"))
+QKD_BATCH_PAIRS = int(os.getenv("QKD_BATCH_PAIRS", "512"))
+# Bell pairs packed into one circuit (2 qubits each) by e91_qkd
+QKD_PACK_PAIRS = int(os.getenv("QKD_PACK_PAIRS", "512"))
+# Sifted bits collected before QBER estimation, reconciliation and privacy amplification
+QKD_DISTILL_BLOCK_BITS = int(os.getenv("QKD_DISTILL_BLOCK_BITS", "8192"))
+QKD_DRAW_TIMEOUT = float(os.getenv("QKD_DRAW_TIMEOUT", "30"))
+# Largest key a single /qkd or /full-simulation request may draw
+QKD_MAX_DRAW_BITS = int(os.getenv("QKD_MAX_DRAW_BITS", str(QKD_RESERVOIR_HIGH_WATER)))
+# Payload bits per batched simulator job in /sdc/transmit (see sdc_pipeline.py)
+SDC_BLOCK_BITS = int(os.getenv("SDC_BLOCK_BITS", str(sdc_pipeline.DEFAULT_BLOCK_BITS)))
+SDC_MAX_PAYLOAD_BYTES = int(os.getenv("SDC_MAX_PAYLOAD_BYTES", str(1 << 20)))
+
 # ====================================================
 # Helper Functions
 # ====================================================
 
 def fig_to_base64(fig):
-    """Converts a Matplotlib figure to a base64 encoded string."""
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", bbox_inches="tight", facecolor='none')
-    buf.seek(0)
-    img_str = base64.b64encode(buf.read()).decode("utf-8")
-    plt.close(fig)
-    return img_str
+    """Converts a Matplotlib figure to a base64 encoded string with a transparent background."""
+    return services.fig_to_base64(fig, facecolor='none')
 
 def plot_qubit_bloch(state, qubit_index=0, title="Qubit Bloch Sphere", description=""):
+    plt = pyplot()
+    from qiskit.visualization.bloch import Bloch
+
     # Reduce the state to the qubit of interest (if multi-qubit state)
     reduced_dm = partial_trace(state, [i for i in range(state.num_qubits) if i != qubit_index])
     
@@ -72,7 +98,8 @@ def plot_qubit_bloch(state, qubit_index=0, title="Qubit Bloch Sphere", descripti
     fig.text(0.5, 0.01, description, wrap=True, horizontalalignment='center', fontsize=8)
     
     # Render the Bloch sphere
-    b.render()
+    with timed("figure_build"):
+        b.render()
     
     return fig_to_base64(fig)
 
@@ -113,10 +140,11 @@ def get_satellite_message():
     SAT_ID = 25544  # ISS (International Space Station)
     LAT, LON = 16.5, 81.5 # Observer's ground station coordinates (Bhimavaram, India)
     try:
-        url = f"https://api.n2yo.com/rest/v1/satellite/positions/{SAT_ID}/{LAT}/{LON}/0/1/&apiKey={API_KEY}"
-        resp = requests.get(url, timeout=5)
-        resp.raise_for_status()
-        data = resp.json()
+        url = f"{N2YO_URL}/satellite/positions/{SAT_ID}/{LAT}/{LON}/0/1/&apiKey={API_KEY}"
+        with timed("http_n2yo"):
+            resp = requests.get(url, timeout=5)
+            resp.raise_for_status()
+            data = resp.json()
         pos = data["positions"][0]
 
         lat_bit = "1" if pos["satlatitude"] >= 0 else "0"
@@ -133,6 +161,8 @@ def get_satellite_message():
             "longitude": pos.get("satlongitude", 0.0),
             "real_time": real_time,
             "eclipsed": eclipsed,
+            "elevation": pos.get("elevation"),
+            "altitude_km": pos.get("sataltitude"),
         }
     except Exception as e:
         logger.warning(f"Satellite API fetch failed: {str(e)}. Using default data.")
@@ -142,97 +172,149 @@ def get_satellite_message():
             "longitude": 0.0,
             "real_time": "N/A",
             "eclipsed": False,
+            "elevation": None,
+            "altitude_km": None,
         }
 
+def satellite_channel(satellite_data):
+    """(noise_model, channel report) for the satellite's current position.
+
+    Falls back to a noiseless run when the geometry is unknown or the
+    satellite is below the elevation mask.
+    """
+    elevation, altitude = satellite_data.get("elevation"), satellite_data.get("altitude_km")
+    if elevation is None or altitude is None:
+        return None, {"noise": False, "reason": "Satellite geometry unavailable"}
+    try:
+        model, params = channel_model.for_satellite(float(elevation), float(altitude))
+    except ValueError as e:
+        return None, {"noise": False, "reason": str(e)}
+    return model, dict(params._asdict(), noise=True)
+
 # ====================================================
 # E91 QKD Protocol (simplified to only return the key)
 # ====================================================
-def e91_qkd(num_pairs=50, backend=None, eve=False):
-    if backend is None:
-        backend = AerSimulator()
-
-    key_bits = []
-    mismatches, total_matches = 0, 0
-
-    for _ in range(num_pairs):
-        qc = QuantumCircuit(2, 2)
-
-        # Create entangled pair
-        qc.h(0)
-        qc.cx(0, 1)
-
-        # Choose random measurement bases for Alice & Bob
-        alice_basis = random.choice(["Z", "X"])
-        bob_basis = random.choice(["Z", "X"])
-
-        if alice_basis == "X":
-            qc.h(0)
-        if bob_basis == "X":
-            qc.h(1)
-
-        qc.measure([0, 1], [0, 1])
-        result = backend.run(qc, shots=1).result().get_counts()
-
-        outcome = list(result.keys())[0]
-        alice_bit, bob_bit = outcome[::-1]  # [0]=Alice, [1]=Bob
-
-        if alice_basis == bob_basis:
-            total_matches += 1
-            if alice_bit == bob_bit:
-                key_bits.append(alice_bit)
-            else:
-                mismatches += 1
-
+def e91_qkd(num_pairs=50, backend=None, eve=False, noise_model=None):
+    if num_pairs <= 0:
+        return {"qkd_key": "", "qber": 1.0, "secure": False,
+                "sifted_alice": KeyBits.empty(), "sifted_bob": KeyBits.empty()}
+
+    # Random measurement bases for Alice & Bob per pair: 0 = Z, 1 = X
+    bases = np.random.randint(0, 2, size=(num_pairs, 2), dtype=np.uint8)
+
+    # Pairs are packed side by side into wide circuits (pair i on qubits 2i and
+    # 2i+1). They are Clifford, so the stabilizer method samples them cheaply.
+    circuits = []
+    with timed("circuit_build"):
+        for start in range(0, num_pairs, QKD_PACK_PAIRS):
+            chunk = bases[start:start + QKD_PACK_PAIRS]
+            width = 2 * len(chunk)
+            qc = QuantumCircuit(width, width)
+
+            # Create entangled pairs
+            qc.h(range(0, width, 2))
+            qc.cx(range(0, width, 2), range(1, width, 2))
+
+            # Rotate the X-basis qubits
+            x_basis = np.flatnonzero(chunk.ravel()).tolist()
+            if x_basis:
+                qc.h(x_basis)
+
+            qc.measure(range(width), range(width))
+            circuits.append(qc)
+
+    with timed("simulate"):
+        job_result = execution.run(circuits, backend=backend, noise_model=noise_model, shots=1,
+                                   memory=True).result()
+
+    # Sifting: keep only the pairs measured in matching bases
+    with timed("result_parse"):
+        outcomes = [decoding.bits_from_memory(job_result.get_memory(i))[0] for i in range(len(circuits))]
+        bits = np.concatenate(outcomes).reshape(-1, 2)  # clbit 2i = Alice, 2i + 1 = Bob
+        matching = bases[:, 0] == bases[:, 1]
+
+    alice = bits[matching, 0]
+    bob = bits[matching, 1]
+    agree = alice == bob
+    total_matches = alice.size
+    mismatches = total_matches - int(agree.sum())
     q_error_rate = (mismatches / total_matches) if total_matches > 0 else 1.0
 
     return {
-        "qkd_key": "".join(key_bits),
+        "qkd_key": KeyBits.from_bits(alice[agree]).to_string(),
         "qber": q_error_rate,
-        "secure": q_error_rate < 0.11 and not eve
+        "secure": q_error_rate < 0.11 and not eve,
+        # raw sifted keys for classical post-processing (see distill_key_block)
+        "sifted_alice": KeyBits.from_bits(alice),
+        "sifted_bob": KeyBits.from_bits(bob),
     }
+
+def distill_key_block(block_bits=None, backend=None, noise_model=None):
+    """Runs E91 batches until `block_bits` sifted bits exist, then distills them.
+
+    QBER is estimated on a random sample of the whole block, the rest is
+    reconciled and privacy-amplified (see postprocessing.distill). Returns
+    {"qkd_key": KeyBits, "qber", "secure", "report"}.
+    """
+    block_bits = block_bits or QKD_DISTILL_BLOCK_BITS
+    alice, bob, sifted = [], [], 0
+    while sifted < block_bits:
+        batch = e91_qkd(num_pairs=QKD_BATCH_PAIRS, backend=backend, noise_model=noise_model)
+        alice.append(batch["sifted_alice"])
+        bob.append(batch["sifted_bob"])
+        sifted += len(batch["sifted_alice"])
+
+    with timed("key_distill"):
+        result = postprocessing.distill(KeyBits.concat(alice), KeyBits.concat(bob))
+    report = {k: v for k, v in result.items() if k != "key"}
+    return {"qkd_key": result["key"], "qber": result["qber"], "secure": result["secure"], "report": report}
+
 # ====================================================
 # Superdense Coding Protocol
 # ====================================================
-def superdense_coding(message: str, key_bits, eve=False, backend=None):
-    if backend is None:
-        backend = AerSimulator()
+def superdense_coding(message: str, key_bits, eve=False, backend=None, noise_model=None):
+    pyplot()  # select Agg before qiskit's circuit drawer imports pyplot
     if len(key_bits) < 2:
         raise ValueError("Need at least 2 QKD bits for encryption")
 
-    encrypted = "".join([
-        "1" if message[0] != key_bits[0] else "0",
-        "1" if message[1] != key_bits[1] else "0"
-    ])
+    # One-time pad over the first two message bits
+    encrypted = (KeyBits.from_string(message[:2]) ^ KeyBits.coerce(key_bits)[:2]).to_string()
 
-    qc = QuantumCircuit(2, 2)
-    
-    qc.h(0); qc.cx(0, 1); qc.barrier()
+    with timed("circuit_build"):
+        qc = QuantumCircuit(2, 2)
 
-    if encrypted == ("0", "1"): qc.x(0)
-    elif encrypted == ("1", "0"): qc.z(0)
-    elif encrypted == ("1", "1"): qc.z(0); qc.x(0)
-    qc.barrier()
-    
-    viz_qc = qc.copy()
-    viz_qc.remove_final_measurements(inplace=True)
-    state_for_viz = Statevector.from_instruction(viz_qc)
-    density = DensityMatrix(state_for_viz)
+        qc.h(0); qc.cx(0, 1); qc.barrier()
 
-    if eve:
-        qc.measure(0, 0)
+        if encrypted == "01": qc.x(0)
+        elif encrypted == "10": qc.z(0)
+        elif encrypted == "11": qc.z(0); qc.x(0)
         qc.barrier()
 
-    qc.cx(0, 1); qc.h(0); qc.barrier()
-    qc.measure([0, 1], [0, 1])
-    
-    result = backend.run(qc, shots=1024).result()
-    counts = result.get_counts()
+        viz_qc = qc.copy()
+        viz_qc.remove_final_measurements(inplace=True)
+        state_for_viz = Statevector.from_instruction(viz_qc)
+        density = DensityMatrix(state_for_viz)
+
+        if eve:
+            qc.measure(0, 0)
+            qc.barrier()
+
+        qc.cx(0, 1); qc.h(0); qc.barrier()
+        qc.measure([0, 1], [0, 1])
+
+    with timed("simulate"):
+        result = execution.run(qc, backend=backend, noise_model=noise_model, shots=1024).result()
+    with timed("result_parse"):
+        counts = decoding.to_counts(decoding.aer_histogram(result, 0, 2), 2, zeros=False)
+
+    with timed("figure_build"):
+        circuit_fig = qc.draw(output="mpl")
 
     return {
         "encrypted_message": encrypted,
         "entanglement_status": "Destroyed by Eve" if eve else "Entanglement established",
         "communication_status": "Message garbled due to Eve" if eve else "Message transmitted securely",
-        "circuit": fig_to_base64(qc.draw(output="mpl")),
+        "circuit": fig_to_base64(circuit_fig),
         "density_matrix": complex_to_json(density.data),
         "bloch_spheres": [
             plot_qubit_bloch(state_for_viz, 0, "SDC Qubit 0", f"Alice's qubit after encoding '{message}'"),
@@ -244,12 +326,18 @@ def superdense_coding(message: str, key_bits, eve=False, backend=None):
 # ====================================================
 # Flask App and Routes
 # ====================================================
-app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}})
-backend = AerSimulator()
+bp = Blueprint("application", __name__)
+CORS(bp, resources={r"/*": {"origins": "http://localhost:5173"}})
+
+# Distilled key is generated in the background and drawn by /qkd and
+# /full-simulation; the producer starts on the first draw or on --preload.
+key_reservoir = KeyReservoir(
+    distill_key_block,
+    high_water=QKD_RESERVOIR_HIGH_WATER,
+)
 
 
-@app.route("/qkd", methods=["POST"])
+@bp.route("/qkd", methods=["POST"])
 def qkd_route():
     """
     Generate a QKD key with correct length (at least as long as message bits if provided).
@@ -259,32 +347,30 @@ def qkd_route():
         num_qubits = int(data.get("num_qubits", 50))
         message = str(data.get("message", ""))  # optional, for length check
         required_length = len(message) if message else num_qubits
+        if not 0 < required_length <= QKD_MAX_DRAW_BITS:
+            return jsonify({"error": f"Key length must be between 1 and {QKD_MAX_DRAW_BITS} bits."}), 400
 
-        qkd_key = ""
-        qkd_result = None
+        # Draw exactly the bits needed; they are never issued again
+        qkd_result = key_reservoir.draw(required_length, timeout=QKD_DRAW_TIMEOUT)
 
-        # Keep generating until key is long enough
-        while len(qkd_key) < required_length:
-            qkd_result = e91_qkd(num_pairs=num_qubits, backend=backend)
-            qkd_key += qkd_result.get("qkd_key", "")
-
-        # Trim key
-        qkd_key = qkd_key[:required_length]
-        qkd_result["qkd_key"] = qkd_key
-
-        return jsonify({
-            "qkd_key": qkd_key,
+        return timed_jsonify({
+            "qkd_key": qkd_result["qkd_key"].to_string(),
             "qber": qkd_result["qber"],
-            "secure": qkd_result["secure"]
+            "secure": qkd_result["secure"],
+            "batches": qkd_result["batches"],
         })
 
+    except TimeoutError as e:
+        return jsonify({"error": f"QKD key not available: {str(e)}"}), 503
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid key request: {str(e)}"}), 400
     except Exception as e:
         logger.exception("QKD route failed")
         return jsonify({"error": f"QKD route failed: {str(e)}"}), 500
 
 
 # --- MODIFIED: /sdc endpoint to return all satellite data ---
-@app.route("/sdc", methods=["POST"])
+@bp.route("/sdc", methods=["POST"])
 def sdc_route():
     try:
         data = request.json
@@ -297,8 +383,13 @@ def sdc_route():
         satellite_data = get_satellite_message()
         message = satellite_data["binary_message"]
 
-        sdc_result = superdense_coding(message, qkd_key, eve=sdc_eve, backend=backend)
-        
+        # Optional channel noise from the satellite's current geometry
+        noise_model, channel = None, None
+        if data.get("channel_noise"):
+            noise_model, channel = satellite_channel(satellite_data)
+
+        sdc_result = superdense_coding(message, qkd_key, eve=sdc_eve, noise_model=noise_model)
+
         # Combine SDC results with the full satellite data for the response
         response_data = {
             "sdc": sdc_result,
@@ -307,53 +398,168 @@ def sdc_route():
             "sat_longitude": satellite_data["longitude"],
             "sat_real_time": satellite_data["real_time"],
             "sat_eclipsed": satellite_data["eclipsed"],
+            "channel": channel,
         }
-        return jsonify(response_data)
+        return timed_jsonify(response_data)
     except Exception as e:
         logger.exception("SDC simulation failed")
         return jsonify({"error": f"SDC simulation failed: {str(e)}"}), 500
-@app.route("/full-simulation", methods=["POST"])
+@bp.route("/full-simulation", methods=["POST"])
 def full_simulation_route():
     try:
         data = request.json
         message = data.get("message", "00")
-        num_qubits = int(data.get("num_qubits", 50))
         qkd_eve = bool(data.get("qkd_eve", False))
         sdc_eve = bool(data.get("sdc_eve", False))
 
-        # Step 1: Run QKD until key is long enough
-        required_length = len(message)
-        qkd_key = ""
-        qkd_result = None
+        if not isinstance(message, str) or len(message) < 2 or set(message) - {"0", "1"}:
+            return jsonify({"error": "Message must be a binary string of at least 2 bits."}), 400
+        if len(message) > QKD_MAX_DRAW_BITS:
+            return jsonify({"error": f"Message exceeds {QKD_MAX_DRAW_BITS} bits."}), 400
 
-        while len(qkd_key) < required_length:
-            qkd_result = e91_qkd(num_pairs=num_qubits, backend=backend, eve=qkd_eve)
-            qkd_key += qkd_result.get("qkd_key", "")
-
-        # Trim to exact required length
-        qkd_key = qkd_key[:required_length]
+        # Step 1: Draw a key as long as the message from the reservoir
+        qkd_result = key_reservoir.draw(len(message), timeout=QKD_DRAW_TIMEOUT)
+        if qkd_eve:
+            qkd_result["secure"] = False
+        qkd_key = qkd_result["qkd_key"].to_string()
         qkd_result["qkd_key"] = qkd_key
 
-
-        if not qkd_key or len(qkd_key) < 2:
-            return jsonify({"error": "QKD failed to generate a secure key."}), 400
-
         # Step 2: Run Superdense Coding using QKD key
-        sdc_result = superdense_coding(message, qkd_key, eve=sdc_eve, backend=backend)
+        sdc_result = superdense_coding(message, qkd_key, eve=sdc_eve)
 
-        return jsonify({
+        return timed_jsonify({
             "qkd": qkd_result,
             "sdc": sdc_result
         })
+    except TimeoutError as e:
+        return jsonify({"error": f"QKD key not available: {str(e)}"}), 503
     except Exception as e:
         logger.exception("Full simulation failed")
         return jsonify({"error": f"Full simulation failed: {str(e)}"}), 500
 
 
 
-@app.route("/health", methods=["GET"])
+@bp.route("/sdc/transmit", methods=["POST"])
+def sdc_transmit_route():
+    """
+    Sends an arbitrary-length payload over superdense coding, one-time padded
+    with reservoir key bits. Body: {"text": ...} or {"data_b64": ...}, plus
+    optional "sdc_eve", "block_bits" and "stream" (per-block SSE progress).
+    """
+    try:
+        data = request.json or {}
+        if "data_b64" in data:
+            payload = base64.b64decode(data["data_b64"], validate=True)
+        else:
+            payload = str(data.get("text", "")).encode("utf-8")
+        sdc_eve = bool(data.get("sdc_eve", False))
+        block_bits = int(data.get("block_bits", SDC_BLOCK_BITS))
+
+        if not payload:
+            return jsonify({"error": "Payload is empty."}), 400
+        if len(payload) > SDC_MAX_PAYLOAD_BYTES:
+            return jsonify({"error": f"Payload exceeds {SDC_MAX_PAYLOAD_BYTES} bytes."}), 413
+
+        key_source = lambda n: key_reservoir.draw(n, timeout=QKD_DRAW_TIMEOUT)["qkd_key"]
+
+        if data.get("stream"):
+            return Response(stream_transmission(payload, key_source, sdc_eve, block_bits),
+                            mimetype="text/event-stream")
+
+        with timed("sdc_transmit"):
+            result = sdc_pipeline.transmit_bytes(payload, key_source, eve=sdc_eve, block_bits=block_bits)
+        return timed_jsonify(result)
+    except TimeoutError as e:
+        return jsonify({"error": f"QKD key not available: {str(e)}"}), 503
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {str(e)}"}), 400
+    except Exception as e:
+        logger.exception("SDC transmission failed")
+        return jsonify({"error": f"SDC transmission failed: {str(e)}"}), 500
+
+
+def stream_transmission(payload, key_source, eve, block_bits):
+    """SSE events for sdc_pipeline.transmit(); each block carries its decoded bytes."""
+    try:
+        for report in sdc_pipeline.transmit(KeyBits.from_bytes(payload), key_source, eve=eve, block_bits=block_bits):
+            if "decoded" in report:
+                report["decoded_b64"] = base64.b64encode(report.pop("decoded").to_bytes()).decode("ascii")
+            yield f"data: {json.dumps(report)}\n\n"
+    except Exception as e:
+        logger.exception("SDC transmission stream failed")
+        yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+
+@bp.route("/sweep", methods=["POST"])
+def sweep_route():
+    """
+    Evaluates QBER and SDC success over a grid of interception probability,
+    depolarizing noise, loss and shots (see sweep.py). Each parameter is a list
+    or a "start:stop:count" range. Results stream as SSE unless "stream" is false.
+    """
+    try:
+        data = request.json or {}
+        points = sweep.build_grid(
+            intercept=sweep.parse_values(data.get("intercept", [0.0])),
+            depolarizing=sweep.parse_values(data.get("depolarizing", [0.0])),
+            loss=sweep.parse_values(data.get("loss", [0.0])),
+            shots=sweep.parse_values(data.get("shots", [1024]), int),
+            pairs=int(data.get("pairs", 512)),
+        )
+        use_cache = bool(data.get("cache", True))
+
+        if data.get("stream", True):
+            return Response(stream_sweep(points, use_cache), mimetype="text/event-stream")
+
+        with timed("sweep"):
+            results = list(sweep.run_sweep(points, use_cache=use_cache))
+        return timed_jsonify({"points": len(points), "results": results})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid sweep: {str(e)}"}), 400
+    except Exception as e:
+        logger.exception("Sweep failed")
+        return jsonify({"error": f"Sweep failed: {str(e)}"}), 500
+
+
+def stream_sweep(points, use_cache):
+    """SSE events for sweep.run_sweep(), in completion order, then a summary."""
+    started = time.perf_counter()
+    done = 0
+    try:
+        for result in sweep.run_sweep(points, use_cache=use_cache):
+            done += 1
+            yield f"data: {json.dumps(dict(result, type='point', done=done, total=len(points)))}\n\n"
+        summary = {"type": "summary", "points": done, "elapsed_s": time.perf_counter() - started}
+        yield f"data: {json.dumps(summary)}\n\n"
+    except Exception as e:
+        logger.exception("Sweep stream failed")
+        yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+
+@bp.route("/qkd/reservoir", methods=["GET"])
+def qkd_reservoir_route():
+    return jsonify(key_reservoir.stats())
+
+
+@bp.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy", "message": "Satellite-Ground Communication Simulator Backend"})
 
+def preload():
+    """Imports every deferred dependency up front (used by --preload)."""
+    startup.preload_modules(HEAVY_MODULES)
+    pyplot()
+    get_simulator("stabilizer")
+    key_reservoir.start()
+
+def create_app():
+    """Builds a standalone Flask app serving only the Application Phase routes."""
+    return services.create_app(__name__, bp)
+
+app = create_app()
+
 if __name__ == "__main__":
+    args = startup.parse_args("Application Phase backend", sys.argv[1:])
+    if args.preload:
+        preload()
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,379 @@
+# benchmarks.py
+# ====================================================
+# Offline microbenchmarks for the quantum and flight hot paths.
+#
+#   python benchmarks.py                       # run everything, write results
+#   python benchmarks.py -k e91 -k sdc         # only matching benchmarks
+#   python benchmarks.py --save-baseline       # make this run the new baseline
+#   python benchmarks.py --fail-on-regression  # exit 1 if slower than baseline
+#
+# Each run is written to bench_results/<commit>.json and compared against
+# bench_results/baseline.json, so timing changes show up per commit.
+# ====================================================
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "bench_results")
+BASELINE_PATH = os.path.join(RESULTS_DIR, "baseline.json")
+
+# A benchmark whose median grows by more than this is reported as a regression.
+REGRESSION_THRESHOLD = 0.15
+
+SAMPLE_MESSAGE = "33.89729,74.24314,0"
+
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=5):
+    """Registers `fn` as a benchmark. `fn` returns the callable to time."""
+    def register(fn):
+        BENCHMARKS.append({"name": name, "setup": fn, "repeat": repeat})
+        return fn
+    return register
+
+
+# ----------------------------------------------------
+# Quantum protocol benchmarks (application.py / app.py)
+# ----------------------------------------------------
+for _pairs in (10, 50, 100, 512):
+    @benchmark(f"e91_qkd[num_pairs={_pairs}]", repeat=3)
+    def _e91(pairs=_pairs):
+        import application
+        return lambda: application.e91_qkd(num_pairs=pairs)
+
+
+for _eve in (False, True):
+    @benchmark(f"superdense_coding[eve={_eve}]", repeat=3)
+    def _sdc(eve=_eve):
+        import application
+        return lambda: application.superdense_coding("01", "1010", eve=eve)
+
+
+@benchmark("sdc_pipeline.transmit_bytes[4 KiB]", repeat=3)
+def _sdc_transmit():
+    import sdc_pipeline
+    from keybits import KeyBits
+
+    data = bytes(range(256)) * 16
+    return lambda: sdc_pipeline.transmit_bytes(data, KeyBits.random)
+
+
+@benchmark("run_local_simulation", repeat=3)
+def _local_simulation():
+    import app
+    return lambda: app.run_local_simulation("01")
+
+
+@benchmark("fig_to_base64")
+def _fig_to_base64():
+    import application
+    plt = application.pyplot()
+
+    def run():
+        fig, ax = plt.subplots(figsize=(4, 3))
+        ax.bar(["00", "01", "10", "11"], [256, 256, 256, 256])
+        return application.fig_to_base64(fig)
+    return run
+
+
+@benchmark("plot_qubit_bloch", repeat=3)
+def _plot_qubit_bloch():
+    import application
+    from qiskit import QuantumCircuit
+    from qiskit.quantum_info import Statevector
+
+    qc = QuantumCircuit(2)
+    qc.h(0)
+    qc.cx(0, 1)
+    state = Statevector.from_instruction(qc)
+    return lambda: application.plot_qubit_bloch(state, 0, "Bench", "Bell pair qubit 0")
+
+
+@benchmark("complex_to_json[8 qubits]")
+def _complex_to_json():
+    import numpy as np
+    import application
+
+    rng = np.random.default_rng(0)
+    density = rng.normal(size=(256, 256)) + 1j * rng.normal(size=(256, 256))
+    return lambda: application.complex_to_json(density)
+
+
+@benchmark("postprocessing.distill[1 Mbit, 3% QBER]", repeat=3)
+def _distill():
+    import numpy as np
+    import postprocessing
+    from keybits import KeyBits
+
+    rng = np.random.default_rng(0)
+    alice = rng.integers(0, 2, size=1 << 20, dtype=np.uint8)
+    bob = alice ^ (rng.random(alice.size) < 0.03).astype(np.uint8)
+    alice, bob = KeyBits.from_bits(alice), KeyBits.from_bits(bob)
+    return lambda: postprocessing.distill(alice, bob, rng=1)
+
+
+# ----------------------------------------------------
+# Flight benchmarks (aircraft.py)
+# ----------------------------------------------------
+@benchmark("is_in_restricted_area[10k points]")
+def _restricted_area():
+    import random
+    import aircraft
+
+    rng = random.Random(0)
+    points = [(rng.uniform(30, 38), rng.uniform(72, 81)) for _ in range(10_000)]
+    return lambda: [aircraft.is_in_restricted_area(lat, lon) for lat, lon in points]
+
+
+@benchmark("load_simulated_flights")
+def _load_flights():
+    import aircraft
+    return aircraft.load_simulated_flights
+
+
+@benchmark("predict_trajectory[all simulated flights]")
+def _predict():
+    import aircraft
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        flights = aircraft.load_simulated_flights()
+    return lambda: [aircraft.predict_trajectory(f) for f in flights]
+
+
+@benchmark("tracking.update[500 aircraft x 20 reports]")
+def _track_updates():
+    import random
+    import tracking
+
+    rng = random.Random(0)
+    reports = [(f"AC{n % 500:03d}", rng.uniform(8, 37), rng.uniform(68, 97), 1_700_000_000 + 10 * (n // 500))
+               for n in range(10_000)]
+
+    def run():
+        table = tracking.TrackTable()
+        for icao, lat, lon, t in reports:
+            table.update(icao, lat, lon, t)
+    return run
+
+
+@benchmark("alert_pipeline.transmit[100 alerts, Aer]", repeat=3)
+def _alert_batch():
+    import random
+    import alert_pipeline
+
+    rng = random.Random(0)
+    pipeline = alert_pipeline.AlertPipeline(backend="aer")
+    alerts = [{"icao24": f"AC{n:03d}", "callsign": "BENCH", "latitude": rng.uniform(30, 38),
+               "longitude": rng.uniform(72, 81), "detected_at": time.time()} for n in range(100)]
+    return lambda: pipeline.transmit(alerts)
+
+
+@benchmark("geofence.intervals[10k flights, 1 h horizon]")
+def _geofence():
+    import random
+    import aircraft
+
+    rng = random.Random(0)
+    flights = [(rng.uniform(30, 38), rng.uniform(72, 81), rng.uniform(100, 300), rng.uniform(0, 360))
+               for _ in range(10_000)]
+    lat, lon, vel, heading = zip(*flights)
+    return lambda: aircraft.GEOFENCE.intervals(lat, lon, vel, heading, 3600)
+
+
+@benchmark("conflicts.update+detect[10k aircraft]")
+def _conflicts():
+    import random
+    import conflicts
+
+    rng = random.Random(0)
+    flights = [{"icao24": f"AC{n:05d}", "latitude": rng.uniform(8, 37), "longitude": rng.uniform(68, 97),
+                "altitude": rng.choice([9000, 9300, 9600, 10000]), "callsign": "BENCH"} for n in range(10_000)]
+
+    def run():
+        index = conflicts.ConflictIndex()
+        index.update(flights)
+        return index.detect()
+    return run
+
+
+@benchmark("flight_store.latest[2k aircraft, 1M reports]")
+def _replay_latest():
+    import csv
+    import random
+    import tempfile
+    import flight_store
+
+    rng = random.Random(0)
+    tmp = tempfile.mkdtemp(prefix="bench_flights_")
+    path = os.path.join(tmp, "flights.csv")
+    with open(path, "w", newline="") as fh:
+        writer = csv.writer(fh)
+        writer.writerow(["icao24", "callsign", "route", "lat", "lon", "altitude", "velocity", "heading", "timestamp"])
+        for n in range(1_000_000):
+            writer.writerow([f"AC{n % 2000:04d}", "BENCH", "", rng.uniform(8, 37), rng.uniform(68, 97),
+                             35000, 450, 90, 1_700_000_000 + n // 20])
+    flight_store.ingest(path, os.path.join(tmp, "flights"))
+    dataset = flight_store.FlightDataset(os.path.join(tmp, "flights"))
+    return lambda: dataset.latest(rng.randint(dataset.start, dataset.end), max_age=300)
+
+
+# ----------------------------------------------------
+# IBM Cloud payload codecs (ibm_cloud.py / payload_codec.py)
+# ----------------------------------------------------
+@benchmark("ibm_cloud.text_to_bits+bits_to_text[x1000]")
+def _text_codec():
+    import ibm_cloud
+
+    def run():
+        for _ in range(1000):
+            ibm_cloud.bits_to_text(ibm_cloud.text_to_bits(SAMPLE_MESSAGE))
+    return run
+
+
+@benchmark("payload_codec.fixed encode+decode[x1000]")
+def _fixed_codec():
+    import payload_codec
+
+    codec = payload_codec.get_codec("fixed")
+
+    def run():
+        for _ in range(1000):
+            codec.decode(codec.encode("33.89729", "74.24314", "0"))
+    return run
+
+
+@benchmark("fec.hamming7_4 soft decode[4096 codewords]")
+def _fec_decode():
+    import numpy as np
+    import fec
+
+    code = fec.get_code("hamming7_4")
+    rng = np.random.default_rng(0)
+    codewords = code.encode(rng.integers(0, 2, size=(4096, code.k), dtype=np.uint8))
+    p_one = np.clip(codewords + rng.normal(0, 0.3, size=codewords.shape), 0, 1)
+    return lambda: code.decode(p_one)
+
+
+@benchmark("decoding.bits_from_memory+pack[100k shots]")
+def _decode_memory():
+    import numpy as np
+    import decoding
+
+    rng = np.random.default_rng(0)
+    memory = [format(v, "02b") for v in rng.integers(0, 4, size=100_000).tolist()]
+    return lambda: decoding.histogram(decoding.pack(decoding.bits_from_memory(memory), "message"), 2)
+
+
+# ----------------------------------------------------
+# Runner
+# ----------------------------------------------------
+def time_benchmark(bench):
+    """Runs one warm-up call then `repeat` timed calls; returns timing stats in ms."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn = bench["setup"]()
+        fn()
+        samples = []
+        for _ in range(bench["repeat"]):
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples),
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": len(samples),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """Returns {name: relative change of the median} and the list of regressions."""
+    changes, regressions = {}, []
+    for name, stats in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous or not previous["median_ms"]:
+            continue
+        change = stats["median_ms"] / previous["median_ms"] - 1
+        changes[name] = change
+        if change > threshold:
+            regressions.append(name)
+    return changes, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the offline microbenchmark suite")
+    parser.add_argument("-k", dest="filters", action="append", default=[],
+                        help="only run benchmarks whose name contains this text")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative median slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS
+                if not args.filters or any(f in b["name"] for f in args.filters)]
+    if args.list:
+        for bench in selected:
+            print(bench["name"])
+        return 0
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "benchmarks": {},
+    }
+    for bench in selected:
+        stats = time_benchmark(bench)
+        results["benchmarks"][bench["name"]] = stats
+        print(f"{bench['name']:<48} {stats['median_ms']:>10.2f}ms  (min {stats['min_ms']:.2f}ms)")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    with open(os.path.join(RESULTS_DIR, f"{commit}.json"), "w") as fh:
+        json.dump(results, fh, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        changes, regressions = compare(results, baseline, args.threshold)
+        print(f"\nCompared with baseline {baseline.get('commit', '?')}:")
+        for name, change in changes.items():
+            marker = "  REGRESSION" if name in regressions else ""
+            print(f"  {name:<48} {change * 100:+7.1f}%{marker}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# channel_model.py
+# ====================================================
+# Satellite-to-ground channel noise for the local simulator.
+#
+# The link geometry (satellite altitude and elevation above the ground
+# station) gives the slant range and air mass, from which we estimate:
+#
+#   transmittance  beam spreading over the slant range, atmospheric
+#                  extinction per air mass and detector efficiency
+#   depolarizing   polarization drift per air mass plus the share of
+#                  detections that are dark counts (random outcomes), which
+#                  grows as the transmittance falls
+#   damping        amplitude damping per air mass
+#
+# Noise models are built once per (elevation, altitude) bucket and cached.
+# Amplitude damping enters as its Pauli-twirled approximation, so every
+# model is a Pauli channel and the protocol circuits keep running on the
+# stabilizer method (see execution.py).
+#
+# fit_from_counts() goes the other way: it estimates depolarizing and
+# damping strengths from SDC counts measured on IBM hardware, e.g. the runs
+# kept by result_store.py (records_from_store).
+# ====================================================
+
+import argparse
+import json
+import math
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+import metrics
+
+R_EARTH_KM = 6371.0
+
+# Optical link (typical LEO quantum downlink figures)
+BEAM_DIVERGENCE_RAD = 10e-6
+TX_APERTURE_M = 0.1
+RX_APERTURE_M = 1.0
+ATM_EXTINCTION = 0.15          # optical depth at zenith
+DETECTOR_EFFICIENCY = 0.6
+DARK_COUNT_PROB = 1e-5         # per detection window
+
+# Per-air-mass channel noise and per-gate error of the ground hardware
+POLARIZATION_DRIFT = 0.005
+DAMPING_PER_AIRMASS = 0.002
+GATE_ERROR = 0.001
+
+# Buckets: requests within the same bucket share one noise model
+ELEVATION_BUCKET_DEG = 5.0
+ALTITUDE_BUCKET_KM = 25.0
+MIN_ELEVATION_DEG = 5.0
+
+# Single-qubit gates on Alice's qubit in an SDC circuit (for fit_from_counts)
+SDC_CHANNEL_GATES = 3
+
+ChannelParams = namedtuple("ChannelParams", [
+    "elevation_deg", "altitude_km", "slant_range_km", "transmittance", "loss", "depolarizing", "damping",
+])
+
+MODELS_BUILT = metrics.register(metrics.Counter(
+    "sdc_noise_models_built_total", "Aer noise models constructed (cache misses)."))
+
+
+def _bucket(value, size):
+    return round(round(value / size) * size, 6)
+
+
+def slant_range_km(altitude_km, elevation_deg):
+    """Distance from the ground station to a satellite at `altitude_km`."""
+    e = math.radians(elevation_deg)
+    r = R_EARTH_KM + altitude_km
+    return math.sqrt(r ** 2 - (R_EARTH_KM * math.cos(e)) ** 2) - R_EARTH_KM * math.sin(e)
+
+
+def channel_params(elevation_deg, altitude_km):
+    """Channel parameters for the bucket containing (elevation, altitude)."""
+    if elevation_deg < MIN_ELEVATION_DEG:
+        raise ValueError(f"Satellite at {elevation_deg:.1f} deg elevation is below the {MIN_ELEVATION_DEG} deg mask")
+    elevation = max(MIN_ELEVATION_DEG, min(90.0, _bucket(elevation_deg, ELEVATION_BUCKET_DEG)))
+    altitude = max(ALTITUDE_BUCKET_KM, _bucket(altitude_km, ALTITUDE_BUCKET_KM))
+
+    distance = slant_range_km(altitude, elevation)
+    beam = TX_APERTURE_M + BEAM_DIVERGENCE_RAD * distance * 1000
+    airmass = 1 / math.sin(math.radians(elevation))
+    transmittance = (min(1.0, (RX_APERTURE_M / beam) ** 2)
+                     * math.exp(-ATM_EXTINCTION * airmass) * DETECTOR_EFFICIENCY)
+
+    dark_fraction = DARK_COUNT_PROB / (transmittance + DARK_COUNT_PROB)
+    depolarizing = min(0.75, POLARIZATION_DRIFT * airmass + dark_fraction)
+    damping = min(1.0, DAMPING_PER_AIRMASS * airmass)
+    return ChannelParams(elevation, altitude, distance, transmittance, 1 - transmittance, depolarizing, damping)
+
+
+def twirled_damping(gamma):
+    """Pauli-twirled amplitude damping as [(pauli, probability), ...]."""
+    px = gamma / 4
+    pz = 0.5 - gamma / 4 - math.sqrt(1 - gamma) / 2
+    return [("X", px), ("Y", px), ("Z", pz), ("I", 1 - 2 * px - pz)]
+
+
+@lru_cache(maxsize=256)
+def _build(depolarizing, damping, gate_error):
+    from qiskit_aer.noise import NoiseModel, depolarizing_error, pauli_error
+
+    MODELS_BUILT.inc()
+    channel = depolarizing_error(depolarizing, 1)
+    if damping > 0:
+        channel = channel.compose(pauli_error(twirled_damping(damping)))
+    model = NoiseModel()
+    model.add_all_qubit_quantum_error(channel, ["h", "x", "z"])
+    if gate_error > 0:
+        model.add_all_qubit_quantum_error(depolarizing_error(gate_error, 2), ["cx"])
+    return model
+
+
+def noise_model(depolarizing, damping=0.0, gate_error=GATE_ERROR):
+    """Cached NoiseModel for the given strengths (rounded to 1e-6)."""
+    return _build(round(depolarizing, 6), round(damping, 6), round(gate_error, 6))
+
+
+def for_satellite(elevation_deg, altitude_km):
+    """(NoiseModel, ChannelParams) for the current satellite geometry."""
+    params = channel_params(elevation_deg, altitude_km)
+    return noise_model(params.depolarizing, params.damping), params
+
+
+# ----------------------------------------------------
+# Fitting from hardware counts
+# ----------------------------------------------------
+def fit_from_counts(records, gate_error=GATE_ERROR):
+    """Estimates channel strengths from SDC runs.
+
+    `records` are {"message": "01", "counts": {...}} with counts keyed in
+    message order, as returned by app.run_ibm_simulation. Excess 1 -> 0
+    flips over 0 -> 1 flips are read as damping; the remaining error rate is
+    attributed to depolarizing on Alice's SDC_CHANNEL_GATES single-qubit
+    gates after accounting for two CNOTs at `gate_error`.
+    Returns {"depolarizing", "damping", "error_rate", "shots", "model"}.
+    """
+    wrong = shots = 0
+    ones = zeros = one_to_zero = zero_to_one = 0
+    for record in records:
+        message = record["message"]
+        for outcome, count in record["counts"].items():
+            shots += count
+            wrong += count * (outcome != message)
+            for sent, got in zip(message, outcome):
+                if sent == "1":
+                    ones += count
+                    one_to_zero += count * (got == "0")
+                else:
+                    zeros += count
+                    zero_to_one += count * (got == "1")
+    if not shots:
+        raise ValueError("No counts to fit")
+
+    error_rate = wrong / shots
+    asymmetry = (one_to_zero / ones if ones else 0.0) - (zero_to_one / zeros if zeros else 0.0)
+    damping = min(1.0, max(0.0, 2 * asymmetry))
+
+    # 1 - e = (1 - 3p/4)^k (1 - 15g/16)^2, solved for p
+    survive = (1 - error_rate) / (1 - 15 * gate_error / 16) ** 2
+    depolarizing = min(0.75, max(0.0, 4 / 3 * (1 - min(1.0, survive) ** (1 / SDC_CHANNEL_GATES))))
+    return {
+        "depolarizing": depolarizing,
+        "damping": damping,
+        "error_rate": error_rate,
+        "shots": shots,
+        "model": noise_model(depolarizing, damping, gate_error),
+    }
+
+
+def records_from_store(store, backend=None, limit=500):
+    """SDC records for fit_from_counts from runs saved by app.run_ibm_simulation."""
+    runs = store.history(kind="run_simulation", backend=backend, limit=limit)["results"]
+    return [{"message": r["metadata"]["message"], "counts": r["counts"]}
+            for r in runs if "message" in r["metadata"]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit channel strengths to recorded SDC counts")
+    parser.add_argument("path", nargs="?", help='JSON list of {"message", "counts"} records')
+    parser.add_argument("--store", nargs="?", const="", metavar="BACKEND",
+                        help="fit runs in result_store.py's database instead (optionally one backend's)")
+    args = parser.parse_args(argv)
+    if (args.path is None) == (args.store is None):
+        parser.error("give either a records file or --store")
+
+    if args.store is not None:
+        import result_store
+        records = records_from_store(result_store.store, backend=args.store or None)
+    else:
+        with open(args.path) as fh:
+            records = json.load(fh)
+    try:
+        fitted = fit_from_counts(records)
+    except ValueError as e:
+        parser.error(str(e))
+    fitted.pop("model")
+    print(json.dumps(fitted, indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,130 @@
+# coalesce.py
+# ====================================================
+# Single-flight coalescing of identical concurrent requests.
+#
+# Requests that reduce to the same fingerprint (a hash of their normalized
+# parameters) while one is already being computed wait for that
+# computation and receive its result instead of building circuits,
+# running Aer, submitting an IBM job or downloading OpenSky data again.
+# With a TTL, a finished result is also served to identical requests that
+# arrive within `ttl` seconds. Failures are never cached: every waiter of a
+# failed computation gets the exception, and the next request retries.
+#
+#   outcome, result = coalescer.run(fingerprint(message, target), compute)
+#
+# outcome is "leader" (computed here), "coalesced" (shared an in-flight
+# computation) or "cached" (served within the TTL). run(..., ttl=0) keeps
+# only the in-flight sharing for a call that must not see an older result.
+#
+# Configuration (environment):
+#   COALESCE_TTL_SECONDS  default result TTL for the API coalescers (default 0: in-flight only)
+# ====================================================
+
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+
+import metrics
+
+COALESCE_TTL_SECONDS = float(os.getenv("COALESCE_TTL_SECONDS", "0"))
+
+REQUESTS = metrics.register(metrics.Counter(
+    "sdc_coalesce_requests_total", "Requests through a coalescer, by how they were answered.",
+    ["name", "outcome"]))
+
+_coalescers = weakref.WeakSet()
+
+
+def _inflight():
+    totals = {}
+    for coalescer in list(_coalescers):
+        totals[(coalescer.name,)] = totals.get((coalescer.name,), 0) + coalescer.inflight()
+    return totals
+
+
+INFLIGHT = metrics.register(metrics.Gauge(
+    "sdc_coalesce_inflight", "Distinct computations in flight, by coalescer.", ["name"], fn=_inflight))
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serializable request parameters."""
+    text = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "finished")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.finished = None
+
+
+class Coalescer:
+    """Shares one computation among concurrent callers with the same key."""
+
+    def __init__(self, name, ttl=COALESCE_TTL_SECONDS, max_entries=1024):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._calls = {}
+        self._lock = threading.Lock()
+        _coalescers.add(self)
+
+    def inflight(self):
+        return sum(not c.done.is_set() for c in list(self._calls.values()))
+
+    def _evict(self, now):
+        # called with _lock held; drops expired results, then the oldest if still full
+        for key in [k for k, c in self._calls.items() if c.done.is_set() and now - c.finished >= self.ttl]:
+            del self._calls[key]
+        while len(self._calls) >= self.max_entries:
+            oldest = min((k for k, c in self._calls.items() if c.done.is_set()),
+                         key=lambda k: self._calls[k].finished, default=None)
+            if oldest is None:
+                break
+            del self._calls[oldest]
+
+    def run(self, key, compute, ttl=None):
+        """Returns (outcome, result) of `compute()`, shared with identical callers.
+
+        `ttl` overrides the coalescer's TTL for this call, both for
+        accepting a finished result and for keeping this call's result.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        now = time.monotonic()
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and now - call.finished >= ttl:
+                call = None
+            if call is None:
+                self._evict(now)
+                call = self._calls[key] = _Call()
+                outcome = "leader"
+            else:
+                outcome = "cached" if call.done.is_set() else "coalesced"
+        REQUESTS.inc(self.name, outcome)
+
+        if outcome == "leader":
+            try:
+                call.result = compute()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                call.finished = time.monotonic()
+                with self._lock:
+                    if (call.error is not None or ttl <= 0) and self._calls.get(key) is call:
+                        del self._calls[key]
+                call.done.set()
+            return outcome, call.result
+
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return outcome, call.result
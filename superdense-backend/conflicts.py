@@ -0,0 +1,198 @@
+# conflicts.py
+# ====================================================
+# Loss-of-separation detection across the whole fleet.
+#
+# Aircraft are hashed into a grid over Earth-centred unit vectors, with
+# cells as wide as the horizontal separation minimum. Two aircraft closer
+# than the minimum are always in the same or adjacent cells, so each one
+# is only compared with the aircraft in its 27 neighbouring cells instead
+# of the whole fleet: cost grows with fleet size, not with its square.
+# The grid has no special cases at the poles or the antimeridian.
+#
+# ConflictIndex.update() applies a feed snapshot incrementally (aircraft
+# only move between cells when they cross a boundary; those that left the
+# feed are removed). detect() reports pairs in conflict now and, with
+# lookahead, at each predicted step (aircraft.predict_trajectory).
+# Altitudes are converted to metres per feed source before comparing:
+# OpenSky reports metres, the simulated CSV (and replays of it) feet.
+#
+# Configuration (environment):
+#   CONFLICT_HORIZONTAL_M  horizontal minimum, metres (default 9260 = 5 NM)
+#   CONFLICT_VERTICAL_M    vertical minimum, metres (default 305 = 1000 ft)
+# ====================================================
+
+import math
+import os
+import threading
+from itertools import product
+
+import metrics
+from metrics import timed
+
+CONFLICT_HORIZONTAL_M = float(os.getenv("CONFLICT_HORIZONTAL_M", "9260"))
+CONFLICT_VERTICAL_M = float(os.getenv("CONFLICT_VERTICAL_M", "305"))
+
+R_EARTH_M = 6371e3
+NEIGHBOURS = list(product((-1, 0, 1), repeat=3))
+FOOT_M = 0.3048
+# metres per altitude unit, by flight["source"]; unknown sources are taken as metres
+ALTITUDE_UNIT_M = {"live": 1.0, "simulated": FOOT_M, "replay": FOOT_M}
+
+PAIRS_CHECKED = metrics.register(metrics.Counter(
+    "sdc_conflict_pairs_checked_total", "Aircraft pairs compared by exact distance."))
+
+
+def unit_vector(lat, lon):
+    lat, lon = math.radians(lat), math.radians(lon)
+    return (math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat))
+
+
+def altitude_m(altitude, source):
+    """A feed altitude in metres, or None if unknown."""
+    return None if altitude is None else float(altitude) * ALTITUDE_UNIT_M.get(source, 1.0)
+
+
+def distance_m(a, b):
+    """Great-circle distance between two unit vectors."""
+    chord = math.dist(a, b)
+    return 2 * R_EARTH_M * math.asin(min(1.0, chord / 2))
+
+
+class SpatialGrid:
+    """Hash of unit vectors into cubes of side `cell` (in unit-sphere lengths)."""
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.cells = {}     # key -> {icao: (vector, altitude in metres)}
+        self.keys = {}      # icao -> key
+
+    def key(self, vector):
+        return tuple(math.floor(c / self.cell) for c in vector)
+
+    def put(self, icao, vector, altitude):
+        """Adds or moves `icao`; returns True if it changed cells."""
+        key = self.key(vector)
+        old = self.keys.get(icao)
+        if old is not None and old != key:
+            self.remove(icao)
+        self.cells.setdefault(key, {})[icao] = (vector, altitude)
+        self.keys[icao] = key
+        return old != key
+
+    def remove(self, icao):
+        key = self.keys.pop(icao, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        cell.pop(icao, None)
+        if not cell:
+            del self.cells[key]
+
+    def pairs(self, horizontal_m, vertical_m):
+        """(a, b, horizontal distance, vertical distance) for every pair within both minima."""
+        found = []
+        checked = 0
+        for (kx, ky, kz), members in self.cells.items():
+            nearby = [self.cells.get((kx + dx, ky + dy, kz + dz)) for dx, dy, dz in NEIGHBOURS]
+            for icao, (vector, altitude) in members.items():
+                for cell in nearby:
+                    if not cell:
+                        continue
+                    for other, (other_vector, other_altitude) in cell.items():
+                        if other <= icao:
+                            continue  # each pair once
+                        checked += 1
+                        if altitude is not None and other_altitude is not None:
+                            dz = abs(altitude - other_altitude)
+                            if dz >= vertical_m:
+                                continue
+                        else:
+                            dz = None
+                        d = distance_m(vector, other_vector)
+                        if d < horizontal_m:
+                            found.append((icao, other, d, dz))
+        PAIRS_CHECKED.inc(amount=checked)
+        return found
+
+
+class ConflictIndex:
+    """Current positions of the fleet in a SpatialGrid, updated per feed snapshot."""
+
+    def __init__(self, horizontal_m=CONFLICT_HORIZONTAL_M, vertical_m=CONFLICT_VERTICAL_M):
+        self.horizontal_m = horizontal_m
+        self.vertical_m = vertical_m
+        self.cell = horizontal_m / R_EARTH_M  # chord >= arc / R for small arcs, so this is safe
+        self.grid = SpatialGrid(self.cell)
+        self.flights = {}
+        self._lock = threading.Lock()
+
+    def update(self, flights):
+        """Applies a feed snapshot; returns the number of aircraft that changed cells."""
+        moved = 0
+        with self._lock, timed("conflict_index_update"):
+            current = set()
+            for flight in flights:
+                icao, lat, lon = flight.get("icao24"), flight.get("latitude"), flight.get("longitude")
+                if not icao or lat is None or lon is None or flight.get("on_ground"):
+                    continue
+                current.add(icao)
+                self.flights[icao] = flight
+                moved += self.grid.put(icao, unit_vector(lat, lon),
+                                       altitude_m(flight.get("altitude"), flight.get("source")))
+            for icao in [i for i in self.flights if i not in current]:
+                del self.flights[icao]
+                self.grid.remove(icao)
+        return moved
+
+    def _describe(self, a, b, d, dz, time_sec, positions):
+        fa, fb = self.flights[a], self.flights[b]
+        return {
+            "aircraft": [a, b],
+            "callsigns": [fa.get("callsign"), fb.get("callsign")],
+            "time_sec": time_sec,
+            "horizontal_m": round(d, 1),
+            "vertical_m": None if dz is None else round(dz, 1),
+            "positions": positions,
+        }
+
+    def detect(self, lookahead=0, interval=60, predict=None):
+        """Conflicts now and at each of `lookahead` predicted steps, earliest first.
+
+        `predict(flight, steps, interval)` returns predicted points as
+        aircraft.predict_trajectory does. A pair is reported once, at the
+        first time it is in conflict.
+        """
+        with self._lock, timed("conflict_detect"):
+            conflicts = {}
+            for a, b, d, dz in self.grid.pairs(self.horizontal_m, self.vertical_m):
+                fa, fb = self.flights[a], self.flights[b]
+                conflicts[(a, b)] = self._describe(a, b, d, dz, 0, [
+                    {"lat": fa["latitude"], "lon": fa["longitude"], "altitude": fa.get("altitude")},
+                    {"lat": fb["latitude"], "lon": fb["longitude"], "altitude": fb.get("altitude")},
+                ])
+
+            if lookahead and predict:
+                tracks = {icao: predict(flight, steps=lookahead, interval=interval)
+                          for icao, flight in self.flights.items()}
+                for step in range(lookahead):
+                    grid = SpatialGrid(self.cell)
+                    points = {}
+                    for icao, track in tracks.items():
+                        if len(track) > step:
+                            point = points[icao] = track[step]
+                            grid.put(icao, unit_vector(point["lat"], point["lon"]),
+                                     altitude_m(point.get("altitude"), self.flights[icao].get("source")))
+                    for a, b, d, dz in grid.pairs(self.horizontal_m, self.vertical_m):
+                        if (a, b) not in conflicts:
+                            conflicts[(a, b)] = self._describe(a, b, d, dz, (step + 1) * interval, [
+                                {k: points[a][k] for k in ("lat", "lon", "altitude")},
+                                {k: points[b][k] for k in ("lat", "lon", "altitude")},
+                            ])
+
+        return sorted(conflicts.values(), key=lambda c: (c["time_sec"], c["horizontal_m"]))
+
+
+index = ConflictIndex()
+
+metrics.register(metrics.Gauge(
+    "sdc_conflict_index_aircraft", "Aircraft in the conflict index.", fn=lambda: len(index.flights)))
@@ -0,0 +1,100 @@
+# decoding.py
+# ====================================================
+# Measurement results as integer NumPy arrays.
+#
+# Results arrive as Aer memory strings, SamplerV2 BitArrays or counts
+# dicts. They are all turned into one form, a (shots, clbits) uint8 array
+# with clbit 0 in column 0, without a Python loop over shots:
+#
+#   bits_from_memory(result.get_memory(i))     Aer per-shot memory
+#   bits_from_bitarray(pub.data.c)             SamplerV2 BitArray
+#
+# pack() turns those rows into integers in either bit order:
+#
+#   "clbit"    clbit 0 is the least significant bit, i.e. the value of
+#              qiskit's count keys ('c1c0' read as binary)
+#   "message"  clbit 0 is the most significant bit, i.e. the key reversed,
+#              which reads as the sent message for the SDC circuits here
+#
+# and histogram() / to_counts() / soft_bits() summarise them with
+# bincount. Converting between the two orders is reverse_bits(), a few
+# shifts and masks on the whole array.
+# ====================================================
+
+import numpy as np
+
+
+def bits_from_memory(memory):
+    """(shots, clbits) array from Aer memory strings ('c1c0', registers space-separated)."""
+    if not memory:
+        return np.zeros((0, 0), dtype=np.uint8)
+    text = "".join(memory).replace(" ", "")
+    chars = np.frombuffer(text.encode("ascii"), dtype=np.uint8).reshape(len(memory), -1)
+    return (chars[:, ::-1] - ord("0")).astype(np.uint8)
+
+
+def bits_from_bitarray(bit_array):
+    """(shots, clbits) array from a SamplerV2 BitArray (one register)."""
+    raw = np.asarray(bit_array.array, dtype=np.uint8).reshape(-1, bit_array.array.shape[-1])
+    # bytes are big-endian: the last byte holds clbits 0-7, least significant first
+    return np.unpackbits(raw[:, ::-1], axis=1, bitorder="little")[:, :bit_array.num_bits]
+
+
+def pack(bits, order="clbit"):
+    """Integer per shot from a (shots, clbits) array (at most 63 clbits)."""
+    bits = np.asarray(bits, dtype=np.int64)
+    width = bits.shape[1]
+    if width > 63:
+        raise ValueError(f"Cannot pack {width} clbits into one integer")
+    shifts = np.arange(width) if order == "clbit" else np.arange(width - 1, -1, -1)
+    return (bits << shifts).sum(axis=1)
+
+
+def reverse_bits(values, width):
+    """Reverses the lowest `width` bits of every value (clbit <-> message order)."""
+    values = np.asarray(values, dtype=np.int64)
+    out = np.zeros_like(values)
+    for i in range(width):
+        out |= ((values >> i) & 1) << (width - 1 - i)
+    return out
+
+
+def histogram(values, width):
+    """Counts of every `width`-bit value (length 2**width)."""
+    return np.bincount(np.asarray(values, dtype=np.int64), minlength=1 << width)
+
+
+def reorder(hist, width):
+    """Histogram indexed in the other bit order."""
+    out = np.zeros_like(hist)
+    out[reverse_bits(np.arange(len(hist)), width)] = hist
+    return out
+
+
+def histogram_from_counts(counts, width, order="clbit"):
+    """Histogram from a counts dict keyed by bitstrings ('c1c0') or hex ('0x1')."""
+    hist = np.zeros(1 << width, dtype=np.int64)
+    for key, count in counts.items():
+        key = key.replace(" ", "")
+        hist[int(key, 16) if key.startswith("0x") else int(key, 2)] += count
+    return hist if order == "clbit" else reorder(hist, width)
+
+
+def aer_histogram(result, index, width, order="clbit"):
+    """Histogram of an Aer result's experiment `index`, without building string keys."""
+    return histogram_from_counts(result.data(index)["counts"], width, order)
+
+
+def to_counts(hist, width, zeros=True):
+    """{"00": n, ...} dict from a histogram (keys written most significant bit first)."""
+    return {format(value, f"0{width}b"): int(count)
+            for value, count in enumerate(hist.tolist()) if zeros or count}
+
+
+def soft_bits(hist, width):
+    """P(bit = 1) per key position (most significant bit first) from a histogram."""
+    shots = hist.sum()
+    if not shots:
+        return np.full(width, 0.5)
+    table = (np.arange(len(hist))[:, None] >> np.arange(width - 1, -1, -1)) & 1
+    return hist @ table / shots
@@ -0,0 +1,82 @@
+# execution.py
+# ====================================================
+# Routes local circuit execution to the cheapest Aer method.
+#
+# Every protocol circuit here (Bell preparation, X/Z encoding, basis-change
+# H gates, CNOT decoding, Eve's mid-circuit measurement) is a Clifford
+# circuit, which Aer's stabilizer method samples in polynomial time: wide
+# circuits packing hundreds of Bell pairs cost about as much as a few
+# two-qubit ones. Anything non-Clifford falls back to statevector.
+# ====================================================
+
+import functools
+
+import metrics
+from services import get_simulator
+
+# Clifford gates (and non-unitary operations) worth routing to the stabilizer
+# method; stabilizer_operations() keeps only those this Aer build supports
+CLIFFORD_OPERATIONS = frozenset({
+    "id", "x", "y", "z", "h", "s", "sdg", "sx", "sxdg",
+    "cx", "cy", "cz", "swap", "iswap", "ecr", "dcx",
+    "measure", "reset", "barrier", "delay",
+})
+NON_GATE_OPERATIONS = frozenset({"measure", "reset", "barrier", "delay"})
+
+# Statevector memory doubles per qubit; wider non-Clifford circuits are refused
+MAX_STATEVECTOR_QUBITS = 28
+
+CIRCUITS_RUN = metrics.register(metrics.Counter(
+    "sdc_execution_circuits_total", "Circuits run on the local simulator, by method.", ["method"]))
+
+
+@functools.lru_cache(maxsize=None)
+def stabilizer_operations():
+    """CLIFFORD_OPERATIONS that Aer's stabilizer method accepts (e.g. not iswap or dcx)."""
+    basis_gates = set(get_simulator("stabilizer").configuration().basis_gates)
+    return CLIFFORD_OPERATIONS & (basis_gates | NON_GATE_OPERATIONS)
+
+
+def is_clifford(circuit):
+    """True if the stabilizer method can run every operation in `circuit`."""
+    supported = stabilizer_operations()
+    return all(instruction.operation.name in supported for instruction in circuit.data)
+
+
+def select_method(circuits):
+    """"stabilizer" if every circuit is Clifford, otherwise "statevector"."""
+    if all(is_clifford(circuit) for circuit in circuits):
+        return "stabilizer"
+    widest = max(circuit.num_qubits for circuit in circuits)
+    if widest > MAX_STATEVECTOR_QUBITS:
+        raise ValueError(f"Non-Clifford circuit on {widest} qubits is too wide for statevector simulation")
+    return "statevector"
+
+
+def run(circuits, backend=None, noise_model=None, **run_options):
+    """Runs `circuits` and returns the job.
+
+    With no `backend` the simulation method is chosen by select_method;
+    an explicit backend (e.g. an IBM device or noisy simulator) is used as is.
+    `noise_model` is applied to this run only; it must be a Pauli channel for
+    Clifford circuits (channel_model.py only builds such models).
+    """
+    if noise_model is not None:
+        run_options["noise_model"] = noise_model
+    batch = circuits if isinstance(circuits, (list, tuple)) else [circuits]
+    if backend is None:
+        method = select_method(batch)
+        backend = get_simulator(method)
+        CIRCUITS_RUN.inc(method, amount=len(batch))
+        if method == "statevector":
+            circuits = _to_basis(circuits, batch, backend)
+    return backend.run(circuits, **run_options)
+
+
+def _to_basis(circuits, batch, backend):
+    """Transpiles `circuits` for `backend` if any uses a gate outside its basis (e.g. iswap)."""
+    supported = set(backend.configuration().basis_gates) | NON_GATE_OPERATIONS
+    if all(instruction.operation.name in supported for circuit in batch for instruction in circuit.data):
+        return circuits
+    from qiskit import transpile
+    return transpile(circuits, backend, optimization_level=0)
@@ -0,0 +1,252 @@
+# fake_services.py
+# ====================================================
+# Local stand-ins for the third-party services the backends call, so load
+# tests can measure capacity without hitting rate-limited APIs:
+#
+#   OpenSky   GET  /api/states/all, /api/tracks/all       (aircraft.py)
+#   N2YO      GET  /rest/v1/satellite/positions/...       (application.py)
+#   IBM       GET  /backend, POST /jobs                   (services.get_runtime)
+#
+# Every server takes a latency (mean + jitter, seconds) and a failure rate;
+# failed requests answer 503. Point the backends at them with
+#
+#   OPENSKY_URL=http://127.0.0.1:<port>/api
+#   N2YO_URL=http://127.0.0.1:<port>/rest/v1
+#   IBM_RUNTIME_URL=http://127.0.0.1:<port>
+#
+#   python fake_services.py --latency 0.2 --failure-rate 0.05
+# ====================================================
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+FakeServer = namedtuple("FakeServer", ["name", "server", "url", "env"])
+
+
+# ----------------------------------------------------
+# Shared request handling
+# ----------------------------------------------------
+class FakeHandler(BaseHTTPRequestHandler):
+    """Applies the configured latency/failure rate, then dispatches to `routes`."""
+
+    latency = 0.0
+    jitter = 0.0
+    failure_rate = 0.0
+    routes = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, method):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < self.failure_rate:
+            return self._send(503, {"error": "injected failure"})
+
+        url = urlparse(self.path)
+        for (route_method, prefix), handler in self.routes.items():
+            if route_method == method and url.path.startswith(prefix):
+                body = None
+                if method == "POST":
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                return self._send(200, handler(url.path, parse_qs(url.query), body))
+        return self._send(404, {"error": f"no fake route for {method} {url.path}"})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+
+def serve(name, routes, env, url_suffix="", host="127.0.0.1", port=0,
+          latency=0.0, jitter=0.0, failure_rate=0.0):
+    """Starts a fake server on a daemon thread and returns a FakeServer."""
+    handler = type(f"{name}Handler", (FakeHandler,), {
+        "routes": routes, "latency": latency, "jitter": jitter, "failure_rate": failure_rate,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"fake-{name}", daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}{url_suffix}"
+    return FakeServer(name, server, url, env)
+
+
+# ----------------------------------------------------
+# OpenSky
+# ----------------------------------------------------
+def opensky_routes(num_aircraft=500, seed=0):
+    rng = random.Random(seed)
+    fleet = [
+        (f"fake{i:05x}", f"FAKE{i:04d}", rng.uniform(8, 37), rng.uniform(68, 97),
+         rng.uniform(3000, 12000), rng.uniform(150, 260), rng.uniform(0, 360))
+        for i in range(num_aircraft)
+    ]
+
+    def states(path, query, body):
+        now = int(time.time())
+        return {"time": now, "states": [
+            [icao, callsign, "India", now, now, lon, lat, alt, False, vel, heading]
+            for icao, callsign, lat, lon, alt, vel, heading in fleet
+        ]}
+
+    def tracks(path, query, body):
+        icao = query.get("icao24", [""])[0]
+        match = next((f for f in fleet if f[0] == icao), None)
+        if match is None:
+            return {"icao24": icao, "path": []}
+        _, _, lat, lon, alt, _, heading = match
+        now = int(time.time())
+        return {"icao24": icao, "path": [
+            [now - 60 * (10 - i), lat - 0.02 * (10 - i), lon - 0.02 * (10 - i), alt, heading, False]
+            for i in range(11)
+        ]}
+
+    return {("GET", "/api/states/all"): states, ("GET", "/api/tracks/all"): tracks}
+
+
+# ----------------------------------------------------
+# N2YO
+# ----------------------------------------------------
+def n2yo_routes():
+    def positions(path, query, body):
+        return {"positions": [{
+            "satlatitude": random.uniform(-51.6, 51.6),
+            "satlongitude": random.uniform(-180, 180),
+            "timestamp": int(time.time()),
+            "eclipsed": random.random() < 0.3,
+        }]}
+
+    return {("GET", "/rest/v1/satellite/positions/"): positions}
+
+
+# ----------------------------------------------------
+# IBM Quantum runtime
+# ----------------------------------------------------
+FAKE_BACKEND_NAME = "fake_ibm_local"
+
+
+def ibm_routes():
+    """Runs submitted OpenQASM 2 circuits on Aer, standing in for a hardware queue."""
+    def backend(path, query, body):
+        return {"name": FAKE_BACKEND_NAME}
+
+    def jobs(path, query, body):
+        from qiskit import qasm2
+        from qiskit_aer import AerSimulator
+
+        results = []
+        for source in body["circuits"]:
+            circuit = qasm2.loads(source)
+            counts = AerSimulator().run(circuit, shots=body.get("shots", 1024)).result().get_counts()
+            results.append({creg.name: counts for creg in circuit.cregs[:1]})
+        return {"job_id": f"fake-{uuid.uuid4().hex[:12]}", "backend": FAKE_BACKEND_NAME, "results": results}
+
+    return {("GET", "/backend"): backend, ("POST", "/jobs"): jobs}
+
+
+class _FakeJob:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def job_id(self):
+        return self._payload["job_id"]
+
+    def result(self):
+        from qiskit.primitives.containers import BitArray
+
+        return [
+            SimpleNamespace(data=SimpleNamespace(**{
+                name: BitArray.from_counts(c, num_bits=len(next(iter(c)))) for name, c in pub.items()}))
+            for pub in self._payload["results"]
+        ]
+
+
+class FakeSampler:
+    """Client for the fake IBM server exposing the subset of SamplerV2 the backends use."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def run(self, circuits, shots=1024):
+        import requests
+        from qiskit import qasm2
+
+        resp = requests.post(f"{self.url}/jobs", json={
+            "circuits": [qasm2.dumps(c) for c in circuits], "shots": shots,
+        }, timeout=60)
+        resp.raise_for_status()
+        return _FakeJob(resp.json())
+
+
+class _IdentityPassManager:
+    def run(self, circuit):
+        return circuit
+
+
+def remote_runtime(url):
+    """Builds a services.Runtime backed by the fake IBM server at `url`."""
+    import requests
+    from services import Runtime
+
+    resp = requests.get(f"{url.rstrip('/')}/backend", timeout=10)
+    resp.raise_for_status()
+    backend = SimpleNamespace(name=resp.json()["name"])
+    return Runtime(None, backend, _IdentityPassManager(), FakeSampler(url))
+
+
+# ----------------------------------------------------
+# Entry points
+# ----------------------------------------------------
+def start_fake_servers(latency=0.0, jitter=0.0, failure_rate=0.0, num_aircraft=500, host="127.0.0.1"):
+    """Starts all three fakes on free ports and returns them as a list of FakeServer."""
+    opts = {"host": host, "latency": latency, "jitter": jitter, "failure_rate": failure_rate}
+    return [
+        serve("opensky", opensky_routes(num_aircraft), "OPENSKY_URL", "/api", **opts),
+        serve("n2yo", n2yo_routes(), "N2YO_URL", "/rest/v1", **opts),
+        serve("ibm", ibm_routes(), "IBM_RUNTIME_URL", **opts),
+    ]
+
+
+def fake_env(servers):
+    """Environment variables that point the backends at `servers`."""
+    return {s.env: s.url for s in servers}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run local fakes for OpenSky, N2YO and IBM Quantum")
+    parser.add_argument("--latency", type=float, default=0.0, help="mean added latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform latency jitter in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--aircraft", type=int, default=500, help="number of fake OpenSky aircraft")
+    args = parser.parse_args(argv)
+
+    servers = start_fake_servers(args.latency, args.jitter, args.failure_rate, args.aircraft)
+    for name, url in fake_env(servers).items():
+        print(f"export {name}={url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# fec.py
+# ====================================================
+# Forward error correction for bits sent over SDC rounds.
+#
+# Payload bits are split into k-bit words and Hamming-encoded into n-bit
+# codewords (rate k/n). Codewords are interleaved in pairs, so the two bits
+# of one SDC round always belong to different codewords: a wrong 2-bit
+# symbol then costs each codeword a single, correctable error.
+#
+# Decoding is soft: every received bit comes with P(bit = 1) taken from the
+# round's counts distribution, and a Chase-II decoder tries flipping the
+# least reliable bits before picking the codeword closest to what was
+# received (weighted by reliability). That lets a block decode reliably
+# from far fewer shots than a plain majority vote needs.
+# ====================================================
+
+import numpy as np
+
+import decoding
+
+_EPS = 1e-9
+
+
+class HammingCode:
+    """Hamming (2^r - 1, 2^r - 1 - r) code, parity bits at power-of-two positions."""
+
+    def __init__(self, r=3):
+        if r < 2:
+            raise ValueError("Hamming codes need r >= 2")
+        self.n = (1 << r) - 1
+        self.k = self.n - r
+        self.name = f"hamming{self.n}_{self.k}"
+        self.positions = np.arange(1, self.n + 1)
+        is_parity = (self.positions & (self.positions - 1)) == 0
+        self.data_idx = np.flatnonzero(~is_parity)
+        self.parity_idx = np.flatnonzero(is_parity)
+
+    @property
+    def rate(self):
+        return self.k / self.n
+
+    def syndrome(self, codewords):
+        """XOR of the (1-based) positions holding a 1; 0 for a valid codeword."""
+        return np.bitwise_xor.reduce(np.where(codewords == 1, self.positions, 0), axis=-1)
+
+    def encode(self, words):
+        """(m, k) data bits -> (m, n) codewords."""
+        codewords = np.zeros((words.shape[0], self.n), dtype=np.uint8)
+        codewords[:, self.data_idx] = words
+        syndrome = self.syndrome(codewords)
+        for i, idx in enumerate(self.parity_idx):
+            codewords[:, idx] = (syndrome >> i) & 1
+        return codewords
+
+    def correct(self, codewords):
+        """Hard-decision correction of up to one error per codeword, in place."""
+        syndrome = self.syndrome(codewords)
+        rows = np.flatnonzero(syndrome)
+        codewords[rows, syndrome[rows] - 1] ^= 1
+        return codewords
+
+    def decode(self, p_one, chase_bits=2):
+        """Soft-decodes (m, n) probabilities of each bit being 1.
+
+        Returns ((m, k) data bits, number of corrected bit errors).
+        """
+        m = p_one.shape[0]
+        hard = (p_one > 0.5).astype(np.uint8)
+        reliability = np.abs(np.log((p_one + _EPS) / (1 - p_one + _EPS)))
+
+        t = min(chase_bits, self.n)
+        least = np.argsort(reliability, axis=1, kind="stable")[:, :t]
+        patterns = (np.arange(1 << t)[:, None] >> np.arange(t)) & 1   # (P, t), row 0 flips nothing
+        candidates = np.repeat(hard[:, None, :], patterns.shape[0], axis=1)
+        rows, tests = np.arange(m)[:, None], np.arange(patterns.shape[0])[None, :]
+        for j in range(t):
+            candidates[rows, tests, least[:, j][:, None]] ^= patterns[:, j][None, :].astype(np.uint8)
+
+        candidates = self.correct(candidates.reshape(-1, self.n)).reshape(m, -1, self.n)
+        cost = ((candidates != hard[:, None, :]) * reliability[:, None, :]).sum(axis=2)
+        best = candidates[np.arange(m), np.argmin(cost, axis=1)]
+        return best[:, self.data_idx], int(np.count_nonzero(best != hard))
+
+
+class NoCode:
+    """Pass-through (rate 1): hard decisions only."""
+
+    name = "none"
+    n = k = 1
+    rate = 1.0
+
+    def encode(self, words):
+        return words.astype(np.uint8)
+
+    def decode(self, p_one, chase_bits=0):
+        return (p_one > 0.5).astype(np.uint8), 0
+
+
+CODES = {"none": lambda: NoCode(), "hamming7_4": lambda: HammingCode(3),
+         "hamming15_11": lambda: HammingCode(4), "hamming31_26": lambda: HammingCode(5)}
+
+
+def get_code(name="hamming7_4"):
+    try:
+        return CODES[name]()
+    except KeyError:
+        raise ValueError(f"Unknown FEC code '{name}' (available: {', '.join(CODES)})") from None
+
+
+# ----------------------------------------------------
+# Bit-string framing
+# ----------------------------------------------------
+def encode(bits: str, code) -> str:
+    """Encodes a '0'/'1' string; the result is a whole number of codeword pairs."""
+    data = np.frombuffer(bits.encode("ascii"), dtype=np.uint8) - ord("0")
+    group = 2 * code.k
+    data = np.concatenate([data, np.zeros(-data.size % group, dtype=np.uint8)])
+    codewords = code.encode(data.reshape(-1, code.k))
+    # interleave pairs of codewords: a0 b0 a1 b1 ...
+    interleaved = codewords.reshape(-1, 2, code.n).transpose(0, 2, 1).ravel()
+    return (interleaved + ord("0")).tobytes().decode("ascii")
+
+
+def soft_bits(counts, width=2):
+    """P(bit = 1) for each bit of a round, from its counts ({'01': 512, ...})."""
+    return decoding.soft_bits(decoding.histogram_from_counts(counts, width), width)
+
+
+class SoftDecoder:
+    """Decodes a stream of per-bit probabilities as soon as codeword pairs complete."""
+
+    def __init__(self, code, chase_bits=2):
+        self.code = code
+        self.chase_bits = chase_bits
+        self.corrected = 0
+        self._pending = []
+        self._decoded = []
+
+    def push(self, p_one):
+        """Adds received probabilities; returns errors corrected by this call."""
+        self._pending.extend(p_one)
+        group = 2 * self.code.n
+        complete = len(self._pending) - len(self._pending) % group
+        if not complete:
+            return 0
+        received = np.asarray(self._pending[:complete]).reshape(-1, self.code.n, 2).transpose(0, 2, 1)
+        del self._pending[:complete]
+        words, corrected = self.code.decode(received.reshape(-1, self.code.n), self.chase_bits)
+        self._decoded.append(words.ravel())
+        self.corrected += corrected
+        return corrected
+
+    def bits(self, length=None) -> str:
+        """Decoded data bits so far, trimmed to `length`."""
+        data = np.concatenate(self._decoded) if self._decoded else np.zeros(0, dtype=np.uint8)
+        return (data[:length] + ord("0")).astype(np.uint8).tobytes().decode("ascii")
@@ -0,0 +1,202 @@
+# flight_store.py
+# ====================================================
+# Columnar flight recordings and time-accelerated replay.
+#
+# ingest() converts a flight CSV (the simulated_flights.csv columns:
+# icao24, callsign, route, lat, lon, altitude, velocity, heading, timestamp)
+# into a directory of NumPy arrays:
+#
+#   meta.json          aircraft table (icao24, callsign, route), time range
+#   timestamp.npy ...  one file per column, rows sorted by time
+#   by_aircraft.npy    row numbers grouped by aircraft, each group by time
+#   offsets.npy        group boundaries in by_aircraft (len = aircraft + 1)
+#   track_key.npy      aircraft * (span + 1) + (t - start) in by_aircraft
+#                      order, so one searchsorted finds every aircraft's
+#                      last position at a given time
+#
+# FlightDataset memory-maps the arrays, so days of ADS-B data open
+# instantly and only the pages a query touches are read. ReplayClock maps
+# wall time onto recording time at a speed multiplier, which aircraft.py
+# uses to serve the recording as if it were live traffic.
+#
+#   python flight_store.py recording.csv recording.flights
+# ====================================================
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# (name, dtype, CSV column)
+COLUMNS = [
+    ("timestamp", np.int64, "timestamp"),
+    ("aircraft", np.int32, "icao24"),
+    ("lat", np.float64, "lat"),
+    ("lon", np.float64, "lon"),
+    ("altitude", np.float32, "altitude"),
+    ("velocity", np.float32, "velocity"),
+    ("heading", np.float32, "heading"),
+]
+
+
+# ----------------------------------------------------
+# Ingest
+# ----------------------------------------------------
+def ingest(csv_path, out_dir):
+    """Converts `csv_path` to a columnar dataset in `out_dir`; returns its meta."""
+    aircraft, index = [], {}
+    timestamps = array("q")
+    ids = array("i")
+    floats = {name: array("d") for name in ("lat", "lon", "altitude", "velocity", "heading")}
+
+    with open(csv_path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader)
+        col = {name: header.index(name) for name in ("icao24", "callsign", "lat", "lon", "altitude",
+                                                     "velocity", "heading", "timestamp")}
+        route_col = header.index("route") if "route" in header else None
+        for row in reader:
+            if not row:
+                continue
+            icao = row[col["icao24"]]
+            aircraft_id = index.get(icao)
+            if aircraft_id is None:
+                aircraft_id = index[icao] = len(aircraft)
+                aircraft.append({
+                    "icao24": icao,
+                    "callsign": row[col["callsign"]].strip(),
+                    "route": row[route_col] if route_col is not None else "",
+                })
+            ids.append(aircraft_id)
+            timestamps.append(int(float(row[col["timestamp"]])))
+            for name, values in floats.items():
+                values.append(float(row[col[name]] or "nan"))
+
+    if not timestamps:
+        raise ValueError(f"No rows in {csv_path}")
+
+    ts = np.frombuffer(timestamps, dtype=np.int64)
+    order = np.lexsort((np.frombuffer(ids, dtype=np.int32), ts))
+    columns = {"timestamp": ts[order], "aircraft": np.frombuffer(ids, dtype=np.int32)[order]}
+    for name, dtype, _ in COLUMNS[2:]:
+        columns[name] = np.frombuffer(floats[name], dtype=np.float64)[order].astype(dtype)
+
+    start, end = int(columns["timestamp"][0]), int(columns["timestamp"][-1])
+    by_aircraft = np.argsort(columns["aircraft"], kind="stable")  # stable: time order kept per group
+    offsets = np.searchsorted(columns["aircraft"][by_aircraft], np.arange(len(aircraft) + 1))
+    track_key = (columns["aircraft"][by_aircraft].astype(np.int64) * (end - start + 1)
+                 + (columns["timestamp"][by_aircraft] - start))
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, dtype, _ in COLUMNS:
+        np.save(os.path.join(out_dir, f"{name}.npy"), columns[name].astype(dtype, copy=False))
+    np.save(os.path.join(out_dir, "by_aircraft.npy"), by_aircraft.astype(np.int64))
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets.astype(np.int64))
+    np.save(os.path.join(out_dir, "track_key.npy"), track_key)
+
+    meta = {"version": FORMAT_VERSION, "rows": len(ts), "start": start, "end": end, "aircraft": aircraft}
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)  # written last: a dataset without meta.json is incomplete
+    return meta
+
+
+# ----------------------------------------------------
+# Reading
+# ----------------------------------------------------
+class FlightDataset:
+    """Read-only view of an ingested dataset (all arrays memory-mapped)."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+            meta = json.load(fh)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} has format version {meta.get('version')}, expected {FORMAT_VERSION}")
+        self.path = path
+        self.aircraft = meta["aircraft"]
+        self.start, self.end = meta["start"], meta["end"]
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                        for name, _, _ in COLUMNS}
+        self.by_aircraft = np.load(os.path.join(path, "by_aircraft.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.track_key = np.load(os.path.join(path, "track_key.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.by_aircraft)
+
+    def latest(self, t, max_age=None):
+        """(aircraft ids, positions into by_aircraft) of each aircraft's last report at or before `t`.
+
+        Aircraft not seen yet are left out, as are those whose last report is
+        more than `max_age` seconds old (landed or out of coverage).
+        """
+        t = min(max(int(t), self.start), self.end)
+        span = self.end - self.start + 1
+        ids = np.arange(len(self.aircraft), dtype=np.int64)
+        pos = np.searchsorted(self.track_key, ids * span + (t - self.start), side="right") - 1
+        seen = pos >= self.offsets[:-1]
+        if max_age is not None:
+            last = np.asarray(self.track_key)[np.where(seen, pos, 0)] - ids * span + self.start
+            seen &= last >= t - max_age
+        return ids[seen], pos[seen]
+
+    def track(self, aircraft_id, until=None, limit=None):
+        """Row numbers of `aircraft_id`'s reports (up to `until`), oldest first."""
+        lo, hi = int(self.offsets[aircraft_id]), int(self.offsets[aircraft_id + 1])
+        if until is not None:
+            span = self.end - self.start + 1
+            key = aircraft_id * span + (min(max(int(until), self.start), self.end) - self.start)
+            hi = lo + int(np.searchsorted(self.track_key[lo:hi], key, side="right"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return np.asarray(self.by_aircraft[lo:hi])
+
+    def rows(self, rows):
+        """Column values for `rows` as {name: ndarray}."""
+        rows = np.asarray(rows)
+        return {name: np.asarray(values[rows]) for name, values in self.columns.items()}
+
+    def find(self, icao24):
+        return next((i for i, a in enumerate(self.aircraft) if a["icao24"] == icao24), None)
+
+
+class ReplayClock:
+    """Recording time advancing `speed` times faster than the wall clock.
+
+    With `loop` the replay restarts from the beginning after the last report.
+    """
+
+    def __init__(self, start, end, speed=1.0, loop=True):
+        self.start, self.end = start, end
+        self.speed = speed
+        self.loop = loop
+        self._origin = time.monotonic()
+
+    def now(self):
+        elapsed = (time.monotonic() - self._origin) * self.speed
+        span = self.end - self.start + 1
+        if self.loop:
+            elapsed %= span
+        return self.start + min(elapsed, span - 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a flight CSV to a memory-mappable dataset")
+    parser.add_argument("csv", help="input CSV (simulated_flights.csv columns)")
+    parser.add_argument("out", help="output directory")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    meta = ingest(args.csv, args.out)
+    print(f"Wrote {meta['rows']} reports of {len(meta['aircraft'])} aircraft "
+          f"({meta['end'] - meta['start']} s) to {args.out} in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
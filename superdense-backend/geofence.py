@@ -0,0 +1,182 @@
+# geofence.py
+# ====================================================
+# Exact restricted-area entry and exit times for the whole fleet.
+#
+# An aircraft flying at constant speed v along its heading follows a great
+# circle: P(t) = cos(wt) P0 + sin(wt) D, with P0 its position and D the
+# heading direction as unit vectors and w = v / R. Each polygon edge is
+# taken as the great-circle arc between its corners, lying in the plane
+# with normal n = A x B. The path crosses that plane where
+#
+#   (n.P0) cos(wt) + (n.D) sin(wt) = 0,  i.e.  wt = atan2(-n.P0, n.D) + k pi
+#
+# and crosses the edge if that point lies between A and B. Every k up to
+# the horizon is solved, so paths longer than one revolution (2 pi R / v)
+# report their repeat crossings too. All flights and
+# all edges are solved at once with NumPy. The intervals between crossings
+# are labelled inside/outside with the same ray-casting rule as
+# aircraft.is_in_restricted_area, so short incursions are never missed and
+# a longer horizon costs nothing extra. (For the restricted areas in
+# aircraft.py, the arcs stay within ~115 m of the straight lat/lon edges
+# that the ray-casting check uses.)
+# ====================================================
+
+import numpy as np
+
+from metrics import timed
+
+R_EARTH_M = 6371e3
+# Faster speeds are feed or filter glitches; clipping them bounds the
+# crossing solutions solved for the whole fleet
+MAX_SPEED_MPS = 600.0
+
+
+def _unit_vectors(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def _lat_lon(vectors):
+    return (np.degrees(np.arcsin(np.clip(vectors[..., 2], -1, 1))),
+            np.degrees(np.arctan2(vectors[..., 1], vectors[..., 0])))
+
+
+def _directions(lat, lon, heading):
+    """Unit tangent vectors pointing along `heading` (degrees from north)."""
+    lat, lon, heading = np.radians(lat), np.radians(lon), np.radians(heading)
+    east = np.stack([-np.sin(lon), np.cos(lon), np.zeros_like(lon)], axis=-1)
+    north = np.stack([-np.sin(lat) * np.cos(lon), -np.sin(lat) * np.sin(lon), np.cos(lat)], axis=-1)
+    return np.sin(heading)[:, None] * east + np.cos(heading)[:, None] * north
+
+
+def contains(lat, lon, polygon):
+    """Vectorized aircraft.is_in_restricted_area for one polygon of (lat, lon) corners."""
+    x, y = np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+    inside = np.zeros(x.shape, dtype=bool)
+    n = len(polygon)
+    for i in range(n):
+        (p1y, p1x), (p2y, p2x) = polygon[i], polygon[(i + 1) % n]
+        hit = (y > min(p1y, p2y)) & (y <= max(p1y, p2y)) & (x <= max(p1x, p2x))
+        if p1x != p2x and p1y != p2y:
+            hit &= x <= (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+        inside ^= hit
+    return inside
+
+
+class Geofence:
+    """Restricted polygons prepared for crossing-time queries."""
+
+    def __init__(self, polygons):
+        self.polygons = [list(p) for p in polygons]
+        starts, ends, owner = [], [], []
+        for k, polygon in enumerate(self.polygons):
+            for i in range(len(polygon)):
+                starts.append(polygon[i])
+                ends.append(polygon[(i + 1) % len(polygon)])
+                owner.append(k)
+        self.a = _unit_vectors(*np.array(starts).T)
+        self.b = _unit_vectors(*np.array(ends).T)
+        self.normals = np.cross(self.a, self.b)
+        self.owner = np.array(owner)
+
+    def crossings(self, lat, lon, speed, heading, horizon):
+        """Edge crossings within `horizon` seconds.
+
+        Arguments are arrays over flights (speed in m/s, clipped to
+        MAX_SPEED_MPS). Returns (flight, area, time) arrays sorted by
+        flight, area and time.
+        """
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        omega = np.clip(np.asarray(speed, dtype=float), 0.0, MAX_SPEED_MPS) / R_EARTH_M
+        p0 = _unit_vectors(lat, lon)
+        d = _directions(lat, lon, np.asarray(heading, dtype=float))
+
+        along = p0 @ self.normals.T                         # (flights, edges)
+        across = d @ self.normals.T
+        first = np.mod(np.arctan2(-along, across), np.pi)
+        # solutions first + k pi for every k that fits in the longest path
+        turns = int(np.ceil(float(np.max(omega, initial=0.0)) * horizon / np.pi)) + 1
+        angles = first[..., None] + np.pi * np.arange(max(turns, 2))  # (flights, edges, k)
+        points = (np.cos(angles)[..., None] * p0[:, None, None, :]
+                  + np.sin(angles)[..., None] * d[:, None, None, :])
+
+        normals = self.normals[None, :, None, :]
+        on_edge = ((np.einsum("fekc,fekc->fek", np.cross(self.a[None, :, None, :], points), normals) >= 0)
+                   & (np.einsum("fekc,fekc->fek", np.cross(points, self.b[None, :, None, :]), normals) >= 0))
+        moving = omega > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            times = np.where(moving[:, None, None], angles / omega[:, None, None], np.inf)
+        hit = on_edge & (times <= horizon) & moving[:, None, None]
+
+        flight, edge, _ = np.nonzero(hit)
+        area = self.owner[edge]
+        t = times[hit]
+        order = np.lexsort((t, area, flight))
+        return flight[order], area[order], t[order]
+
+    def intervals(self, lat, lon, speed, heading, horizon):
+        """Inside intervals per flight within `horizon` seconds.
+
+        Returns a list (one entry per flight) of
+        {"area", "entry_sec", "exit_sec", "inside_now"} dicts, where
+        entry_sec is 0 for a flight already inside and exit_sec is None if
+        it is still inside at the horizon.
+        """
+        lat, lon = np.asarray(lat, dtype=float), np.asarray(lon, dtype=float)
+        speed = np.clip(np.asarray(speed, dtype=float), 0.0, MAX_SPEED_MPS)
+        heading = np.asarray(heading, dtype=float)
+        horizon = float(horizon)
+        with timed("geofence"):
+            flight, area, t = self.crossings(lat, lon, speed, heading, horizon)
+
+            # Split each (flight, area) horizon at its crossings and test the
+            # middle of every piece; most flights cross nothing and form one piece
+            f_parts, k_parts, start_parts, end_parts = [], [], [], []
+            for k in range(len(self.polygons)):
+                crossing = area == k
+                quiet = np.setdiff1d(np.arange(len(lat)), flight[crossing])
+                f_parts.append(quiet)
+                k_parts.append(np.full(len(quiet), k))
+                start_parts.append(np.zeros(len(quiet)))
+                end_parts.append(np.full(len(quiet), horizon))
+
+                bounds = {}
+                for f, time in zip(flight[crossing].tolist(), t[crossing].tolist()):
+                    bounds.setdefault(f, [0.0]).append(time)
+                for f, cuts in bounds.items():
+                    cuts.append(horizon)
+                    f_parts.append(np.full(len(cuts) - 1, f))
+                    k_parts.append(np.full(len(cuts) - 1, k))
+                    start_parts.append(np.array(cuts[:-1]))
+                    end_parts.append(np.array(cuts[1:]))
+
+            f_idx, k_idx = np.concatenate(f_parts).astype(int), np.concatenate(k_parts).astype(int)
+            starts, ends = np.concatenate(start_parts), np.concatenate(end_parts)
+            mid_lat, mid_lon = self.position(lat[f_idx], lon[f_idx], speed[f_idx], heading[f_idx],
+                                             (starts + ends) / 2)
+            inside = np.zeros(len(f_idx), dtype=bool)
+            for k, polygon in enumerate(self.polygons):
+                sel = k_idx == k
+                inside[sel] = contains(mid_lat[sel], mid_lon[sel], polygon)
+            inside &= ends > starts
+
+        result = [[] for _ in range(len(lat))]
+        for i in np.flatnonzero(inside).tolist():
+            f, k, start, end = int(f_idx[i]), int(k_idx[i]), float(starts[i]), float(ends[i])
+            entries = result[f]
+            if entries and entries[-1]["area"] == k and entries[-1]["exit_sec"] == start:
+                entries[-1]["exit_sec"] = end  # a crossing that does not change the state
+                continue
+            entries.append({"area": k, "entry_sec": start, "exit_sec": end, "inside_now": start == 0.0})
+        for entries in result:
+            for entry in entries:
+                if entry["exit_sec"] >= horizon:
+                    entry["exit_sec"] = None
+            entries.sort(key=lambda e: e["entry_sec"])
+        return result
+
+    @staticmethod
+    def position(lat, lon, speed, heading, t):
+        """(lat, lon) arrays after flying `t` seconds along the great circle."""
+        angle = (speed * t / R_EARTH_M)[:, None]
+        return _lat_lon(np.cos(angle) * _unit_vectors(lat, lon) + np.sin(angle) * _directions(lat, lon, heading))
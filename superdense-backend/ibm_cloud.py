@@ -4,15 +4,21 @@
 # with real-time progress updates via SSE
 # ====================================================
 
-import time
-from flask import Flask, request, Response, jsonify
+import sys
+from flask import Blueprint, request, Response, jsonify
 from flask_cors import CORS
 from qiskit import QuantumRegister, ClassicalRegister, QuantumCircuit
-from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
-from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
-import json
 from dotenv import load_dotenv
 import os
+import startup
+import services
+import payload_codec
+import fec
+import decoding
+import result_store
+import sessions
+from payload_codec import text_to_bits, bits_to_text
+from metrics import timed
 
 # Load the .env file
 load_dotenv()
@@ -22,22 +28,12 @@ crn = os.getenv("CRN")
 # -----------------------
 # Flask Setup
 # -----------------------
-app = Flask(__name__)
-CORS(app)  # allow frontend access
+bp = Blueprint("ibm_cloud", __name__)
+CORS(bp)  # allow frontend access
 
 # -----------------------
 # Utility Functions
 # -----------------------
-def text_to_bits(text: str) -> str:
-    return ''.join(f"{b:08b}" for b in text.encode('utf-8'))
-
-def bits_to_text(bits: str) -> str:
-    bits_trimmed = bits[:(len(bits) // 8) * 8]
-    if not bits_trimmed:
-        return ""
-    bytes_list = [int(bits_trimmed[i:i+8], 2) for i in range(0, len(bits_trimmed), 8)]
-    return bytes(bytes_list).decode('utf-8', errors='replace')
-
 def sdc_circuit_for_2bits(msg2: str):
     qr = QuantumRegister(2, 'q')
     cr = ClassicalRegister(2, 'c')
@@ -68,94 +64,237 @@ def sdc_circuit_for_2bits(msg2: str):
 IBM_API_TOKEN = api_key # replace with your IBM API token
 SERVICE_INSTANCE = None
 
-service = QiskitRuntimeService(
-    channel="ibm_cloud",
-    token=IBM_API_TOKEN,
-    instance=SERVICE_INSTANCE
-)
+# Payload encoding used when the request does not pick one (see payload_codec.py)
+DEFAULT_CODEC = os.getenv("SDC_PAYLOAD_CODEC", "fixed")
+# Error-correcting code and shots per round when the request does not pick them (see fec.py)
+DEFAULT_FEC = os.getenv("SDC_FEC", "none")
+DEFAULT_SHOTS = int(os.getenv("SDC_SHOTS", "1024"))
+
+# The connection is made on first use (or by warm_runtime_in_background /
+# --preload) so the server can start without network access.
+def get_runtime():
+    """Returns the shared IBM Cloud session (see services.get_runtime)."""
+    return services.get_runtime("ibm_cloud", token=IBM_API_TOKEN, instance=SERVICE_INSTANCE)
 
-backend = service.least_busy(simulator=False, operational=True)
-pm = generate_preset_pass_manager(backend=backend, optimization_level=1)
-sampler = Sampler(backend)
+def warm_runtime_in_background():
+    """Starts connecting to IBM Quantum without blocking server startup."""
+    return services.warm_runtime_in_background("ibm_cloud", token=IBM_API_TOKEN, instance=SERVICE_INSTANCE)
 
 # -----------------------
 # SSE Helper
 # -----------------------
-def stream_sdc(message_text, blocks):
-    decoded_bits = ""
+# stream_sdc yields plain dicts; a sessions.Session runs it in the
+# background and turns each one into a numbered SSE frame, so clients can
+# drop and resume the stream (see sessions.py).
+def stream_sdc(message_text, blocks, codec, payload_bits, code, shots=DEFAULT_SHOTS, reuse=False):
+    runtime = get_runtime()
+    backend_name = runtime.backend.name
+    hashes = {}  # only four distinct circuits; hash each once
+    decoder = fec.SoftDecoder(code)
+    raw_bit_errors = 0
     round_summaries = []
     first_two_circuits = []
 
     for i, block in enumerate(blocks):
-        qc = sdc_circuit_for_2bits(block)
+        with timed("circuit_build"):
+            qc = sdc_circuit_for_2bits(block)
         if i < 2:
             first_two_circuits.append(str(qc.draw(output='text')))
 
-        isa_circ = pm.run(qc)
-        job = sampler.run([isa_circ], shots=1024)
-        res = job.result()
-        pub = res[0]
-        counts = getattr(pub.data, "c").get_counts()
-        measured = max(counts, key=counts.get)
+        if block not in hashes:
+            hashes[block] = result_store.circuit_hash(qc)
+        key = hashes[block]
+        with timed("store_lookup"):
+            stored = result_store.store.lookup("sdc_stream", key, backend_name, shots) if reuse else None
+
+        if stored:
+            job_id, counts = stored["job_id"], stored["counts"]
+            hist = decoding.histogram_from_counts(counts, 2)
+        else:
+            with timed("transpile"):
+                isa_circ = services.transpile(runtime, qc)
+            with timed("submit"):
+                job = runtime.sampler.run([isa_circ], shots=shots)
+                job_id = job.job_id()
+                res = job.result()
+            with timed("result_parse"):
+                pub = res[0]
+                # keys stay 'c1c0', which is the order the block was encoded in
+                bits = decoding.bits_from_bitarray(getattr(pub.data, "c"))
+                hist = decoding.histogram(decoding.pack(bits), 2)
+                counts = decoding.to_counts(hist, 2, zeros=False)
+            result_store.store.save("sdc_stream", key, backend_name, shots, counts,
+                                    job_id=job_id, metadata={"block": block})
+        measured = format(int(hist.argmax()), "02b")
+        with timed("fec_decode"):
+            decoder.push(decoding.soft_bits(hist, 2))
+        raw_bit_errors += sum(a != b for a, b in zip(measured, block))
 
-        decoded_bits += measured
         round_summary = {
             "round": i + 1,
             "sent": block,
             "measured": measured,
-            "counts": counts
+            "counts": counts,
+            "job_id": job_id,
+            "from_store": bool(stored),
         }
         round_summaries.append(round_summary)
 
         # Send progress update
-        progress_data = {
+        yield {
             "round": i + 1,
             "sent": block,
             "measured": measured,
             "counts": counts,
+            "corrected_errors": decoder.corrected,
             "message": f"Round {i+1}/{len(blocks)} completed"
         }
-        yield f"data: {json.dumps(progress_data)}\n\n"
-
-        time.sleep(0.1)
 
     # Final result
-    decoded_bits = decoded_bits[:len(text_to_bits(message_text))]
-    decrypted_text = bits_to_text(decoded_bits)
-    success = decrypted_text == message_text
+    decoded_bits = decoder.bits(len(payload_bits))
+    decoded = codec.decode(decoded_bits)
+    success = decoded["valid"] and decoded_bits == payload_bits
 
     final_result = {
         "original_text": message_text,
-        "decoded_text": decrypted_text,
+        "decoded_text": decoded["text"],
         "decoded_bits": decoded_bits,
+        "decoded_values": {k: decoded[k] for k in ("latitude", "longitude", "restricted")},
+        "codec": codec.describe(),
+        "payload_bits": len(payload_bits),
+        "fec": {"name": code.name, "rate": code.rate, "channel_bits": 2 * len(blocks), "shots": shots},
+        "raw_bit_errors": raw_bit_errors,
+        "corrected_errors": decoder.corrected,
         "success": success,
         "first_two_circuits": first_two_circuits,
         "round_summaries": round_summaries,
         "completed": True
     }
-    yield f"data: {json.dumps(final_result)}\n\n"
+    yield final_result
 
 # -----------------------
-# SSE Route (GET for EventSource)
+# SSE Routes
 # -----------------------
-@app.route("/sdc/send-stream", methods=["GET"])
-def sdc_send_stream():
-    try:
-        latitude = request.args.get("latitude", "33.89729")
-        longitude = request.args.get("longitude", "74.24314")
-        restricted_status = request.args.get("restricted_status", "0")
+def start_session(args):
+    """Parses the transmission parameters in `args` and starts a session for them."""
+    latitude = args.get("latitude", "33.89729")
+    longitude = args.get("longitude", "74.24314")
+    restricted_status = args.get("restricted_status", "0")
+    codec_name = args.get("codec", DEFAULT_CODEC)
+    options = {}
+    if codec_name == "fixed":
+        options["precision"] = int(args.get("precision", "5"))
+        options["crc"] = str(args.get("crc", "1")) != "0"
+    codec = payload_codec.get_codec(codec_name, **options)
+    code = fec.get_code(args.get("fec", DEFAULT_FEC))
+    shots = int(args.get("shots", DEFAULT_SHOTS))
+    reuse = str(args.get("reuse", "1" if result_store.RESULT_STORE_REUSE else "0")) == "1"
+    if shots < 1:
+        raise ValueError("shots must be positive")
+
+    message_text = f"{latitude},{longitude},{restricted_status}"
+    plaintext_bits = codec.encode(latitude, longitude, restricted_status)
+    channel_bits = fec.encode(plaintext_bits, code)
+    blocks = [channel_bits[i:i+2] for i in range(0, len(channel_bits), 2)]
+    get_runtime()  # surface connection errors before the stream starts
+
+    return sessions.manager.create(
+        lambda: stream_sdc(message_text, blocks, codec, plaintext_bits, code, shots, reuse), kind="sdc")
+
+def sse_response(session, after=-1):
+    response = Response(sessions.manager.iter_sse(session, after), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Session-Id"] = session.id
+    return response
+
+def resume_point():
+    """(session id, session, seq) named by Last-Event-ID (or ?last_event_id=).
 
-        message_text = f"{latitude},{longitude},{restricted_status}"
-        plaintext_bits = text_to_bits(message_text)
-        blocks = [plaintext_bits[i:i+2].ljust(2, '0') for i in range(0, len(plaintext_bits), 2)]
+    The session is None (and seq -1) when no ID was sent or it has expired.
+    """
+    session_id, seq = sessions.parse_event_id(
+        request.headers.get("Last-Event-ID") or request.args.get("last_event_id"))
+    session = sessions.manager.get(session_id) if session_id else None
+    return (session_id, session, seq) if session else (session_id, None, -1)
 
-        return Response(stream_sdc(message_text, blocks), mimetype="text/event-stream")
+def too_many_sessions(e):
+    return jsonify({"error": f"Too many transmissions in progress: {str(e)}"}), 429
 
+# GET for EventSource. A browser reconnecting after a dropped connection
+# sends Last-Event-ID and continues its original session instead of
+# starting the transmission again. The Flask route holds a server thread
+# per open stream; the asyncio server (sessions.py) does not.
+@bp.route("/sdc/send-stream", methods=["GET"])
+def sdc_send_stream():
+    session_id, session, after = resume_point()
+    if session is not None:
+        return sse_response(session, after)
+    if session_id is not None:
+        # the session expired; 204 stops the EventSource instead of sending again
+        return Response(status=204)
+    try:
+        return sse_response(start_session(request.args))
+    except sessions.SessionLimitError as e:
+        return too_many_sessions(e)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Starts a transmission without holding a connection open; any number of
+# clients can then follow it from events_url (or the asyncio server).
+@bp.route("/sdc/sessions", methods=["POST"])
+def create_session():
+    try:
+        session = start_session(request.get_json(silent=True) or {})
+    except sessions.SessionLimitError as e:
+        return too_many_sessions(e)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid payload: {str(e)}"}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+    status = session.status()
+    status["events_url"] = f"/sdc/sessions/{session.id}/events"
+    status["sse_port"] = sessions.SDC_SSE_PORT
+    return jsonify(status), 201
+
+@bp.route("/sdc/sessions/<session_id>", methods=["GET"])
+def session_status(session_id):
+    session = sessions.manager.get(session_id)
+    if session is None:
+        return jsonify({"error": f"No session {session_id}"}), 404
+    return jsonify(session.status())
+
+@bp.route("/sdc/sessions/<session_id>/events", methods=["GET"])
+def session_events(session_id):
+    session = sessions.manager.get(session_id)
+    if session is None:
+        return jsonify({"error": f"No session {session_id}"}), 404
+    _, resumed, after = resume_point()
+    return sse_response(session, after if resumed is session else -1)
 
 # -----------------------
-# Run Flask
+# Startup / Run Flask
 # -----------------------
+def preload():
+    """Imports the runtime client and connects to IBM Quantum (used by --preload)."""
+    startup.preload_modules(["qiskit_ibm_runtime", "qiskit.transpiler.preset_passmanagers"])
+    runtime = get_runtime()
+    # The stream only ever sends these four circuits; compile them up front
+    for block in ("00", "01", "10", "11"):
+        services.transpile(runtime, sdc_circuit_for_2bits(block))
+
+def create_app():
+    return services.create_app(__name__, bp)
+
+app = create_app()
+
 if __name__ == "__main__":
+    args = startup.parse_args("IBM Cloud SDC streaming backend", sys.argv[1:])
+    if args.preload:
+        preload()
+    else:
+        warm_runtime_in_background()
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":  # the reloader's serving child only
+        sessions.manager.start_sse_server("0.0.0.0", sessions.SDC_SSE_PORT)
     app.run(host="0.0.0.0", port=5003, debug=True)
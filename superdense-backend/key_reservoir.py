@@ -0,0 +1,198 @@
+# key_reservoir.py
+# ====================================================
+# Background QKD key reservoir.
+#
+# A producer thread keeps running QKD batches until the reservoir holds
+# `high_water` sifted bits, so requests draw key material in O(1) instead of
+# looping e91_qkd inside the request. Drawn bits are removed from the
+# reservoir, so every bit is issued exactly once (one-time-pad semantics).
+# Each stored segment remembers the batch it came from and that batch's QBER.
+# Bits are held bit-packed as KeyBits.
+# ====================================================
+
+import itertools
+import numbers
+import threading
+import time
+import weakref
+from collections import deque
+
+import metrics
+from keybits import KeyBits
+
+_reservoirs = weakref.WeakSet()
+
+
+def _per_reservoir(read):
+    return lambda: {(r.name,): read(r) for r in list(_reservoirs)}
+
+
+FILL = metrics.register(metrics.Gauge(
+    "sdc_key_reservoir_fill_bits", "Sifted key bits currently held in the reservoir.", ["reservoir"],
+    fn=_per_reservoir(lambda r: r._fill)))
+RATE = metrics.register(metrics.Gauge(
+    "sdc_key_reservoir_generation_rate_bps", "Recent sifted key generation rate (bits/s).", ["reservoir"],
+    fn=_per_reservoir(lambda r: r.rate_bps)))
+GENERATED = metrics.register(metrics.Counter(
+    "sdc_key_reservoir_bits_generated_total", "Sifted key bits added to the reservoir.", ["reservoir"]))
+ISSUED = metrics.register(metrics.Counter(
+    "sdc_key_reservoir_bits_issued_total", "Key bits handed out to requests.", ["reservoir"]))
+BATCH_QBER = metrics.register(metrics.Histogram(
+    "sdc_key_reservoir_batch_qber", "QBER of each generated batch.", ["reservoir"],
+    buckets=(0.01, 0.02, 0.05, 0.08, 0.11, 0.15, 0.25, 0.5, 1.0)))
+
+
+class KeyReservoir:
+    """Thread-safe store of sifted key bits refilled by a background producer.
+
+    `generate_batch()` must return a dict with "qkd_key" (KeyBits or a '0'/'1'
+    string), "qber" and "secure", e.g. application.distill_key_block.
+    """
+
+    def __init__(self, generate_batch, high_water=4096, name="qkd"):
+        self.generate_batch = generate_batch
+        self.high_water = high_water
+        self.name = name
+
+        self._segments = deque()          # [batch_id, qber, secure, bits]
+        self._fill = 0
+        self._demand = 0                  # bits a blocked drawer is waiting for
+        self._cond = threading.Condition()
+        self._draw_lock = threading.Lock()  # one drawer at a time keeps draws contiguous
+        self._batch_ids = itertools.count(1)
+        self._thread = None
+        self._stopping = False
+        self._last_error = None
+
+        self.bits_generated = 0
+        self.bits_issued = 0
+        self.batches = 0
+        self.rate_bps = 0.0               # exponential moving average of generation rate
+        _reservoirs.add(self)
+
+    # ------------------------------------------------
+    # Producer
+    # ------------------------------------------------
+    def start(self):
+        """Starts the producer thread if it is not already running."""
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping = False
+                self._thread = threading.Thread(target=self._produce, name=f"{self.name}-reservoir", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def _produce(self):
+        while True:
+            with self._cond:
+                while self._fill >= max(self.high_water, self._demand) and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+
+            started = time.perf_counter()
+            try:
+                batch = self.generate_batch()
+            except Exception as e:
+                self._last_error = e
+                time.sleep(1.0)
+                continue
+            elapsed = time.perf_counter() - started
+
+            bits = KeyBits.coerce(batch.get("qkd_key", ""))
+            with self._cond:
+                self.batches += 1
+                BATCH_QBER.observe(batch["qber"], self.name)
+                if bits:
+                    self._segments.append([next(self._batch_ids), batch["qber"], batch["secure"], bits])
+                    self._fill += len(bits)
+                    self.bits_generated += len(bits)
+                    GENERATED.inc(self.name, amount=len(bits))
+                if elapsed > 0:
+                    sample = len(bits) / elapsed
+                    self.rate_bps = sample if self.batches == 1 else 0.8 * self.rate_bps + 0.2 * sample
+                self._cond.notify_all()
+
+    # ------------------------------------------------
+    # Consumer
+    # ------------------------------------------------
+    def draw(self, n_bits, timeout=30.0):
+        """Removes and returns the next `n_bits` key bits.
+
+        Returns {"qkd_key": KeyBits, "qber", "secure", "batches"} where "qber" is the
+        bit-weighted QBER of the batches the bits came from and "batches"
+        lists (batch_id, qber, bits_taken). Raises TimeoutError if the
+        reservoir cannot supply the bits in time; nothing is consumed then,
+        and ValueError unless `n_bits` is a non-negative integer.
+        """
+        if not isinstance(n_bits, numbers.Integral) or isinstance(n_bits, bool) or n_bits < 0:
+            raise ValueError(f"Cannot draw {n_bits!r} key bits")
+        n_bits = int(n_bits)
+        self.start()
+        deadline = time.monotonic() + timeout
+        if not self._draw_lock.acquire(timeout=timeout):
+            raise TimeoutError("Key reservoir is busy serving another draw")
+        try:
+            with self._cond:
+                return self._take(n_bits, deadline)
+        finally:
+            self._draw_lock.release()
+
+    def _take(self, n_bits, deadline):
+        # called with _draw_lock and _cond held
+        try:
+            while self._fill < n_bits:
+                # lets the producer run past the high-water mark for large draws
+                self._demand = n_bits
+                self._cond.notify_all()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Key reservoir has {self._fill} of {n_bits} requested bits"
+                        + (f" (last error: {self._last_error})" if self._last_error else ""))
+                self._cond.wait(remaining)
+        finally:
+            self._demand = 0
+
+        taken, used = [], []
+        needed = n_bits
+        while needed:
+            segment = self._segments[0]
+            batch_id, qber, secure, bits = segment
+            chunk = bits[:needed]
+            if len(chunk) == len(bits):
+                self._segments.popleft()
+            else:
+                segment[3] = bits[len(chunk):]
+            taken.append(chunk)
+            used.append((batch_id, qber, secure, len(chunk)))
+            needed -= len(chunk)
+
+        self._fill -= n_bits
+        self.bits_issued += n_bits
+        ISSUED.inc(self.name, amount=n_bits)
+        self._cond.notify_all()
+
+        weighted_qber = sum(qber * count for _, qber, _, count in used) / n_bits if n_bits else 0.0
+        return {
+            "qkd_key": KeyBits.concat(taken),
+            "qber": weighted_qber,
+            "secure": all(secure for _, _, secure, _ in used),
+            "batches": [{"batch_id": b, "qber": q, "bits": c} for b, q, _, c in used],
+        }
+
+    def stats(self):
+        with self._cond:
+            return {
+                "fill_bits": self._fill,
+                "high_water": self.high_water,
+                "bits_generated": self.bits_generated,
+                "bits_issued": self.bits_issued,
+                "batches": self.batches,
+                "generation_rate_bps": self.rate_bps,
+                "running": self._thread is not None and self._thread.is_alive(),
+            }
@@ -0,0 +1,134 @@
+# keybits.py
+# ====================================================
+# Bit-packed key material.
+#
+# KeyBits stores a bit string in a NumPy uint8 array (8 bits per byte, MSB
+# first, as np.packbits does) plus its bit length. Bits past the length in
+# the last byte are always zero, so equality and XOR work byte-wise.
+# ====================================================
+
+import numpy as np
+
+# popcount of every byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+
+
+class KeyBits:
+    """Immutable, bit-packed sequence of key bits."""
+
+    __slots__ = ("packed", "length")
+
+    def __init__(self, packed, length):
+        self.packed = np.asarray(packed, dtype=np.uint8)
+        self.length = int(length)
+
+    # ------------------------------------------------
+    # Construction
+    # ------------------------------------------------
+    @classmethod
+    def from_bits(cls, bits):
+        """Packs an array-like of 0/1 values."""
+        bits = np.asarray(bits, dtype=np.uint8)
+        return cls(np.packbits(bits), bits.size)
+
+    @classmethod
+    def from_string(cls, text):
+        """Packs a string of '0'/'1' characters."""
+        bits = np.frombuffer(text.encode("ascii"), dtype=np.uint8) - ord("0")
+        if bits.size and bits.max() > 1:
+            raise ValueError("Key string may only contain '0' and '1'")
+        return cls.from_bits(bits)
+
+    @classmethod
+    def from_bytes(cls, data, length=None):
+        """Wraps raw bytes; `length` trims to fewer than 8 * len(data) bits."""
+        packed = np.frombuffer(bytes(data), dtype=np.uint8).copy()
+        key = cls(packed, packed.size * 8)
+        return key if length is None else key[:length]
+
+    @classmethod
+    def coerce(cls, value):
+        """Accepts KeyBits or a '0'/'1' string (as sent by the frontend)."""
+        return value if isinstance(value, cls) else cls.from_string(str(value))
+
+    @classmethod
+    def random(cls, length, rng=None):
+        rng = np.random.default_rng(rng)
+        packed = rng.integers(0, 256, size=(length + 7) // 8, dtype=np.uint8)
+        return cls(_mask_tail(packed, length), length)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0, dtype=np.uint8), 0)
+
+    @classmethod
+    def concat(cls, parts):
+        parts = [p for p in parts if p.length]
+        if not parts:
+            return cls.empty()
+        if all(p.length % 8 == 0 for p in parts[:-1]):
+            # byte-aligned: no need to unpack
+            return cls(np.concatenate([p.packed for p in parts]), sum(p.length for p in parts))
+        return cls.from_bits(np.concatenate([p.to_bits() for p in parts]))
+
+    # ------------------------------------------------
+    # Conversion
+    # ------------------------------------------------
+    def to_bits(self):
+        """Unpacks to a uint8 array of 0/1 values."""
+        return np.unpackbits(self.packed, count=self.length)
+
+    def to_string(self):
+        return (self.to_bits() + ord("0")).tobytes().decode("ascii")
+
+    def to_bytes(self):
+        return self.packed.tobytes()
+
+    # ------------------------------------------------
+    # Operations
+    # ------------------------------------------------
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step == 1 and start % 8 == 0:
+                length = max(0, stop - start)
+                packed = self.packed[start // 8:(start + length + 7) // 8].copy()
+                return KeyBits(_mask_tail(packed, length), length)
+            return KeyBits.from_bits(self.to_bits()[key])
+        index = range(self.length)[key]
+        return int(self.packed[index // 8] >> (7 - index % 8)) & 1
+
+    def __xor__(self, other):
+        other = KeyBits.coerce(other)
+        if other.length != self.length:
+            raise ValueError(f"Cannot XOR keys of {self.length} and {other.length} bits")
+        return KeyBits(self.packed ^ other.packed, self.length)
+
+    def __eq__(self, other):
+        if not isinstance(other, KeyBits):
+            return NotImplemented
+        return self.length == other.length and np.array_equal(self.packed, other.packed)
+
+    def __hash__(self):
+        return hash((self.length, self.packed.tobytes()))
+
+    def count_ones(self):
+        return int(_POPCOUNT[self.packed].sum(dtype=np.int64))
+
+    def hamming_distance(self, other):
+        return (self ^ other).count_ones()
+
+    def __repr__(self):
+        preview = self[:32].to_string()
+        return f"KeyBits({preview}{'...' if self.length > 32 else ''}, length={self.length})"
+
+
+def _mask_tail(packed, length):
+    """Zeroes the padding bits after `length` in the last byte (in place)."""
+    remainder = length % 8
+    if remainder and packed.size:
+        packed[-1] &= (0xFF << (8 - remainder)) & 0xFF
+    return packed
@@ -0,0 +1,197 @@
+# metrics.py
+# ====================================================
+# Lightweight per-stage timing instrumentation.
+#
+#   with timed("simulate"):          # or @timed("simulate") on a function
+#       backend.run(...)
+#
+# Every measurement feeds a Prometheus histogram (served on /metrics) and,
+# while a Flask request is active, is added to that request's
+# Server-Timing response header.
+# ====================================================
+
+import bisect
+import threading
+import time
+from contextlib import ContextDecorator
+
+from flask import Blueprint, Response, g, has_request_context, jsonify, request
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+# ----------------------------------------------------
+# Metric types
+# ----------------------------------------------------
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for labels, (bucket_counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+                    for labels, value in sorted(self._values.items())]
+
+
+class Gauge:
+    """Point-in-time value, either set explicitly or read from `fn` at scrape time.
+
+    With labelnames, `fn` returns {label values tuple: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames=(), fn=None):
+        self.name, self.help, self.labelnames, self.fn = name, help, tuple(labelnames), fn
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        if self.labelnames:
+            return [f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+                    for labels, value in sorted(self.fn().items())]
+        return [f"{self.name} {self.fn() if self.fn else self.value}"]
+
+
+REGISTRY = []
+
+
+def register(metric):
+    """Adds `metric` to the /metrics output and returns it."""
+    REGISTRY.append(metric)
+    return metric
+
+
+def render_prometheus():
+    """Renders every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+STAGE_SECONDS = register(Histogram(
+    "sdc_stage_duration_seconds", "Time spent in an instrumented request stage.", ["stage"]))
+REQUEST_SECONDS = register(Histogram(
+    "sdc_request_duration_seconds", "End-to-end Flask request handling time.", ["endpoint", "status"]))
+
+
+# ----------------------------------------------------
+# Stage timer
+# ----------------------------------------------------
+class timed(ContextDecorator):
+    """Times a block or function as `stage`; usable as context manager or decorator."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._local = threading.local()
+
+    def __enter__(self):
+        # a thread-local stack keeps the decorator form safe under recursion and threads
+        stack = getattr(self._local, "starts", None)
+        if stack is None:
+            stack = self._local.starts = []
+        stack.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._local.starts.pop()
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        if has_request_context():
+            stages = g.setdefault("stage_timings", {})
+            stages[self.stage] = stages.get(self.stage, 0.0) + elapsed
+        return False
+
+
+def timed_jsonify(*args, **kwargs):
+    """jsonify() with its serialization cost recorded as the json_serialize stage."""
+    with timed("json_serialize"):
+        return jsonify(*args, **kwargs)
+
+
+# ----------------------------------------------------
+# Flask integration
+# ----------------------------------------------------
+bp = Blueprint("metrics", __name__)
+
+
+@bp.before_app_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@bp.after_app_request
+def _add_server_timing(response):
+    started = g.get("request_started")
+    if started is None:
+        return response
+    total = time.perf_counter() - started
+    REQUEST_SECONDS.observe(total, request.endpoint or "unknown", str(response.status_code))
+
+    entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in g.get("stage_timings", {}).items()]
+    entries.append(f"total;dur={total * 1000:.2f}")
+    response.headers["Server-Timing"] = ", ".join(entries)
+    return response
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,138 @@
+# payload_codec.py
+# ====================================================
+# Codecs turning an aircraft reading (latitude, longitude, restricted flag)
+# into the '0'/'1' string sent over superdense coding, and back.
+#
+#   text   UTF-8 text "lat,lon,flag" (8 bits per character, ~160 bits)
+#   fixed  fixed-point lat/lon at `precision` decimal places, a 1-bit
+#          restricted flag and an optional CRC-8 (60 bits at precision 5)
+#
+# Every SDC round carries two bits, so the fixed codec needs well under half
+# the quantum rounds (and hardware jobs) of the text codec.
+# ====================================================
+
+
+def text_to_bits(text: str) -> str:
+    return ''.join(f"{b:08b}" for b in text.encode('utf-8'))
+
+def bits_to_text(bits: str) -> str:
+    bits_trimmed = bits[:(len(bits) // 8) * 8]
+    if not bits_trimmed:
+        return ""
+    bytes_list = [int(bits_trimmed[i:i+8], 2) for i in range(0, len(bits_trimmed), 8)]
+    return bytes(bytes_list).decode('utf-8', errors='replace')
+
+def crc8(bits: str, poly=0x07) -> str:
+    """CRC-8 (polynomial x^8 + x^2 + x + 1) of a '0'/'1' string, as 8 bits."""
+    crc = 0
+    for bit in bits:
+        crc ^= (bit == "1") << 7
+        crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return f"{crc:08b}"
+
+def restricted_flag(value) -> bool:
+    """Accepts 1/0, "1"/"0", "Yes"/"No" or a bool."""
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "yes", "true", "y")
+    return bool(value)
+
+
+class PayloadCodec:
+    """Maps a reading to a '0'/'1' string and back.
+
+    decode() returns {"latitude", "longitude", "restricted", "text", "valid"};
+    "valid" is False when the bits cannot be parsed or fail their check.
+    """
+
+    name = None
+
+    def encode(self, latitude, longitude, restricted) -> str:
+        raise NotImplementedError
+
+    def decode(self, bits: str) -> dict:
+        raise NotImplementedError
+
+    def describe(self) -> dict:
+        return {"name": self.name}
+
+
+class TextCodec(PayloadCodec):
+    """The original encoding: the reading as UTF-8 text."""
+
+    name = "text"
+
+    def encode(self, latitude, longitude, restricted):
+        return text_to_bits(f"{latitude},{longitude},{int(restricted_flag(restricted))}")
+
+    def decode(self, bits):
+        text = bits_to_text(bits)
+        try:
+            latitude, longitude, flag = text.split(",")
+            return {"latitude": float(latitude), "longitude": float(longitude),
+                    "restricted": flag == "1", "text": text, "valid": flag in ("0", "1")}
+        except ValueError:
+            return {"latitude": None, "longitude": None, "restricted": None, "text": text, "valid": False}
+
+
+class FixedPointCodec(PayloadCodec):
+    """Fixed-point lat/lon with `precision` decimal places, a flag bit and an optional CRC-8."""
+
+    name = "fixed"
+
+    def __init__(self, precision=5, crc=True):
+        if not 0 <= precision <= 9:
+            raise ValueError("precision must be between 0 and 9 decimal places")
+        self.precision = precision
+        self.crc = crc
+        self.scale = 10 ** precision
+        self.lat_bits = (180 * self.scale).bit_length()
+        self.lon_bits = (360 * self.scale).bit_length()
+        self.bit_length = self.lat_bits + self.lon_bits + 1 + (8 if crc else 0)
+
+    def _quantize(self, value, offset, span):
+        value = float(value)
+        if not -offset <= value <= span - offset:
+            raise ValueError(f"{value} is outside [{-offset}, {span - offset}]")
+        return round((value + offset) * self.scale)
+
+    def encode(self, latitude, longitude, restricted):
+        lat = self._quantize(latitude, 90, 180)
+        lon = self._quantize(longitude, 180, 360)
+        bits = f"{lat:0{self.lat_bits}b}{lon:0{self.lon_bits}b}{int(restricted_flag(restricted))}"
+        return bits + crc8(bits) if self.crc else bits
+
+    def decode(self, bits):
+        if len(bits) < self.bit_length:
+            return {"latitude": None, "longitude": None, "restricted": None, "text": "", "valid": False}
+        body_len = self.lat_bits + self.lon_bits + 1
+        body = bits[:body_len]
+        lat = int(body[:self.lat_bits], 2)
+        lon = int(body[self.lat_bits:body_len - 1], 2)
+        latitude, longitude = lat / self.scale - 90, lon / self.scale - 180
+        restricted = body[-1] == "1"
+
+        valid = lat <= 180 * self.scale and lon <= 360 * self.scale
+        if self.crc:
+            valid = valid and crc8(body) == bits[body_len:self.bit_length]
+        p = self.precision
+        return {
+            "latitude": round(latitude, p),
+            "longitude": round(longitude, p),
+            "restricted": restricted,
+            "text": f"{latitude:.{p}f},{longitude:.{p}f},{int(restricted)}",
+            "valid": valid,
+        }
+
+    def describe(self):
+        return {"name": self.name, "precision": self.precision, "crc": self.crc, "bits": self.bit_length}
+
+
+CODECS = {codec.name: codec for codec in (TextCodec, FixedPointCodec)}
+
+
+def get_codec(name="fixed", **options):
+    """Builds the codec registered as `name`, e.g. get_codec("fixed", precision=4)."""
+    try:
+        return CODECS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown payload codec '{name}' (available: {', '.join(CODECS)})") from None
@@ -0,0 +1,200 @@
+# postprocessing.py
+# ====================================================
+# Vectorized classical post-processing for QKD keys held as KeyBits:
+#
+#   1. estimate_qber       reveal a random sample, estimate QBER + upper bound
+#   2. cascade_reconcile   Cascade-style parity reconciliation of Bob's key
+#   3. privacy_amplify     Toeplitz hashing, computed as an FFT convolution
+#
+# distill() chains the three, so multi-megabit sifted keys can be turned into
+# final key material with NumPy instead of per-bit Python loops.
+# ====================================================
+
+import math
+
+import numpy as np
+
+from keybits import KeyBits
+
+QBER_THRESHOLD = 0.11
+
+
+def binary_entropy(p):
+    if p <= 0 or p >= 1:
+        return 0.0
+    return -p * math.log2(p) - (1 - p) * math.log2(1 - p)
+
+
+# ----------------------------------------------------
+# 1. Parameter estimation
+# ----------------------------------------------------
+def estimate_qber(alice, bob, sample_fraction=0.1, epsilon=1e-6, rng=None):
+    """Estimates the QBER from a random sample of positions.
+
+    The sampled bits are public after comparison, so they are removed from
+    both keys. Returns {"qber", "qber_upper", "sample_bits", "alice", "bob"}
+    where "qber_upper" is a Hoeffding bound holding with probability 1 - epsilon.
+    """
+    rng = np.random.default_rng(rng)
+    n = len(alice)
+    a, b = alice.to_bits(), bob.to_bits()
+    k = min(n, max(1, int(round(n * sample_fraction)))) if n else 0
+
+    order = rng.permutation(n)
+    sample, keep = order[:k], np.sort(order[k:])
+    errors = int(np.count_nonzero(a[sample] != b[sample]))
+    qber = errors / k if k else 1.0
+    margin = math.sqrt(math.log(1 / epsilon) / (2 * k)) if k else 1.0
+    return {
+        "qber": qber,
+        "qber_upper": min(1.0, qber + margin),
+        "sample_bits": k,
+        "alice": KeyBits.from_bits(a[keep]),
+        "bob": KeyBits.from_bits(b[keep]),
+    }
+
+
+# ----------------------------------------------------
+# 2. Information reconciliation (Cascade-style)
+# ----------------------------------------------------
+def _correct_odd_blocks(a, b, perm, block_size):
+    """Runs BINARY on every block of `perm` whose parities differ.
+
+    All odd blocks are bisected together: each level compares the parity of
+    the left halves using one prefix-XOR array. Flips one bit of `b` per odd
+    block in place and returns (bits_flipped, parities_disclosed).
+    """
+    diff = a[perm] ^ b[perm]
+    prefix = np.zeros(diff.size + 1, dtype=np.uint8)
+    np.bitwise_xor.accumulate(diff, out=prefix[1:])
+
+    starts = np.arange(0, diff.size, block_size)
+    ends = np.minimum(starts + block_size, diff.size)
+    odd = (prefix[ends] ^ prefix[starts]).astype(bool)
+    lo, hi = starts[odd], ends[odd]
+
+    disclosed = 0
+    while lo.size:
+        active = hi - lo > 1
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        left_odd = (prefix[mid] ^ prefix[lo]).astype(bool)
+        disclosed += int(active.sum())
+        lo, hi = np.where(active & ~left_odd, mid, lo), np.where(active & left_odd, mid, hi)
+
+    b[perm[lo]] ^= 1
+    return int(lo.size), disclosed
+
+
+def cascade_reconcile(alice, bob, qber, passes=4, rng=None):
+    """Corrects Bob's key towards Alice's with Cascade-style parity passes.
+
+    Pass i shuffles the key with a fresh public permutation and doubles the
+    block size (starting at 0.73 / qber). After any correction, every earlier
+    pass is re-checked, which is what lets Cascade catch even error counts.
+    Returns {"bob", "corrected_bits", "leaked_bits"}.
+    """
+    rng = np.random.default_rng(rng)
+    a, b = alice.to_bits(), bob.to_bits().copy()
+    n = a.size
+    if n == 0:
+        return {"bob": bob, "corrected_bits": 0, "leaked_bits": 0}
+
+    first_block = int(min(n, max(4, round(0.73 / max(qber, 1e-3)))))
+    schedule, corrected, leaked = [], 0, 0
+    for i in range(passes):
+        block_size = min(n, first_block << i)
+        perm = np.arange(n) if i == 0 else rng.permutation(n)
+        schedule.append((perm, block_size))
+        leaked += -(-n // block_size)  # Alice announces one parity per block
+
+        while True:
+            flipped = 0
+            for pass_perm, pass_block in schedule:
+                fixed, disclosed = _correct_odd_blocks(a, b, pass_perm, pass_block)
+                flipped += fixed
+                leaked += disclosed
+            corrected += flipped
+            if not flipped:
+                break
+
+    return {"bob": KeyBits.from_bits(b), "corrected_bits": corrected, "leaked_bits": leaked}
+
+
+# ----------------------------------------------------
+# 3. Privacy amplification
+# ----------------------------------------------------
+def toeplitz_hash(key, out_bits, seed):
+    """Multiplies `key` by the Toeplitz matrix defined by `seed` over GF(2).
+
+    `seed` must hold out_bits + len(key) - 1 bits. Row i of the matrix is
+    seed[i : i + n] reversed, so the product is a linear convolution that
+    NumPy's real FFT evaluates in O(n log n).
+    """
+    n = len(key)
+    if out_bits <= 0 or n == 0:
+        return KeyBits.empty()
+    if len(seed) != out_bits + n - 1:
+        raise ValueError(f"Toeplitz seed needs {out_bits + n - 1} bits, got {len(seed)}")
+
+    x = key.to_bits().astype(np.float64)
+    t = seed.to_bits().astype(np.float64)
+    size = 1 << (out_bits + 2 * n - 2).bit_length()
+    conv = np.fft.irfft(np.fft.rfft(t, size) * np.fft.rfft(x, size), size)[n - 1:n - 1 + out_bits]
+    return KeyBits.from_bits(np.rint(conv).astype(np.int64) & 1)
+
+
+def secure_length(n, qber_upper, leaked_bits, epsilon_pa=1e-10):
+    """Final key length left after removing Eve's possible information."""
+    length = n * (1 - binary_entropy(qber_upper)) - leaked_bits - 2 * math.log2(1 / epsilon_pa)
+    return max(0, int(length))
+
+
+def privacy_amplify(alice, bob, qber_upper, leaked_bits, epsilon_pa=1e-10, rng=None):
+    """Hashes both reconciled keys with the same public random Toeplitz seed."""
+    rng = np.random.default_rng(rng)
+    out_bits = secure_length(len(alice), qber_upper, leaked_bits, epsilon_pa)
+    if out_bits == 0:
+        return KeyBits.empty(), KeyBits.empty()
+    seed = KeyBits.random(out_bits + len(alice) - 1, rng)
+    return toeplitz_hash(alice, out_bits, seed), toeplitz_hash(bob, out_bits, seed)
+
+
+# ----------------------------------------------------
+# Pipeline
+# ----------------------------------------------------
+def distill(alice, bob, sample_fraction=0.1, passes=4, epsilon=1e-6, threshold=QBER_THRESHOLD, rng=None):
+    """Estimates QBER, reconciles and privacy-amplifies a sifted key pair.
+
+    Returns {"key", "qber", "qber_upper", "secure", "sifted_bits",
+    "sample_bits", "corrected_bits", "leaked_bits", "final_bits"}. "key" is
+    empty when the QBER estimate reaches `threshold`, when nothing survives
+    privacy amplification, or when reconciliation left the keys different.
+    """
+    rng = np.random.default_rng(rng)
+    estimate = estimate_qber(alice, bob, sample_fraction, epsilon, rng)
+    report = {
+        "qber": estimate["qber"],
+        "qber_upper": estimate["qber_upper"],
+        "sifted_bits": len(alice),
+        "sample_bits": estimate["sample_bits"],
+        "corrected_bits": 0,
+        "leaked_bits": 0,
+    }
+    if estimate["qber"] >= threshold:
+        return dict(report, key=KeyBits.empty(), secure=False, final_bits=0)
+
+    reconciled = cascade_reconcile(estimate["alice"], estimate["bob"], estimate["qber"], passes, rng)
+    final_alice, final_bob = privacy_amplify(
+        estimate["alice"], reconciled["bob"], estimate["qber_upper"], reconciled["leaked_bits"], rng=rng)
+
+    secure = len(final_alice) > 0 and final_alice == final_bob
+    return dict(
+        report,
+        corrected_bits=reconciled["corrected_bits"],
+        leaked_bits=reconciled["leaked_bits"],
+        key=final_alice if secure else KeyBits.empty(),
+        secure=secure,
+        final_bits=len(final_alice) if secure else 0,
+    )
@@ -0,0 +1,189 @@
+# profiling.py
+# ====================================================
+# Opt-in profiling of individual requests.
+#
+# A request is profiled with cProfile when it carries the configured secret,
+# either as an `X-Profile` header or a `?profile=` query parameter:
+#
+#   curl -H "X-Profile: $PROFILE_SECRET" -X POST localhost:5001/full-simulation ...
+#
+# The response gets an `X-Profile-Id` header; the saved .pstats file can then
+# be fetched from the admin endpoints (same secret required):
+#
+#   GET /admin/profiles                      list stored profiles
+#   GET /admin/profiles/<id>                 download the .pstats file
+#   GET /admin/profiles/<id>?format=text     top functions by cumulative time
+#
+# Configuration (environment):
+#   PROFILE_SECRET          enables profiling; unset means disabled
+#   PROFILE_DIR             where profiles are written (default ./profiles)
+#   PROFILE_MAX_CONCURRENT  requests profiled at the same time (default 1)
+#   PROFILE_MAX_PER_MINUTE  profiled requests per rolling minute (default 6)
+#   PROFILE_KEEP            number of profile files retained (default 50)
+# ====================================================
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from collections import deque
+
+from flask import Blueprint, abort, g, jsonify, request, send_file
+
+PROFILE_SECRET = os.getenv("PROFILE_SECRET", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+PROFILE_MAX_CONCURRENT = int(os.getenv("PROFILE_MAX_CONCURRENT", "1"))
+PROFILE_MAX_PER_MINUTE = int(os.getenv("PROFILE_MAX_PER_MINUTE", "6"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+# ----------------------------------------------------
+# Budget
+# ----------------------------------------------------
+class ProfileBudget:
+    """Caps concurrent profiles and profiles started per rolling minute."""
+
+    def __init__(self, max_concurrent, max_per_minute):
+        self.max_concurrent = max_concurrent
+        self.max_per_minute = max_per_minute
+        self._active = 0
+        self._started = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._started and now - self._started[0] > 60:
+                self._started.popleft()
+            if self._active >= self.max_concurrent or len(self._started) >= self.max_per_minute:
+                return False
+            self._active += 1
+            self._started.append(now)
+            return True
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+
+budget = ProfileBudget(PROFILE_MAX_CONCURRENT, PROFILE_MAX_PER_MINUTE)
+
+
+def _authorized(token):
+    return bool(PROFILE_SECRET) and bool(token) and hmac.compare_digest(token, PROFILE_SECRET)
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0  # already pruned by a concurrent request
+
+
+def _prune():
+    files = sorted(
+        (os.path.join(PROFILE_DIR, f) for f in os.listdir(PROFILE_DIR) if f.endswith(".pstats")),
+        key=_mtime,
+    )
+    for path in files[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else files:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ----------------------------------------------------
+# Flask integration
+# ----------------------------------------------------
+bp = Blueprint("profiling", __name__)
+
+
+@bp.before_app_request
+def _maybe_start_profile():
+    token = request.headers.get("X-Profile") or request.args.get("profile")
+    if not token or not _authorized(token) or not budget.acquire():
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # another profiler is already active in this interpreter
+        budget.release()
+        return
+    g.profiler = profiler
+    g.profile_id = uuid.uuid4().hex
+
+
+@bp.after_app_request
+def _finish_profile(response):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.disable()
+    budget.release()
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f"{g.profile_id}.pstats"))
+    _prune()
+    response.headers["X-Profile-Id"] = g.profile_id
+    return response
+
+
+@bp.teardown_app_request
+def _abandon_profile(exc):
+    # after_app_request is skipped when a request fails hard; never leak the slot
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        budget.release()
+
+
+def _require_admin():
+    token = request.headers.get("X-Profile") or request.args.get("profile")
+    if not _authorized(token):
+        abort(403)
+
+
+@bp.route("/admin/profiles", methods=["GET"])
+def list_profiles():
+    _require_admin()
+    if not os.path.isdir(PROFILE_DIR):
+        return jsonify({"profiles": []})
+    profiles = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith(".pstats"):
+            path = os.path.join(PROFILE_DIR, name)
+            profiles.append({
+                "id": name[:-len(".pstats")],
+                "created": os.path.getmtime(path),
+                "size_bytes": os.path.getsize(path),
+            })
+    profiles.sort(key=lambda p: p["created"], reverse=True)
+    return jsonify({"profiles": profiles})
+
+
+@bp.route("/admin/profiles/<profile_id>", methods=["GET"])
+def get_profile(profile_id):
+    _require_admin()
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.pstats")
+    if not PROFILE_ID_RE.match(profile_id) or not os.path.exists(path):
+        return jsonify({"error": "Profile not found"}), 404
+
+    if request.args.get("format") == "text":
+        try:
+            limit = max(1, int(request.args.get("limit", "40")))
+        except ValueError:
+            return jsonify({"error": "Invalid query"}), 400
+        out = io.StringIO()
+        stats = pstats.Stats(path, stream=out)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return out.getvalue(), 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return send_file(path, mimetype="application/octet-stream",
+                     as_attachment=True, download_name=f"{profile_id}.pstats")
@@ -0,0 +1,166 @@
+# result_store.py
+# ====================================================
+# Persistent store of hardware (and simulator) runs.
+#
+# Every IBM job is recorded in a local SQLite database with its circuit
+# hash, backend, shots, job ID and counts. With lookup-before-submit, a run
+# of an identical circuit on the same backend with the same shots, made by
+# the same kind of caller, is answered from disk instead of being queued
+# again. The kind is part of the key because callers store counts in their
+# own bit order (run_simulation in message order, sdc_stream as 'c1c0'),
+# and the same QASM can come from both.
+#
+#   GET /results                  history, newest first
+#                                 (?kind=&backend=&circuit_hash=&limit=&before=)
+#   GET /results/<job_id>         one stored run
+#
+# Configuration (environment):
+#   RESULT_STORE_PATH     database file (default ./results.sqlite3)
+#   RESULT_STORE_REUSE    "1" turns lookup-before-submit on by default
+#   RESULT_STORE_MAX_AGE  seconds a stored run may be reused (default: forever)
+# ====================================================
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from flask import Blueprint, jsonify, request
+
+RESULT_STORE_PATH = os.getenv(
+    "RESULT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.sqlite3"))
+RESULT_STORE_REUSE = os.getenv("RESULT_STORE_REUSE", "0") == "1"
+RESULT_STORE_MAX_AGE = float(os.getenv("RESULT_STORE_MAX_AGE", "0")) or None
+
+HISTORY_MAX_LIMIT = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id       TEXT UNIQUE,
+    kind         TEXT NOT NULL,
+    circuit_hash TEXT NOT NULL,
+    backend      TEXT NOT NULL,
+    shots        INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    counts       TEXT NOT NULL,
+    metadata     TEXT NOT NULL DEFAULT '{}'
+);
+DROP INDEX IF EXISTS runs_lookup;
+CREATE INDEX IF NOT EXISTS runs_kind_lookup ON runs (kind, circuit_hash, backend, shots, created_at);
+CREATE INDEX IF NOT EXISTS runs_created ON runs (created_at);
+"""
+
+
+def circuit_hash(circuit):
+    """SHA-256 of the circuit's OpenQASM 2 text (stable across processes)."""
+    from qiskit import qasm2
+    return hashlib.sha256(qasm2.dumps(circuit).encode("utf-8")).hexdigest()
+
+
+def _row(row):
+    if row is None:
+        return None
+    record = dict(row)
+    record["counts"] = json.loads(record["counts"])
+    record["metadata"] = json.loads(record["metadata"])
+    return record
+
+
+class ResultStore:
+    """Thread-safe wrapper around one SQLite connection."""
+
+    def __init__(self, path=RESULT_STORE_PATH):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        # called with _lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def save(self, kind, circuit_hash, backend, shots, counts, job_id=None, metadata=None):
+        """Records one run; returns its row id."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "INSERT OR REPLACE INTO runs (job_id, kind, circuit_hash, backend, shots, created_at, counts, metadata)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, circuit_hash, backend, int(shots), time.time(),
+                     json.dumps(counts), json.dumps(metadata or {})),
+                )
+            return cursor.lastrowid
+
+    def lookup(self, kind, circuit_hash, backend, shots, max_age=RESULT_STORE_MAX_AGE):
+        """Newest `kind` run of this circuit on `backend` with `shots`, or None."""
+        query = "SELECT * FROM runs WHERE kind = ? AND circuit_hash = ? AND backend = ? AND shots = ?"
+        params = [kind, circuit_hash, backend, int(shots)]
+        if max_age:
+            query += " AND created_at >= ?"
+            params.append(time.time() - max_age)
+        with self._lock:
+            row = self._connect().execute(query + " ORDER BY created_at DESC LIMIT 1", params).fetchone()
+        return _row(row)
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._connect().execute("SELECT * FROM runs WHERE job_id = ?", (job_id,)).fetchone()
+        return _row(row)
+
+    def history(self, kind=None, backend=None, circuit_hash=None, limit=50, before=None):
+        """Runs newest first. `before` is the id cursor returned as "next"."""
+        clauses, params = [], []
+        for column, value in (("kind", kind), ("backend", backend), ("circuit_hash", circuit_hash)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if before is not None:
+            clauses.append("id < ?")
+            params.append(int(before))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        limit = max(1, min(int(limit), HISTORY_MAX_LIMIT))
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT * FROM runs{where} ORDER BY id DESC LIMIT ?", params + [limit + 1]).fetchall()
+        records = [_row(r) for r in rows[:limit]]
+        return {"results": records, "next": records[-1]["id"] if len(rows) > limit else None}
+
+
+store = ResultStore()
+
+
+# ----------------------------------------------------
+# History API
+# ----------------------------------------------------
+bp = Blueprint("result_store", __name__)
+
+
+@bp.route("/results", methods=["GET"])
+def history_route():
+    try:
+        return jsonify(store.history(
+            kind=request.args.get("kind"),
+            backend=request.args.get("backend"),
+            circuit_hash=request.args.get("circuit_hash"),
+            limit=request.args.get("limit", 50),
+            before=request.args.get("before"),
+        ))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query: {str(e)}"}), 400
+
+
+@bp.route("/results/<job_id>", methods=["GET"])
+def job_route(job_id):
+    record = store.get(job_id)
+    if record is None:
+        return jsonify({"error": f"No stored run with job_id {job_id}"}), 404
+    return jsonify(record)
@@ -0,0 +1,79 @@
+# server.py
+# ====================================================
+# Single production server for all four backends.
+#
+# app.py, application.py, aircraft.py and ibm_cloud.py each expose a Flask
+# blueprint. create_app() mounts all of them on one application so they
+# share one copy of Qiskit/matplotlib, the Aer simulator pool and the IBM
+# runtime sessions in services.py. The server listens on the legacy ports
+# 5000-5003 at once, so the frontend's config.js keeps working unchanged.
+# SDC transmission sessions are also served by an asyncio SSE server on
+# --sse-port (see sessions.py).
+#
+#   python server.py --workers 8
+#   python server.py --ports 5000,5001 --host 0.0.0.0 --preload
+#
+# Any WSGI server can host the factory instead, e.g. on Linux:
+#   gunicorn --threads 8 -b :5000 -b :5001 -b :5002 -b :5003 "server:create_app()"
+# ====================================================
+
+import argparse
+import os
+import sys
+
+import app as testing
+import application
+import aircraft
+import ibm_cloud
+import services
+import sessions
+
+DEFAULT_PORTS = "5000,5001,5002,5003"
+BLUEPRINTS = [testing.bp, application.bp, aircraft.bp, ibm_cloud.bp]
+
+
+def create_app():
+    """Application factory mounting every backend blueprint at its original paths."""
+    return services.create_app(__name__, *BLUEPRINTS)
+
+
+def preload():
+    """Warms every backend's deferred imports and external connections."""
+    testing.preload()
+    application.preload()
+    ibm_cloud.preload()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve all SuperDense backends from one process")
+    parser.add_argument("--host", default=os.getenv("SDC_HOST", "127.0.0.1"))
+    parser.add_argument("--ports", default=os.getenv("SDC_PORTS", DEFAULT_PORTS),
+                        help="comma-separated ports to listen on (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SDC_WORKERS", "8")),
+                        help="number of request worker threads (default: %(default)s)")
+    parser.add_argument("--sse-port", type=int, default=sessions.SDC_SSE_PORT,
+                        help="port of the asyncio SSE session server, 0 to disable (default: %(default)s)")
+    parser.add_argument("--preload", action="store_true",
+                        help="import heavy dependencies and connect to IBM Quantum before serving")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    from waitress import serve
+
+    if args.preload:
+        preload()
+    else:
+        ibm_cloud.warm_runtime_in_background()
+
+    listen = " ".join(f"{args.host}:{port.strip()}" for port in args.ports.split(",") if port.strip())
+    aircraft.start_alert_poller()
+    if args.sse_port:
+        sessions.manager.start_sse_server(args.host, args.sse_port)
+    print(f"Serving all backends on {listen} with {args.workers} workers")
+    serve(create_app(), listen=listen, threads=args.workers)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,139 @@
+# services.py
+# ====================================================
+# Process-wide resources shared by every backend blueprint: the Flask app
+# factory, figure encoding, Aer simulators and IBM Quantum runtime sessions. When the blueprints run
+# together under server.py they share these instead of each holding a copy.
+# ====================================================
+
+import io
+import os
+import base64
+import threading
+from collections import namedtuple
+
+from flask import Flask
+
+import metrics
+import profiling
+import result_store
+from metrics import timed
+
+# ----------------------------------------------------
+# Flask application factory
+# ----------------------------------------------------
+def create_app(import_name, *blueprints):
+    """Builds a Flask app from `blueprints` plus the shared /metrics, profiling and /results routes."""
+    app = Flask(import_name)
+    for bp in (*blueprints, metrics.bp, profiling.bp, result_store.bp):
+        app.register_blueprint(bp)
+    return app
+
+
+# ----------------------------------------------------
+# Matplotlib
+# ----------------------------------------------------
+def pyplot():
+    """Imports pyplot on first use with the non-interactive Agg backend."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def fig_to_base64(fig, **savefig_kwargs):
+    """Renders a Matplotlib figure to a base64 PNG string and closes it."""
+    plt = pyplot()
+    buf = io.BytesIO()
+    with timed("figure_render"):
+        fig.savefig(buf, format="png", bbox_inches="tight", **savefig_kwargs)
+        plt.close(fig)
+    with timed("base64_encode"):
+        return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+# ----------------------------------------------------
+# Aer simulator pool
+# ----------------------------------------------------
+# AerSimulator.run() is safe to call from several threads, so one instance per
+# simulation method is shared by all requests.
+_simulators = {}
+_simulators_lock = threading.Lock()
+
+
+def get_simulator(method="automatic"):
+    """Returns the shared AerSimulator for `method`, creating it on first use."""
+    with _simulators_lock:
+        simulator = _simulators.get(method)
+        if simulator is None:
+            from qiskit_aer import AerSimulator
+            simulator = AerSimulator(method=method)
+            _simulators[method] = simulator
+        return simulator
+
+
+# ----------------------------------------------------
+# IBM Quantum runtime sessions
+# ----------------------------------------------------
+Runtime = namedtuple("Runtime", ["service", "backend", "pm", "sampler"])
+TRANSPILE_OPTIMIZATION_LEVEL = int(os.getenv("TRANSPILE_OPTIMIZATION_LEVEL", "1"))
+_runtimes = {}
+_runtimes_lock = threading.Lock()
+
+
+def get_runtime(channel, token=None, instance=None):
+    """Returns the runtime for (channel, instance), connecting on first call.
+
+    Authentication, `least_busy` backend selection and pass-manager
+    construction happen once per process and are reused by every request.
+    Setting IBM_RUNTIME_URL swaps in the fake runtime from fake_services.py.
+    """
+    key = (channel, instance)
+    with _runtimes_lock:
+        runtime = _runtimes.get(key)
+        if runtime is None:
+            if os.getenv("IBM_RUNTIME_URL"):
+                # Local stand-in used by load tests (see fake_services.py)
+                from fake_services import remote_runtime
+                runtime = remote_runtime(os.getenv("IBM_RUNTIME_URL"))
+            else:
+                from qiskit_ibm_runtime import QiskitRuntimeService, SamplerV2 as Sampler
+
+                service = QiskitRuntimeService(channel=channel, token=token, instance=instance)
+                backend = service.least_busy(simulator=False, operational=True)
+                runtime = Runtime(service, backend, build_pass_manager(backend, refresh=False), Sampler(backend))
+            _runtimes[key] = runtime
+        return runtime
+
+
+def build_pass_manager(backend, refresh=True):
+    """Preset pass manager for `backend`'s target, re-fetched from the service first with `refresh`."""
+    from qiskit.transpiler.preset_passmanagers import generate_preset_pass_manager
+
+    if refresh and hasattr(backend, "refresh"):
+        backend.refresh()
+    return generate_preset_pass_manager(backend=backend, optimization_level=TRANSPILE_OPTIMIZATION_LEVEL)
+
+
+def transpile(runtime, circuit):
+    """runtime.pm.run(circuit) through the on-disk cache in transpile_cache.py.
+
+    After a recalibration the cache compiles with a pass manager rebuilt
+    against the refreshed target instead of runtime.pm.
+    """
+    import transpile_cache
+    return transpile_cache.cache.run(runtime.pm, circuit, runtime.backend, TRANSPILE_OPTIMIZATION_LEVEL,
+                                     rebuild=build_pass_manager)
+
+
+def warm_runtime_in_background(channel, token=None, instance=None):
+    """Starts connecting to IBM Quantum without blocking server startup."""
+    def warm():
+        try:
+            runtime = get_runtime(channel, token, instance)
+            print(f"IBM runtime ready on {runtime.backend.name} ({channel})")
+        except Exception as e:
+            print(f"IBM runtime warm-up failed ({channel}), will retry on first request: {e}")
+
+    thread = threading.Thread(target=warm, name=f"ibm-runtime-warmup-{channel}", daemon=True)
+    thread.start()
+    return thread
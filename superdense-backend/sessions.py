@@ -0,0 +1,284 @@
+# sessions.py
+# ====================================================
+# Resumable, multiplexed server-sent-event sessions.
+#
+# A long transmission (e.g. ibm_cloud.stream_sdc) runs as a session on a
+# background asyncio event loop, decoupled from any HTTP connection. Its
+# blocking work runs in a small thread pool; every event it produces is
+# serialized once, numbered and kept in the session log. Any number of
+# clients can subscribe to the same session and replay the log from any
+# point, so a browser that reconnects with Last-Event-ID continues where it
+# left off.
+#
+# Event IDs are "<session id>:<sequence>", which lets a plain EventSource
+# reconnect to its original URL and still land in the right session.
+#
+# Subscribers can be served two ways:
+#   - iter_sse() for the Flask routes (one server thread per open stream)
+#   - the asyncio SSE server started by start_sse_server(), where an idle
+#     stream is only a suspended coroutine:
+#       GET http://<host>:SDC_SSE_PORT/sdc/sessions/<id>/events
+#
+# Configuration (environment):
+#   SDC_SESSION_WORKERS  transmissions running at once (default 8)
+#   SDC_MAX_SESSIONS     transmissions running or queued before create() refuses (default 32)
+#   SDC_SESSION_TTL      seconds a finished session stays replayable (default 600)
+#   SDC_SSE_PORT         port of the asyncio SSE server (default 5004)
+# ====================================================
+
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import metrics
+from metrics import timed
+
+SDC_SESSION_WORKERS = int(os.getenv("SDC_SESSION_WORKERS", "8"))
+SDC_MAX_SESSIONS = int(os.getenv("SDC_MAX_SESSIONS", "32"))
+SDC_SESSION_TTL = float(os.getenv("SDC_SESSION_TTL", "600"))
+SDC_SSE_PORT = int(os.getenv("SDC_SSE_PORT", "5004"))
+HEARTBEAT_SECONDS = 15.0
+
+_END = object()
+
+
+def parse_event_id(value):
+    """Splits "<session>:<seq>" into (session_id, seq); (None, -1) if malformed."""
+    session_id, _, seq = (value or "").partition(":")
+    try:
+        return session_id or None, int(seq)
+    except ValueError:
+        return None, -1
+
+
+class SessionLimitError(RuntimeError):
+    """Raised by SessionManager.create() when too many transmissions are unfinished."""
+
+
+class Session:
+    """Event log of one transmission; appended on the loop, read by any thread."""
+
+    def __init__(self, session_id, kind):
+        self.id = session_id
+        self.kind = kind
+        self.created = time.time()
+        self.finished = None
+        self.events = []            # preformatted SSE frames, index == sequence
+        self.subscribers = 0
+        self._cond = threading.Condition()
+        self._async_waiters = set()  # futures of async subscribers waiting for news
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    def _append(self, frame=None, finished=False):
+        # called on the loop thread
+        with self._cond:
+            if frame is not None:
+                self.events.append(frame)
+            if finished:
+                self.finished = time.time()
+            self._cond.notify_all()
+        for waiter in self._async_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._async_waiters.clear()
+
+    def _subscribe(self, delta):
+        with self._cond:
+            self.subscribers += delta
+
+    def wait(self, seen, timeout):
+        """Blocks until there are more than `seen` events or the session ends."""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self.events) > seen or self.done, timeout)
+
+    async def wait_async(self, seen, timeout):
+        if len(self.events) > seen or self.done:
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._async_waiters.discard(waiter)
+
+    def status(self):
+        return {
+            "session_id": self.id,
+            "kind": self.kind,
+            "events": len(self.events),
+            "done": self.done,
+            "subscribers": self.subscribers,
+            "created": self.created,
+            "finished": self.finished,
+        }
+
+
+class SessionManager:
+    def __init__(self, workers=SDC_SESSION_WORKERS, ttl=SDC_SESSION_TTL, max_sessions=SDC_MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sdc-session")
+        self._loop = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------
+    # Event loop
+    # ------------------------------------------------
+    @property
+    def loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="sdc-sessions", daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._expire(), self._loop)
+            return self._loop
+
+    async def _expire(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.ttl))
+            cutoff = time.time() - self.ttl
+            for session_id, session in list(self.sessions.items()):
+                if session.done and session.finished < cutoff and not session.subscribers:
+                    self.sessions.pop(session_id, None)
+
+    # ------------------------------------------------
+    # Producers
+    # ------------------------------------------------
+    def create(self, producer, kind="sdc"):
+        """Starts a session fed by `producer()`, a generator of JSON-ready dicts.
+
+        Raises SessionLimitError if `max_sessions` sessions are still running or queued.
+        """
+        with self._lock:
+            active = sum(not s.done for s in list(self.sessions.values()))
+            if active >= self.max_sessions:
+                raise SessionLimitError(f"{active} transmissions are already in progress")
+            session = Session(uuid.uuid4().hex[:16], kind)
+            self.sessions[session.id] = session
+        asyncio.run_coroutine_threadsafe(self._run(session, producer), self.loop)
+        return session
+
+    async def _run(self, session, producer):
+        loop = asyncio.get_running_loop()
+        try:
+            events = await loop.run_in_executor(self._executor, producer)
+            while True:
+                event = await loop.run_in_executor(self._executor, next, events, _END)
+                if event is _END:
+                    break
+                session._append(self._frame(session, event))
+        except Exception as e:
+            session._append(self._frame(session, {"error": str(e), "completed": True}))
+        session._append(finished=True)
+
+    @staticmethod
+    def _frame(session, event):
+        with timed("json_serialize"):
+            return f"id: {session.id}:{len(session.events)}\ndata: {json.dumps(event)}\n\n"
+
+    def get(self, session_id):
+        return self.sessions.get(session_id)
+
+    # ------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------
+    def iter_sse(self, session, after=-1):
+        """Blocking SSE frames for `session` from sequence `after` + 1 on."""
+        seen = max(0, after + 1)
+        session._subscribe(1)
+        try:
+            while True:
+                session.wait(seen, HEARTBEAT_SECONDS)
+                if len(session.events) > seen:
+                    frames = session.events[seen:]
+                    seen += len(frames)
+                    yield "".join(frames)
+                elif session.done:
+                    return
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            session._subscribe(-1)
+
+    async def aiter_sse(self, session, after=-1):
+        seen = max(0, after + 1)
+        session._subscribe(1)
+        try:
+            while True:
+                await session.wait_async(seen, HEARTBEAT_SECONDS)
+                if len(session.events) > seen:
+                    frames = session.events[seen:]
+                    seen += len(frames)
+                    yield "".join(frames)
+                elif session.done:
+                    return
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            session._subscribe(-1)
+
+    # ------------------------------------------------
+    # Asyncio SSE server
+    # ------------------------------------------------
+    def start_sse_server(self, host="127.0.0.1", port=SDC_SSE_PORT):
+        """Serves GET /sdc/sessions/<id>/events from the session loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._handle, host, port), self.loop)
+        server = future.result()
+        print(f"Serving SSE sessions on {host}:{port}")
+        return server
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            url = urlsplit(request_line[1] if len(request_line) > 1 else "/")
+            parts = url.path.strip("/").split("/")
+            session = None
+            if len(request_line) > 1 and request_line[0] == "GET" and len(parts) == 4 \
+                    and parts[:2] == ["sdc", "sessions"] and parts[3] == "events":
+                session = self.get(parts[2])
+            if session is None:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+
+            last_id = headers.get("last-event-id") or parse_qs(url.query).get("last_event_id", [""])[0]
+            resumed_id, after = parse_event_id(last_id)
+            if resumed_id != session.id:
+                after = -1
+
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                         b"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n")
+            async for chunk in self.aiter_sse(session, after):
+                writer.write(chunk.encode("utf-8"))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+manager = SessionManager()
+
+metrics.register(metrics.Gauge(
+    "sdc_sse_sessions", "Transmission sessions held (running or replayable).",
+    fn=lambda: len(manager.sessions)))
+metrics.register(metrics.Gauge(
+    "sdc_sse_subscribers", "Clients currently subscribed to a session.",
+    fn=lambda: sum(s.subscribers for s in list(manager.sessions.values()))))
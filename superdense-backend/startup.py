@@ -0,0 +1,155 @@
+# startup.py
+# ====================================================
+# Startup helpers shared by the backends: the --preload flag and an
+# import-time report built on `python -X importtime`.
+#
+#   python startup.py app                 # summarize import cost of app.py
+#   python startup.py ibm_cloud --top 25
+#   python startup.py app --json out.json --baseline importtime_baseline.json
+# ====================================================
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Allowed growth of a package's cumulative import time before the
+# baseline comparison reports a regression.
+REGRESSION_TOLERANCE = 0.20
+# Differences smaller than this are treated as measurement noise.
+NOISE_FLOOR_US = 5000
+
+
+# ----------------------------------------------------
+# --preload flag
+# ----------------------------------------------------
+def parse_args(description, argv=None):
+    """Parses the command line shared by every backend entry point."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--preload",
+        action="store_true",
+        help="import heavy dependencies and connect to external services before serving",
+    )
+    return parser.parse_args(argv)
+
+
+def preload_modules(names):
+    """Imports each module by name and prints how long it took."""
+    for name in names:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        print(f"Preloaded {name} in {time.perf_counter() - start:.2f}s")
+
+
+# ----------------------------------------------------
+# Import-time report
+# ----------------------------------------------------
+def measure_imports(module):
+    """Imports `module` in a fresh interpreter under -X importtime.
+
+    Returns a list of {"module", "self_us", "cumulative_us", "depth"} dicts in
+    the order the interpreter reported them.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr.strip()[-2000:]}")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.lstrip()
+        entries.append({
+            "module": stripped,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            # -X importtime indents nested imports by two spaces per level
+            "depth": (len(name) - len(stripped) - 1) // 2,
+        })
+    return entries
+
+
+def summarize(module, entries, top=15):
+    """Sums self import time per top-level package, largest first."""
+    packages = {}
+    for entry in entries:
+        package = entry["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + entry["self_us"]
+
+    target = next((e for e in reversed(entries) if e["module"] == module), None)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        "module": module,
+        "total_us": target["cumulative_us"] if target else sum(packages.values()),
+        "packages": dict(ranked[:top]),
+    }
+
+
+def compare(summary, baseline):
+    """Returns human-readable regressions of `summary` against `baseline`."""
+    regressions = []
+    pairs = [("total", summary["total_us"], baseline.get("total_us", 0))]
+    pairs += [
+        (name, us, baseline.get("packages", {}).get(name, 0))
+        for name, us in summary["packages"].items()
+    ]
+    for name, current, previous in pairs:
+        if current - previous < NOISE_FLOOR_US:
+            continue
+        if previous and current > previous * (1 + REGRESSION_TOLERANCE):
+            regressions.append(
+                f"{name}: {previous / 1000:.1f}ms -> {current / 1000:.1f}ms "
+                f"(+{(current / previous - 1) * 100:.0f}%)"
+            )
+        elif not previous and name != "total":
+            regressions.append(f"{name}: new import ({current / 1000:.1f}ms)")
+    return regressions
+
+
+def print_summary(summary):
+    print(f"Import time for '{summary['module']}': {summary['total_us'] / 1000:.1f}ms")
+    for name, us in summary["packages"].items():
+        print(f"  {name:<30} {us / 1000:>9.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize -X importtime for a backend module")
+    parser.add_argument("module", help="module to import, e.g. app, application, ibm_cloud")
+    parser.add_argument("--top", type=int, default=15, help="number of packages to list")
+    parser.add_argument("--json", dest="json_path", help="write the summary to this file")
+    parser.add_argument("--baseline", help="compare against a summary saved with --json")
+    args = parser.parse_args(argv)
+
+    summary = summarize(args.module, measure_imports(args.module), args.top)
+    print_summary(summary)
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump(summary, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(summary, json.load(fh))
+        if regressions:
+            print("Import-time regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("No import-time regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
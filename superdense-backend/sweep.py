@@ -0,0 +1,305 @@
+# sweep.py
+# ====================================================
+# Parallel Monte-Carlo sweeps for eavesdropper and noise studies.
+#
+# Each grid point (interception probability, depolarizing noise, photon
+# loss, shots) is evaluated in a worker process:
+#
+#   qber              E91 over `pairs` Bell pairs, where Eve intercepts each
+#                     of Bob's qubits with probability `intercept` and
+#                     resends it in a random basis
+#   sdc_success_rate  fraction of SDC shots decoding to the sent message,
+#                     averaged over the four messages; Eve measures Alice's
+#                     qubit on an `intercept` fraction of shots
+#
+# Results stream back as points complete and are cached on disk by a hash of
+# the parameters, so re-running an overlapping sweep only computes new points.
+#
+#   python sweep.py --intercept 0:1:11 --depolarizing 0,0.01,0.05 --shots 256,1024
+#
+# ====================================================
+
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+SWEEP_CACHE_DIR = os.getenv("SWEEP_CACHE_DIR", os.path.join(BACKEND_DIR, "sweep_cache"))
+SWEEP_WORKERS = int(os.getenv("SWEEP_WORKERS", str(os.cpu_count() or 1)))
+SWEEP_MAX_POINTS = int(os.getenv("SWEEP_MAX_POINTS", "5000"))
+SWEEP_MAX_SHOTS = int(os.getenv("SWEEP_MAX_SHOTS", "100000"))
+SWEEP_MAX_PAIRS = int(os.getenv("SWEEP_MAX_PAIRS", "100000"))
+# Total shots + pairs over the whole grid
+SWEEP_MAX_WORK = int(os.getenv("SWEEP_MAX_WORK", "10000000"))
+
+# Bump when evaluate_point changes so stale cache entries are not reused
+SWEEP_VERSION = 1
+
+PARAMETERS = ("intercept", "depolarizing", "loss", "shots", "pairs")
+
+
+# ----------------------------------------------------
+# Grid
+# ----------------------------------------------------
+def parse_values(text, cast=float):
+    """Parses "0,0.1,0.5" or an inclusive range "start:stop:count"."""
+    if isinstance(text, (list, tuple)):
+        return [cast(v) for v in text]
+    text = str(text)
+    if ":" in text:
+        start, stop, count = text.split(":")
+        start, stop, count = float(start), float(stop), int(count)
+        if count < 2:
+            return [cast(start)]
+        step = (stop - start) / (count - 1)
+        return [cast(round(start + i * step, 12)) for i in range(count)]
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+
+def build_grid(intercept=(0.0,), depolarizing=(0.0,), loss=(0.0,), shots=(1024,), pairs=512):
+    """Cartesian product of the parameter values as a list of point dicts."""
+    points = [
+        {"intercept": float(i), "depolarizing": float(d), "loss": float(l), "shots": int(s), "pairs": int(pairs)}
+        for i, d, l, s in itertools.product(intercept, depolarizing, loss, shots)
+    ]
+    for point in points:
+        for name in ("intercept", "depolarizing", "loss"):
+            if not 0.0 <= point[name] <= 1.0:
+                raise ValueError(f"{name} must be a probability, got {point[name]}")
+        if point["shots"] < 1 or point["pairs"] < 1:
+            raise ValueError("shots and pairs must be positive")
+        if point["shots"] > SWEEP_MAX_SHOTS:
+            raise ValueError(f"shots is {point['shots']}; the limit is {SWEEP_MAX_SHOTS}")
+        if point["pairs"] > SWEEP_MAX_PAIRS:
+            raise ValueError(f"pairs is {point['pairs']}; the limit is {SWEEP_MAX_PAIRS}")
+    if len(points) > SWEEP_MAX_POINTS:
+        raise ValueError(f"Sweep has {len(points)} points; the limit is {SWEEP_MAX_POINTS}")
+    work = sum(point["shots"] + point["pairs"] for point in points)
+    if work > SWEEP_MAX_WORK:
+        raise ValueError(f"Sweep needs {work} shots and pairs in total; the limit is {SWEEP_MAX_WORK}")
+    return points
+
+
+def point_key(point):
+    """Stable hash of a grid point (and the evaluation version)."""
+    canonical = json.dumps({"v": SWEEP_VERSION, **{k: point[k] for k in PARAMETERS}}, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ----------------------------------------------------
+# Evaluation (runs in worker processes)
+# ----------------------------------------------------
+def _simulator(depolarizing, seed):
+    from qiskit_aer import AerSimulator
+    from qiskit_aer.noise import NoiseModel, depolarizing_error
+
+    noise_model = None
+    if depolarizing > 0:
+        noise_model = NoiseModel()
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(depolarizing, 1), ["h", "x", "z"])
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(depolarizing, 2), ["cx"])
+    # depolarizing noise is a Pauli channel, so the stabilizer method still applies
+    return AerSimulator(method="stabilizer", noise_model=noise_model, seed_simulator=seed)
+
+
+def _qkd_qber(point, simulator, rng, pack_pairs=512):
+    import numpy as np
+    from qiskit import QuantumCircuit
+
+    import decoding
+
+    n = point["pairs"]
+    bases = rng.integers(0, 2, size=(n, 2), dtype=np.uint8)        # 0 = Z, 1 = X
+    eve_basis = rng.integers(0, 2, size=n, dtype=np.uint8)
+    intercepted = rng.random(n) < point["intercept"]
+    delivered = rng.random(n) >= point["loss"]
+
+    circuits = []
+    for start in range(0, n, pack_pairs):
+        stop = min(n, start + pack_pairs)
+        width = 2 * (stop - start)
+        eve_pairs = np.flatnonzero(intercepted[start:stop])
+        qc = QuantumCircuit(width, width + eve_pairs.size)
+        qc.h(range(0, width, 2))
+        qc.cx(range(0, width, 2), range(1, width, 2))
+        # intercept-resend on Bob's qubit, in Eve's own random basis
+        for j, pair in enumerate(eve_pairs.tolist()):
+            bob = 2 * pair + 1
+            if eve_basis[start + pair]:
+                qc.h(bob)
+            qc.measure(bob, width + j)
+            if eve_basis[start + pair]:
+                qc.h(bob)
+        x_basis = np.flatnonzero(bases[start:stop].ravel()).tolist()
+        if x_basis:
+            qc.h(x_basis)
+        qc.measure(range(width), range(width))
+        circuits.append(qc)
+
+    result = simulator.run(circuits, shots=1, memory=True).result()
+    bits = np.concatenate([decoding.bits_from_memory(result.get_memory(i))[0, :qc.num_qubits]
+                           for i, qc in enumerate(circuits)]).reshape(-1, 2)
+
+    sifted = (bases[:, 0] == bases[:, 1]) & delivered
+    errors = int(np.count_nonzero(bits[sifted, 0] != bits[sifted, 1]))
+    count = int(sifted.sum())
+    return {"qber": errors / count if count else None, "sifted_bits": count, "sift_rate": count / n}
+
+
+def _sdc_success(point, simulator, rng):
+    import decoding
+    from sdc_pipeline import SYMBOLS, sdc_circuit
+
+    shots = point["shots"]
+    correct = delivered_total = 0
+    for symbol in SYMBOLS:
+        delivered = shots - int(rng.binomial(shots, point["loss"]))
+        eve_shots = int(rng.binomial(delivered, point["intercept"]))
+        for eve, n in ((False, delivered - eve_shots), (True, eve_shots)):
+            if not n:
+                continue
+            result = simulator.run(sdc_circuit(symbol, eve), shots=n).result()
+            correct += int(decoding.aer_histogram(result, 0, 2, order="message")[int(symbol, 2)])
+        delivered_total += delivered
+    total = shots * len(SYMBOLS)
+    return {"sdc_success_rate": correct / total, "sdc_delivered_rate": delivered_total / total}
+
+
+def evaluate_point(point):
+    """Evaluates one grid point; returns the point merged with its metrics."""
+    import numpy as np
+
+    started = time.perf_counter()
+    seed = int(point_key(point)[:8], 16)
+    rng = np.random.default_rng(seed)
+    simulator = _simulator(point["depolarizing"], seed)
+    result = dict(point, key=point_key(point))
+    result.update(_qkd_qber(point, simulator, rng))
+    result.update(_sdc_success(point, simulator, rng))
+    result["elapsed_s"] = time.perf_counter() - started
+    return result
+
+
+# ----------------------------------------------------
+# Cache and pool
+# ----------------------------------------------------
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.json")
+
+
+def load_cached(point, cache_dir=SWEEP_CACHE_DIR):
+    try:
+        with open(_cache_path(point_key(point), cache_dir)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def store_cached(result, cache_dir=SWEEP_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(result["key"], cache_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(result, fh)
+    os.replace(tmp, path)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers=None):
+    """Shared worker pool. Workers are spawned, not forked, so they never
+    inherit the server's threads or locks."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers or SWEEP_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def run_sweep(points, pool=None, use_cache=True, cache_dir=SWEEP_CACHE_DIR):
+    """Yields one result per point as it becomes available.
+
+    Cached points are yielded first (with "cached": True); the rest are
+    evaluated in `pool` (default: the shared pool) and cached as they finish.
+    """
+    pending = []
+    for point in points:
+        cached = load_cached(point, cache_dir) if use_cache else None
+        if cached is not None:
+            yield dict(cached, cached=True)
+        else:
+            pending.append(point)
+    if not pending:
+        return
+
+    pool = pool or get_pool()
+    futures = [pool.submit(evaluate_point, point) for point in pending]
+    try:
+        for future in as_completed(futures):
+            result = future.result()
+            if use_cache:
+                store_cached(result, cache_dir)
+            yield dict(result, cached=False)
+    finally:
+        for future in futures:
+            future.cancel()  # client went away: drop points not yet started
+
+
+# ----------------------------------------------------
+# CLI
+# ----------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parallel eavesdropper/noise sweep")
+    parser.add_argument("--intercept", default="0", help='values "0,0.5,1" or range "0:1:11"')
+    parser.add_argument("--depolarizing", default="0", help="depolarizing error per gate")
+    parser.add_argument("--loss", default="0", help="photon loss probability")
+    parser.add_argument("--shots", default="1024", help="SDC shots per message")
+    parser.add_argument("--pairs", type=int, default=512, help="E91 pairs per point")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the cache")
+    parser.add_argument("--cache-dir", default=SWEEP_CACHE_DIR)
+    parser.add_argument("--out", help="write results as JSON lines to this file")
+    args = parser.parse_args(argv)
+
+    points = build_grid(
+        intercept=parse_values(args.intercept),
+        depolarizing=parse_values(args.depolarizing),
+        loss=parse_values(args.loss),
+        shots=parse_values(args.shots, int),
+        pairs=args.pairs,
+    )
+    print(f"Sweeping {len(points)} points on {args.workers} workers")
+
+    out = open(args.out, "w") if args.out else None
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            for done, result in enumerate(run_sweep(points, pool, not args.no_cache, args.cache_dir), 1):
+                qber = "  n/a" if result["qber"] is None else f"{result['qber']:.3f}"
+                print(f"[{done:>{len(str(len(points)))}}/{len(points)}] "
+                      f"intercept={result['intercept']:.3f} depol={result['depolarizing']:.4f} "
+                      f"loss={result['loss']:.3f} shots={result['shots']:<6} "
+                      f"qber={qber} sdc={result['sdc_success_rate']:.3f}"
+                      f"{' (cached)' if result['cached'] else ''}")
+                if out:
+                    out.write(json.dumps(result) + "\n")
+    finally:
+        if out:
+            out.close()
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
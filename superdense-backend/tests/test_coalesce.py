@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import coalesce
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def _coalesced(name):
+    return coalesce.REQUESTS._values.get((name, "coalesced"), 0)
+
+
+def _start_follower(coalescer, key, compute, results, ttl=None):
+    # runs a second call and waits until it has joined the leader's computation
+    def follow():
+        try:
+            results.append(coalescer.run(key, compute, ttl=ttl))
+        except Exception as e:
+            results.append(e)
+    joined = _coalesced(coalescer.name)
+    thread = threading.Thread(target=follow)
+    thread.start()
+    _wait_for(lambda: _coalesced(coalescer.name) > joined)
+    return thread
+
+
+def test_concurrent_calls_compute_once():
+    coalescer = coalesce.Coalescer("test_once", ttl=0)
+    release, calls = threading.Event(), []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    leader_results = []
+    leader = threading.Thread(target=lambda: leader_results.append(coalescer.run("k", compute)))
+    leader.start()
+    _wait_for(lambda: coalescer.inflight() == 1)
+    follower_results = []
+    follower = _start_follower(coalescer, "k", compute, follower_results)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert leader_results == [("leader", "result")]
+    assert follower_results == [("coalesced", "result")]
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    coalescer = coalesce.Coalescer("test_errors", ttl=60)
+    release, calls = threading.Event(), []
+
+    def failing():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    leader_results = []
+
+    def lead():
+        try:
+            coalescer.run("k", failing)
+        except RuntimeError as e:
+            leader_results.append(e)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    _wait_for(lambda: coalescer.inflight() == 1)
+    follower_results = []
+    follower = _start_follower(coalescer, "k", failing, follower_results)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(calls) == 1
+    assert len(leader_results) == 1 and len(follower_results) == 1
+    assert follower_results[0] is leader_results[0]
+    # the failure was not kept, even with a TTL: the next call computes again
+    assert coalescer.run("k", lambda: "ok") == ("leader", "ok")
+
+
+def test_ttl_serves_finished_results():
+    coalescer = coalesce.Coalescer("test_ttl", ttl=60)
+    assert coalescer.run("k", lambda: 1) == ("leader", 1)
+    assert coalescer.run("k", lambda: 2) == ("cached", 1)
+
+
+def test_zero_ttl_never_returns_a_finished_result():
+    coalescer = coalesce.Coalescer("test_zero_ttl", ttl=60)
+    assert coalescer.run("k", lambda: 1) == ("leader", 1)
+    # a cached result exists, but this call asked for a fresh one
+    assert coalescer.run("k", lambda: 2, ttl=0) == ("leader", 2)
+    # and a ttl=0 call keeps nothing for later callers
+    assert coalescer.run("fresh", lambda: 3, ttl=0) == ("leader", 3)
+    assert coalescer.run("fresh", lambda: 4) == ("leader", 4)
+
+
+def test_zero_ttl_still_shares_in_flight_work():
+    coalescer = coalesce.Coalescer("test_zero_ttl_inflight", ttl=0)
+    release = threading.Event()
+    leader = threading.Thread(target=coalescer.run, args=("k", lambda: release.wait(5) and "result"))
+    leader.start()
+    _wait_for(lambda: coalescer.inflight() == 1)
+    results = []
+    follower = _start_follower(coalescer, "k", lambda: pytest.fail("computed twice"), results, ttl=0)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert results == [("coalesced", "result")]
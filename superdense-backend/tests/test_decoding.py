@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+import decoding
+import fec
+
+
+def _old_soft_bits(counts, width=2):
+    # fec.soft_bits before it was moved onto decoding.histogram_from_counts
+    shots = sum(counts.values())
+    if not shots:
+        return np.full(width, 0.5)
+    p_one = np.zeros(width)
+    for outcome, count in counts.items():
+        p_one += (np.frombuffer(outcome.encode(), dtype=np.uint8)[:width].astype(int) - 48) * count
+    return p_one / shots
+
+
+def test_pack_known_values():
+    # rows are clbit 0 first: [1, 0, 0] is key '001'
+    bits = np.array([[1, 0, 0], [0, 1, 1], [1, 1, 0], [0, 0, 0]])
+    assert decoding.pack(bits, "clbit").tolist() == [1, 6, 3, 0]
+    assert decoding.pack(bits, "message").tolist() == [4, 3, 6, 0]
+
+
+def test_pack_rejects_wide_rows():
+    with pytest.raises(ValueError):
+        decoding.pack(np.zeros((1, 64), dtype=np.uint8))
+
+
+def test_reverse_bits_known_values():
+    assert decoding.reverse_bits([0b001, 0b110, 0b011, 0b111], 3).tolist() == [0b100, 0b011, 0b110, 0b111]
+    assert decoding.reverse_bits([0b01, 0b10], 2).tolist() == [0b10, 0b01]
+    values = np.arange(1 << 5)
+    assert decoding.reverse_bits(decoding.reverse_bits(values, 5), 5).tolist() == values.tolist()
+
+
+def test_bits_from_memory_matches_keys():
+    memory = ["01", "10", "11", "00", "10"]
+    bits = decoding.bits_from_memory(memory)
+    assert bits[:, 0].tolist() == [1, 0, 1, 0, 0]  # clbit 0 is the last character
+    assert decoding.to_counts(decoding.histogram(decoding.pack(bits), 2), 2) == \
+        {"00": 1, "01": 1, "10": 2, "11": 1}
+
+
+def test_reorder_matches_reversed_keys():
+    counts = {"001": 5, "011": 2, "110": 7}
+    hist = decoding.histogram_from_counts(counts, 3, order="message")
+    assert decoding.to_counts(hist, 3, zeros=False) == {key[::-1]: n for key, n in counts.items()}
+    assert decoding.reorder(hist, 3).tolist() == decoding.histogram_from_counts(counts, 3).tolist()
+
+
+@pytest.mark.parametrize("counts", [
+    {"00": 700, "01": 100, "10": 24, "11": 200},
+    {"11": 1},
+    {"00": 3, "10": 5},
+    {},
+])
+def test_soft_bits_match_previous_implementation(counts):
+    np.testing.assert_allclose(fec.soft_bits(counts), _old_soft_bits(counts))
+
+
+def test_bitarray_round_trip():
+    BitArray = pytest.importorskip("qiskit.primitives.containers").BitArray
+    counts = {"0000000001": 3, "1000000000": 2, "0110100101": 4, "1111111111": 1}
+    bit_array = BitArray.from_counts(counts, num_bits=10)
+    bits = decoding.bits_from_bitarray(bit_array)
+    assert bits.shape == (10, 10)
+    hist = decoding.histogram(decoding.pack(bits, "clbit"), 10)
+    assert decoding.to_counts(hist, 10, zeros=False) == bit_array.get_counts()
+    assert decoding.to_counts(hist, 10, zeros=False) == counts
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("qiskit_aer")
+from qiskit import QuantumCircuit
+
+import execution
+
+
+def _bell(gate):
+    circuit = QuantumCircuit(2, 2)
+    circuit.h(0)
+    getattr(circuit, gate)(0, 1)
+    circuit.measure([0, 1], [0, 1])
+    return circuit
+
+
+def test_clifford_circuits_use_the_stabilizer_method():
+    assert execution.select_method([_bell("cx"), _bell("cz")]) == "stabilizer"
+
+
+@pytest.mark.parametrize("gate", ["iswap", "dcx"])
+def test_cliffords_outside_the_stabilizer_basis_fall_back(gate):
+    circuit = _bell(gate)
+    assert execution.select_method([circuit]) == "statevector"
+    result = execution.run(circuit, shots=64).result()
+    assert result.success and sum(result.get_counts().values()) == 64
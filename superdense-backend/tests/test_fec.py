@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+import fec
+
+
+@pytest.mark.parametrize("name", ["hamming7_4", "hamming15_11", "hamming31_26"])
+def test_single_errors_are_corrected(name):
+    code = fec.get_code(name)
+    rng = np.random.default_rng(7)
+    data = "".join(map(str, rng.integers(0, 2, 10 * code.k)))
+    sent = np.frombuffer(fec.encode(data, code).encode("ascii"), dtype=np.uint8) - ord("0")
+
+    # flip one bit of every codeword (the pair is interleaved a0 b0 a1 b1 ...)
+    received = sent.astype(float).reshape(-1, code.n, 2)
+    received[:, 3 % code.n, :] = 1 - received[:, 3 % code.n, :]
+    decoder = fec.SoftDecoder(code)
+    corrected = decoder.push(np.clip(received.ravel(), 0.1, 0.9))
+    assert decoder.bits(len(data)) == data
+    assert corrected == received.shape[0] * 2
+
+
+def test_soft_bits_read_keys_most_significant_first():
+    np.testing.assert_allclose(fec.soft_bits({"10": 3, "00": 1}), [0.75, 0.0])
+
+
+def test_unknown_code():
+    with pytest.raises(ValueError):
+        fec.get_code("golay")
@@ -0,0 +1,56 @@
+import numpy as np
+
+from geofence import MAX_SPEED_MPS, R_EARTH_M, Geofence, contains
+
+# a box straddling the equator between 10 and 20 degrees east
+BOX = [(-5.0, 10.0), (5.0, 10.0), (5.0, 20.0), (-5.0, 20.0)]
+SPEED = 500.0
+REVOLUTION_SEC = 2 * np.pi * R_EARTH_M / SPEED
+
+
+def test_crossings_repeat_every_revolution():
+    fence = Geofence([BOX])
+    flight, area, t = fence.crossings([0.0], [0.0], [SPEED], [90.0], 2.5 * REVOLUTION_SEC)
+    expected = [base + k * REVOLUTION_SEC for k in range(3) for base in (10 / 360 * REVOLUTION_SEC,
+                                                                          20 / 360 * REVOLUTION_SEC)]
+    assert flight.tolist() == [0] * 6 and area.tolist() == [0] * 6
+    np.testing.assert_allclose(t, expected, atol=1e-3)
+
+
+def test_intervals_match_sampling():
+    fence = Geofence([BOX])
+    horizon = 2.5 * REVOLUTION_SEC
+    lat, lon, speed, heading = [0.0, 0.0, 30.0], [0.0, 15.0, 0.0], [SPEED, SPEED, 250.0], [90.0, 90.0, 0.0]
+    intervals = fence.intervals(lat, lon, speed, heading, horizon)
+    assert len(intervals[0]) == 3
+    assert intervals[1][0]["inside_now"] and intervals[1][0]["entry_sec"] == 0.0
+    assert intervals[2] == []
+
+    times = np.linspace(0, horizon, 2001)
+    for f in range(len(lat)):
+        n = len(times)
+        sampled = contains(*fence.position(np.full(n, lat[f]), np.full(n, lon[f]), np.full(n, speed[f]),
+                                           np.full(n, heading[f]), times), BOX)
+        predicted = np.zeros(n, dtype=bool)
+        for entry in intervals[f]:
+            end = horizon if entry["exit_sec"] is None else entry["exit_sec"]
+            predicted |= (times > entry["entry_sec"]) & (times < end)
+        near_edge = np.zeros(n, dtype=bool)
+        for entry in intervals[f]:
+            for edge in (entry["entry_sec"], entry["exit_sec"]):
+                if edge is not None:
+                    near_edge |= np.abs(times - edge) < 2 * horizon / n
+        assert (sampled == predicted)[~near_edge].all()
+
+
+def test_stationary_flight_has_no_crossings():
+    flight, _, _ = Geofence([BOX]).crossings([0.0], [15.0], [0.0], [90.0], 3600.0)
+    assert flight.size == 0
+
+
+def test_glitched_speeds_are_clipped():
+    fence = Geofence([BOX])
+    glitch = fence.crossings([0.0], [0.0], [3000.0], [90.0], 86400.0)
+    clipped = fence.crossings([0.0], [0.0], [MAX_SPEED_MPS], [90.0], 86400.0)
+    for got, expected in zip(glitch, clipped):
+        np.testing.assert_allclose(got, expected)
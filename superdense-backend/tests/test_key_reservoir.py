@@ -0,0 +1,28 @@
+import pytest
+
+from key_reservoir import KeyReservoir
+
+
+def _reservoir():
+    return KeyReservoir(lambda: {"qkd_key": "10" * 32, "qber": 0.0, "secure": True},
+                        high_water=128, name="test")
+
+
+@pytest.mark.parametrize("n_bits", [-1, 1.5, "8", True])
+def test_draw_rejects_invalid_sizes(n_bits):
+    reservoir = _reservoir()
+    with pytest.raises(ValueError):
+        reservoir.draw(n_bits, timeout=1)
+    assert reservoir.stats()["bits_issued"] == 0
+
+
+def test_draw_zero_returns_empty_key():
+    reservoir = _reservoir()
+    try:
+        result = reservoir.draw(0, timeout=1)
+        assert len(result["qkd_key"]) == 0
+        assert result["batches"] == []
+        # the draw lock is released, so the next draw is served
+        assert reservoir.draw(16, timeout=5)["qkd_key"].to_string() == "10" * 8
+    finally:
+        reservoir.stop()
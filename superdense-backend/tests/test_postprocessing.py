@@ -0,0 +1,41 @@
+import numpy as np
+
+import postprocessing
+from keybits import KeyBits
+
+
+def _noisy_pair(n, qber, seed):
+    rng = np.random.default_rng(seed)
+    alice = rng.integers(0, 2, n, dtype=np.uint8)
+    bob = alice ^ (rng.random(n) < qber).astype(np.uint8)
+    return KeyBits.from_bits(alice), KeyBits.from_bits(bob)
+
+
+def test_toeplitz_hash_matches_matrix_product():
+    rng = np.random.default_rng(3)
+    n, out_bits = 40, 12
+    key, seed = KeyBits.random(n, rng), KeyBits.random(out_bits + n - 1, rng)
+    t = seed.to_bits().astype(int)
+    matrix = np.array([t[i:i + n][::-1] for i in range(out_bits)])
+    expected = (matrix @ key.to_bits().astype(int)) & 1
+    assert postprocessing.toeplitz_hash(key, out_bits, seed).to_bits().tolist() == expected.tolist()
+
+
+def test_cascade_reconciles_bob_to_alice():
+    alice, bob = _noisy_pair(20000, 0.03, seed=1)
+    result = postprocessing.cascade_reconcile(alice, bob, 0.03, rng=2)
+    assert result["bob"] == alice
+    assert result["corrected_bits"] == alice.hamming_distance(bob)
+
+
+def test_distill_gives_both_sides_the_same_key():
+    alice, bob = _noisy_pair(50000, 0.02, seed=4)
+    report = postprocessing.distill(alice, bob, rng=5)
+    assert report["secure"]
+    assert 0 < report["final_bits"] == len(report["key"]) < report["sifted_bits"]
+
+
+def test_distill_aborts_above_threshold():
+    alice, bob = _noisy_pair(5000, 0.25, seed=6)
+    report = postprocessing.distill(alice, bob, rng=7)
+    assert not report["secure"] and len(report["key"]) == 0
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from result_store import HISTORY_MAX_LIMIT, ResultStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "r.sqlite3"))
+
+
+def _age(store, row_id, seconds):
+    with store._lock:
+        conn = store._connect()
+        with conn:
+            conn.execute("UPDATE runs SET created_at = ? WHERE id = ?", (time.time() - seconds, row_id))
+
+
+def test_lookup_is_keyed_by_kind(store):
+    store.save("run_simulation", "h", "ibm_x", 1024, {"01": 1024}, job_id="a")
+    store.save("sdc_stream", "h", "ibm_x", 1024, {"10": 1024}, job_id="b")
+    assert store.lookup("run_simulation", "h", "ibm_x", 1024, max_age=None)["counts"] == {"01": 1024}
+    assert store.lookup("sdc_stream", "h", "ibm_x", 1024, max_age=None)["counts"] == {"10": 1024}
+    assert store.lookup("other", "h", "ibm_x", 1024, max_age=None) is None
+    assert store.lookup("run_simulation", "h", "ibm_x", 512, max_age=None) is None
+
+
+def test_lookup_returns_newest_within_max_age(store):
+    old = store.save("run_simulation", "h", "ibm_x", 1024, {"00": 1}, job_id="old")
+    _age(store, old, 3600)
+    assert store.lookup("run_simulation", "h", "ibm_x", 1024, max_age=60) is None
+    assert store.lookup("run_simulation", "h", "ibm_x", 1024, max_age=None)["job_id"] == "old"
+
+    store.save("run_simulation", "h", "ibm_x", 1024, {"00": 2}, job_id="new")
+    assert store.lookup("run_simulation", "h", "ibm_x", 1024, max_age=60)["job_id"] == "new"
+    assert store.lookup("run_simulation", "h", "ibm_x", 1024, max_age=None)["job_id"] == "new"
+
+
+def test_history_pages_by_id(store):
+    for i in range(7):
+        store.save("run_simulation" if i % 2 else "sdc_stream", f"h{i}", "ibm_x", 1024, {}, job_id=f"j{i}")
+
+    seen, before = [], None
+    while True:
+        page = store.history(limit=3, before=before)
+        seen += [r["job_id"] for r in page["results"]]
+        before = page["next"]
+        if before is None:
+            break
+    assert seen == [f"j{i}" for i in reversed(range(7))]
+
+    page = store.history(kind="run_simulation", limit=2)
+    assert [r["job_id"] for r in page["results"]] == ["j5", "j3"]
+    assert [r["job_id"] for r in store.history(kind="run_simulation", before=page["next"])["results"]] == ["j1"]
+
+
+def test_history_limit_is_clamped(store):
+    store.save("run_simulation", "h", "ibm_x", 1024, {}, job_id="j")
+    assert len(store.history(limit=0)["results"]) == 1
+    assert store.history(limit=HISTORY_MAX_LIMIT * 10)["next"] is None
+    with pytest.raises(ValueError):
+        store.history(limit="abc")
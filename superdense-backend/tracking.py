@@ -0,0 +1,221 @@
+# tracking.py
+# ====================================================
+# Per-aircraft position/velocity tracking for trajectory prediction.
+#
+# Each aircraft gets a constant-velocity Kalman filter (white-noise
+# acceleration) over (latitude, longitude, east velocity, north velocity).
+# Positions are kept in degrees; the covariance is in metres and m/s on
+# the local tangent plane, re-centred on the estimate after every step.
+# With isotropic position noise the east and north axes never couple, so
+# the covariance is two 2x2 blocks (position, velocity) and each step is a
+# handful of scalar operations.
+#
+# Filter states live in one array-backed TrackTable (a row per aircraft),
+# and every report costs a single O(1) predict/update step. Reports at or
+# before a track's last update are ignored, so re-feeding a whole history
+# (as load_simulated_flights returns it on every call) only processes the
+# new points, and bursts of duplicate reports leave the state unchanged.
+# A report more than TRACK_MAX_AGE older than its track (a replay that
+# looped) starts the track afresh.
+#
+# Configuration (environment):
+#   TRACK_POSITION_STD  standard deviation of reported positions, m (default 50)
+#   TRACK_ACCEL_STD     unmodelled acceleration, m/s^2 (default 1)
+#   TRACK_MAX_AGE       seconds a track is kept after its aircraft leaves the
+#                       feed (default 1800)
+# ====================================================
+
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+import metrics
+
+TRACK_POSITION_STD = float(os.getenv("TRACK_POSITION_STD", "50"))
+TRACK_ACCEL_STD = float(os.getenv("TRACK_ACCEL_STD", "1"))
+TRACK_MAX_AGE = float(os.getenv("TRACK_MAX_AGE", "1800"))
+
+# Velocity uncertainty of a new track (m/s); large, so the first updates dominate
+INITIAL_VELOCITY_STD = 300.0
+R_EARTH_M = 6371e3
+
+UPDATES = metrics.register(metrics.Counter(
+    "sdc_track_updates_total", "Position reports fed to the tracker, by outcome.", ["result"]))
+
+
+def _wrap_degrees(delta):
+    return (delta + 180.0) % 360.0 - 180.0
+
+
+class TrackTable:
+    """Kalman filter states of all tracked aircraft, one array row each."""
+
+    def __init__(self, capacity=1024, position_std=TRACK_POSITION_STD, accel_std=TRACK_ACCEL_STD):
+        self.r = position_std ** 2
+        self.q = accel_std ** 2
+        self.rows = {}                          # icao24 -> row
+        self._free = []
+        self.state = np.zeros((capacity, 4))    # lat, lon (deg), v_east, v_north (m/s)
+        self.cov = np.zeros((capacity, 6))      # per axis (east, north): pos, pos-vel, vel
+        self.updated = np.zeros(capacity)       # time of the last report
+        self.seen = np.zeros(capacity)          # wall (monotonic) time last seen in a feed
+        self.reports = np.zeros(capacity, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _allocate(self, icao):
+        # called with _lock held
+        if self._free:
+            row = self._free.pop()
+        else:
+            row = len(self.rows)
+            if row == len(self.updated):
+                grow = len(self.updated)
+                self.state = np.concatenate([self.state, np.zeros((grow, 4))])
+                self.cov = np.concatenate([self.cov, np.zeros((grow, 6))])
+                self.updated = np.concatenate([self.updated, np.zeros(grow)])
+                self.seen = np.concatenate([self.seen, np.zeros(grow)])
+                self.reports = np.concatenate([self.reports, np.zeros(grow, dtype=np.int64)])
+        self.rows[icao] = row
+        return row
+
+    # ------------------------------------------------
+    # Filter steps
+    # ------------------------------------------------
+    def _start(self, row, lat, lon, t, velocity, heading):
+        ve = vn = 0.0
+        if velocity is not None and heading is not None:
+            ve = velocity * math.sin(math.radians(heading))
+            vn = velocity * math.cos(math.radians(heading))
+        self.state[row] = (lat, lon, ve, vn)
+        self.cov[row] = (self.r, 0.0, INITIAL_VELOCITY_STD ** 2) * 2
+        self.updated[row] = t
+        self.seen[row] = time.monotonic()
+        self.reports[row] = 1
+
+    def _step(self, row, lat, lon, t):
+        dt = float(t - self.updated[row])
+        lat0, lon0, ve, vn = self.state[row].tolist()
+        cov = self.cov[row].tolist()
+        q4, q3, q2 = self.q * dt ** 4 / 4, self.q * dt ** 3 / 2, self.q * dt ** 2
+
+        # Predict: move along the velocity
+        cos_lat = max(math.cos(math.radians(lat0)), 1e-6)
+        lat_p = lat0 + math.degrees(vn * dt / R_EARTH_M)
+        lon_p = _wrap_degrees(lon0 + math.degrees(ve * dt / (R_EARTH_M * cos_lat)))
+
+        # Update each axis with the reported position (innovation in metres)
+        cos_lat = max(math.cos(math.radians(lat_p)), 1e-6)
+        innovation = (math.radians(_wrap_degrees(lon - lon_p)) * R_EARTH_M * cos_lat,
+                      math.radians(lat - lat_p) * R_EARTH_M)
+        correction = []
+        for axis in (0, 1):
+            pp, pv, vv = cov[3 * axis:3 * axis + 3]
+            pp += 2 * dt * pv + dt * dt * vv + q4
+            pv += dt * vv + q3
+            vv += q2
+            k_pos, k_vel = pp / (pp + self.r), pv / (pp + self.r)
+            correction.append((k_pos * innovation[axis], k_vel * innovation[axis]))
+            cov[3 * axis:3 * axis + 3] = (1 - k_pos) * pp, (1 - k_pos) * pv, vv - k_vel * pv
+
+        (de, dve), (dn, dvn) = correction
+        self.state[row] = (
+            lat_p + math.degrees(dn / R_EARTH_M),
+            _wrap_degrees(lon_p + math.degrees(de / (R_EARTH_M * cos_lat))),
+            ve + dve,
+            vn + dvn,
+        )
+        self.cov[row] = cov
+        self.updated[row] = t
+        self.reports[row] += 1
+
+    # ------------------------------------------------
+    # Feeding
+    # ------------------------------------------------
+    def update(self, icao, lat, lon, t, velocity=None, heading=None):
+        """Feeds one report; returns False if it is not newer than the track."""
+        if lat is None or lon is None or t is None:
+            return False
+        with self._lock:
+            row = self.rows.get(icao)
+            if row is None or t < self.updated[row] - TRACK_MAX_AGE:
+                self._start(self._allocate(icao) if row is None else row, lat, lon, t, velocity, heading)
+                UPDATES.inc("new")
+                return True
+            self.seen[row] = time.monotonic()
+            if t <= self.updated[row]:
+                UPDATES.inc("stale")
+                return False
+            self._step(row, lat, lon, t)
+        UPDATES.inc("accepted")
+        return True
+
+    def update_flight(self, flight):
+        """Feeds the reports of one flight dict (as built by aircraft.py) not seen yet."""
+        icao = flight.get("icao24")
+        points = flight.get("timestamps")
+        if not icao:
+            return
+        if not points:
+            self.update(icao, flight.get("latitude"), flight.get("longitude"), flight.get("timestamp"),
+                        flight.get("velocity"), flight.get("heading"))
+            return
+
+        row = self.rows.get(icao)
+        last = self.updated[row] if row is not None else -math.inf
+        if points[-1]["timestamp"] < last - TRACK_MAX_AGE:
+            last = -math.inf  # looped back: rebuild the track from this history
+        elif row is not None:
+            self.seen[row] = time.monotonic()
+        start = len(points)
+        while start > 0 and points[start - 1]["timestamp"] > last:
+            start -= 1
+        for point in points[start:]:
+            self.update(icao, point["lat"], point["lon"], point["timestamp"],
+                        flight.get("velocity"), flight.get("heading"))
+
+    def update_flights(self, flights):
+        """Feeds a whole feed snapshot, then drops tracks that left the feed long ago."""
+        for flight in flights:
+            self.update_flight(flight)
+        self.prune(time.monotonic() - TRACK_MAX_AGE)
+
+    def prune(self, before):
+        """Drops tracks last seen in a feed before `before` (time.monotonic())."""
+        with self._lock:
+            for icao, row in list(self.rows.items()):
+                if self.seen[row] < before:
+                    del self.rows[icao]
+                    self._free.append(row)
+
+    # ------------------------------------------------
+    # Reading
+    # ------------------------------------------------
+    def get(self, icao):
+        """Current estimate for `icao`, or None if it is not tracked."""
+        with self._lock:
+            row = self.rows.get(icao)
+            if row is None:
+                return None
+            lat, lon, ve, vn = self.state[row].tolist()
+            pp_e, _, vv_e, pp_n, _, vv_n = self.cov[row].tolist()
+            return {
+                "lat": lat,
+                "lon": lon,
+                "velocity": math.hypot(ve, vn),
+                "heading": math.degrees(math.atan2(ve, vn)) % 360,
+                "timestamp": float(self.updated[row]),
+                "reports": int(self.reports[row]),
+                "position_std": math.sqrt((pp_e + pp_n) / 2),
+                "velocity_std": math.sqrt((vv_e + vv_n) / 2),
+            }
+
+
+tracker = TrackTable()
+
+metrics.register(metrics.Gauge("sdc_tracks", "Aircraft with a live track.", fn=lambda: len(tracker.rows)))
@@ -0,0 +1,159 @@
+# transpile_cache.py
+# ====================================================
+# On-disk cache of transpiled (ISA) circuits.
+#
+# Transpiling against a real device target is slow, yet the backends only
+# ever send a handful of distinct circuits. Compiled circuits are stored as
+# QPY files under
+#
+#   TRANSPILE_CACHE_DIR/<backend>/<calibration>/<key>.qpy
+#
+# where <key> hashes the logical circuit and the optimization level, and
+# <calibration> hashes the backend's last calibration timestamp. The
+# timestamp is re-read every TRANSPILE_CALIBRATION_TTL seconds; when it
+# changes, the directories of older calibrations are deleted and the pass
+# manager is rebuilt against the refreshed target, so stale layouts are
+# never reused or produced. If the timestamp cannot be read (e.g. a
+# transient API error), the last known calibration is kept and nothing is
+# pruned. Restarted servers and new workers pick up the compiled circuits
+# from disk.
+# ====================================================
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+
+import metrics
+from result_store import circuit_hash
+
+TRANSPILE_CACHE_DIR = os.getenv(
+    "TRANSPILE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "transpile_cache"))
+TRANSPILE_CALIBRATION_TTL = float(os.getenv("TRANSPILE_CALIBRATION_TTL", "300"))
+TRANSPILE_MEMORY_ENTRIES = 256
+
+LOOKUPS = metrics.register(metrics.Counter(
+    "sdc_transpile_cache_lookups_total", "Transpile cache lookups by where the circuit came from.", ["source"]))
+
+
+def _safe_name(text):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in str(text))
+
+
+def calibration_stamp(backend):
+    """The backend's last calibration time, "uncalibrated" if it has none, or None if unreadable."""
+    properties = getattr(backend, "properties", None)
+    if properties is None:
+        return "uncalibrated"
+    try:
+        try:
+            props = properties(refresh=True)
+        except TypeError:
+            props = properties()
+    except Exception:
+        return None
+    updated = getattr(props, "last_update_date", None)
+    return updated.isoformat() if hasattr(updated, "isoformat") else str(updated or "uncalibrated")
+
+
+class TranspileCache:
+    """Memory + disk cache in front of a pass manager's run()."""
+
+    def __init__(self, directory=TRANSPILE_CACHE_DIR, calibration_ttl=TRANSPILE_CALIBRATION_TTL):
+        self.directory = directory
+        self.calibration_ttl = calibration_ttl
+        self._stamps = {}     # backend name -> (calibration hash, checked at)
+        self._memory = {}     # (backend, calibration, key) -> ISA circuit
+        self._managers = {}   # backend name -> (calibration hash, pass manager)
+        self._lock = threading.Lock()
+
+    def _calibration(self, backend):
+        """Current calibration hash of `backend` (None if never read); prunes older calibrations on change."""
+        name = _safe_name(backend.name)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._stamps.get(name)
+            if cached and now - cached[1] < self.calibration_ttl:
+                return name, cached[0]
+
+        text = calibration_stamp(backend)
+        if text is None:
+            # keep the last known calibration until the backend answers again
+            with self._lock:
+                if cached:
+                    self._stamps[name] = (cached[0], now)
+                return name, cached[0] if cached else None
+
+        stamp = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        with self._lock:
+            previous = self._stamps.get(name)
+            self._stamps[name] = (stamp, now)
+            if previous and previous[0] != stamp:
+                self._memory = {k: v for k, v in self._memory.items() if k[0] != name or k[1] == stamp}
+        self._prune(name, stamp)
+        return name, stamp
+
+    def _prune(self, name, stamp):
+        backend_dir = os.path.join(self.directory, name)
+        if not os.path.isdir(backend_dir):
+            return
+        for entry in os.listdir(backend_dir):
+            if entry != stamp:
+                shutil.rmtree(os.path.join(backend_dir, entry), ignore_errors=True)
+
+    def _pass_manager(self, pm, backend, name, stamp, rebuild):
+        """`pm`, or rebuild(backend) once the calibration differs from the one `pm` was built for."""
+        with self._lock:
+            built = self._managers.setdefault(name, (stamp, pm))
+        if built[0] == stamp or rebuild is None:
+            return built[1]
+        pm = rebuild(backend)
+        with self._lock:
+            self._managers[name] = (stamp, pm)
+        return pm
+
+    def run(self, pm, circuit, backend, optimization_level, rebuild=None):
+        """Returns pm.run(circuit), from cache when this circuit was compiled before.
+
+        `rebuild(backend)` returns a pass manager for the backend's current
+        target; it replaces `pm` after a calibration change.
+        """
+        from qiskit import qpy
+
+        name, stamp = self._calibration(backend)
+        if stamp is None:
+            LOOKUPS.inc("uncached")
+            return pm.run(circuit)
+        pm = self._pass_manager(pm, backend, name, stamp, rebuild)
+        key = hashlib.sha256(f"{circuit_hash(circuit)}:{optimization_level}".encode("utf-8")).hexdigest()
+        memory_key = (name, stamp, key)
+
+        with self._lock:
+            compiled = self._memory.get(memory_key)
+        if compiled is not None:
+            LOOKUPS.inc("memory")
+            return compiled
+
+        path = os.path.join(self.directory, name, stamp, f"{key}.qpy")
+        try:
+            with open(path, "rb") as fh:
+                compiled = qpy.load(fh)[0]
+            LOOKUPS.inc("disk")
+        except (OSError, ValueError, qpy.QpyError):
+            compiled = pm.run(circuit)
+            LOOKUPS.inc("miss")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                qpy.dump(compiled, fh)
+            os.replace(tmp, path)  # atomic, so concurrent workers never read half a file
+
+        with self._lock:
+            if len(self._memory) >= TRANSPILE_MEMORY_ENTRIES:
+                self._memory.pop(next(iter(self._memory)))
+            self._memory[memory_key] = compiled
+        return compiled
+
+
+cache = TranspileCache()
@@ -22,22 +22,37 @@ export default function IbmCloud() {
     }
   }, [location.state]);
 
-  const handleSend = () => {
+  const handleSend = async () => {
     setLoading(true);
     setError(null);
     setResult(null);
     setRoundProgress([]);
 
     try {
-      // Use GET-based SSE for real-time updates
-      const url = `http://localhost:5003/sdc/send-stream?latitude=${latitude}&longitude=${longitude}&restricted_status=${restrictedStatus}`;
+      // Start the transmission as a session, then follow its events on the
+      // asyncio SSE server, where an open stream does not hold a worker thread
+      const response = await fetch("http://localhost:5003/sdc/sessions", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ latitude, longitude, restricted_status: restrictedStatus }),
+      });
+      const session = await response.json();
+      if (!response.ok) {
+        throw new Error(session.error || `Request failed (${response.status})`);
+      }
+
+      const url = `http://localhost:${session.sse_port}${session.events_url}`;
       const source = new EventSource(url);
 
       source.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
 
-          if (data.completed) {
+          if (data.error) {
+            setError(data.error);
+            setLoading(false);
+            source.close();
+          } else if (data.completed) {
             setResult(data);
             setLoading(false);
             source.close();
@@ -49,11 +64,13 @@ export default function IbmCloud() {
         }
       };
 
+      // The browser reconnects on its own and resumes the transmission from
+      // the last event it received; only give up once it stops retrying.
       source.onerror = (err) => {
+        if (source.readyState !== EventSource.CLOSED) return;
         console.error("SSE error:", err);
         setError("Connection lost. Please try again.");
         setLoading(false);
-        source.close();
       };
     } catch (err) {
       setError(err.message || "Request failed");
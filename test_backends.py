@@ -1,17 +1,47 @@
 #!/usr/bin/env python3
 """
-Test script to verify both backend servers are running correctly
+Test script to verify the backend servers are running correctly, and a
+concurrent load generator for their endpoints.
+
+    python test_backends.py                      # health check (default)
+    python test_backends.py load --concurrency 16 --requests 200
+    python test_backends.py load --spawn --fake-latency 0.2 --fake-failure-rate 0.05
+
+With --spawn the load test starts local fakes for OpenSky, N2YO and IBM
+Quantum (superdense-backend/fake_services.py) plus server.py wired to them,
+so capacity can be measured without touching third-party APIs.
 """
 
-import requests
+import argparse
 import json
+import os
+import subprocess
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "superdense-backend")
+
+# Endpoint name -> (port, method, path, params/json body, is SSE stream)
+ENDPOINTS = {
+    "run_simulation": (5000, "POST", "/api/run_simulation", {"message": "01", "target": "local"}, False),
+    "qkd": (5001, "POST", "/qkd", {"num_qubits": 50}, False),
+    "sdc": (5001, "POST", "/sdc", {"qkd_key": "1010"}, False),
+    "full_simulation": (5001, "POST", "/full-simulation", {"message": "01", "num_qubits": 50}, False),
+    "flights": (5002, "GET", "/api/flights", None, False),
+    "predict": (5002, "GET", "/api/predict", {"icao24": "DEL_BOM_101"}, False),
+    "send_stream": (5003, "GET", "/sdc/send-stream",
+                    {"latitude": "33.89729", "longitude": "74.24314", "restricted_status": "0"}, True),
+}
 
 def test_backend(url, name):
     """Test a backend server"""
     try:
         print(f"\n🔍 Testing {name} at {url}")
-        
+
         # Test health endpoint
         health_response = requests.get(f"{url}/api/health", timeout=5)
         if health_response.status_code == 200:
@@ -20,9 +50,9 @@ def test_backend(url, name):
         else:
             print(f"❌ {name} Health Check Failed: {health_response.status_code}")
             return False
-            
+
         return True
-        
+
     except requests.exceptions.ConnectionError:
         print(f"❌ {name} Connection Error: Server not running at {url}")
         return False
@@ -30,19 +60,140 @@ def test_backend(url, name):
         print(f"❌ {name} Error: {str(e)}")
         return False
 
+# =============================================================================
+#  LOAD GENERATOR
+# =============================================================================
+def call_endpoint(session, host, name):
+    """Performs one request against `name`; returns (latency_s, ok)."""
+    port, method, path, payload, is_stream = ENDPOINTS[name]
+    url = f"http://{host}:{port}{path}"
+    start = time.perf_counter()
+    try:
+        if is_stream:
+            with session.get(url, params=payload, stream=True, timeout=600) as resp:
+                ok = False
+                for line in resp.iter_lines(decode_unicode=True):
+                    if line and line.startswith("data:"):
+                        event = json.loads(line[len("data:"):])
+                        if event.get("completed"):
+                            ok = resp.status_code == 200 and "error" not in event
+                            break
+        elif method == "GET":
+            resp = session.get(url, params=payload, timeout=120)
+            ok = resp.status_code == 200
+        else:
+            resp = session.post(url, json=payload, timeout=120)
+            ok = resp.status_code == 200 and "error" not in resp.json()
+    except (requests.RequestException, ValueError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_load(host, name, total, concurrency):
+    """Sends `total` requests to one endpoint with `concurrency` workers."""
+    local = threading.local()
+
+    def worker(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return call_endpoint(local.session, host, name)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    return {
+        "endpoint": name,
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": total / elapsed if elapsed else 0.0,
+    }
+
+def wait_for_server(host, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(f"http://{host}:5001/health", timeout=2).status_code == 200:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    return False
+
+def spawn_stack(host, args):
+    """Starts the fake third-party services and server.py pointed at them."""
+    sys.path.insert(0, BACKEND_DIR)
+    import fake_services
+
+    fakes = fake_services.start_fake_servers(
+        latency=args.fake_latency, jitter=args.fake_jitter,
+        failure_rate=args.fake_failure_rate, num_aircraft=args.fake_aircraft,
+    )
+    env = dict(os.environ, **fake_services.fake_env(fakes))
+    server = subprocess.Popen(
+        [sys.executable, "server.py", "--host", host, "--workers", str(args.workers)],
+        cwd=BACKEND_DIR, env=env,
+    )
+    if not wait_for_server(host):
+        server.terminate()
+        raise RuntimeError("server.py did not become ready")
+    return server
+
+def load_main(args):
+    names = list(ENDPOINTS) if args.endpoints == "all" else args.endpoints.split(",")
+    unknown = [n for n in names if n not in ENDPOINTS]
+    if unknown:
+        print(f"Unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+        return 2
+
+    server = spawn_stack(args.host, args) if args.spawn else None
+    try:
+        print(f"{'endpoint':<18}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+        reports = []
+        for name in names:
+            total = args.stream_requests if ENDPOINTS[name][4] else args.requests
+            report = run_load(args.host, name, total, args.concurrency)
+            reports.append(report)
+            print(f"{name:<18}{report['requests']:>6}{report['errors']:>8}{report['p50_ms']:>10.1f}"
+                  f"{report['p95_ms']:>10.1f}{report['p99_ms']:>10.1f}{report['throughput_rps']:>9.2f}")
+        if args.json:
+            with open(args.json, "w") as fh:
+                json.dump(reports, fh, indent=2)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+    return 0
+
+# =============================================================================
+#  HEALTH CHECK
+# =============================================================================
 def main():
     print("🚀 SuperDensee Backend Testing")
     print("=" * 40)
-    
+
     # Test both backends
     testing_ok = test_backend("http://localhost:5000", "Testing Phase Backend (app.py)")
     application_ok = test_backend("http://localhost:5001", "Application Phase Backend (application.py)")
-    
+
     print("\n" + "=" * 40)
     print("📊 Test Results:")
     print(f"Testing Phase (Port 5000): {'✅ Running' if testing_ok else '❌ Not Running'}")
     print(f"Application Phase (Port 5001): {'✅ Running' if application_ok else '❌ Not Running'}")
-    
+
     if testing_ok and application_ok:
         print("\n🎉 Both backends are running successfully!")
         print("\n📝 Next Steps:")
@@ -57,5 +208,26 @@ def main():
         print("   - Terminal 1: cd superdense-backend && python app.py")
         print("   - Terminal 2: cd superdense-backend && python application.py")
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Health check and load generator for the backends")
+    sub = parser.add_subparsers(dest="command")
+    load = sub.add_parser("load", help="drive every endpoint concurrently and report latency")
+    load.add_argument("--host", default="127.0.0.1")
+    load.add_argument("--endpoints", default="all", help=f"comma-separated subset of: {', '.join(ENDPOINTS)}")
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    load.add_argument("--stream-requests", type=int, default=4, help="requests for SSE endpoints")
+    load.add_argument("--json", help="write the per-endpoint report to this file")
+    load.add_argument("--spawn", action="store_true", help="start fakes + server.py locally")
+    load.add_argument("--workers", type=int, default=16, help="server.py worker threads with --spawn")
+    load.add_argument("--fake-latency", type=float, default=0.05)
+    load.add_argument("--fake-jitter", type=float, default=0.0)
+    load.add_argument("--fake-failure-rate", type=float, default=0.0)
+    load.add_argument("--fake-aircraft", type=int, default=500)
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
+    cli_args = parse_args()
+    if cli_args.command == "load":
+        sys.exit(load_main(cli_args))
     main()